@@ -0,0 +1,117 @@
+import asyncio
+from datetime import date
+from typing import Dict, List, Optional
+
+from crud_operations import CinemaOperations
+from database import AsyncDatabaseManager
+
+class AsyncCinemaOperations:
+	"""Controparte asincrona delle operazioni di cassa di CinemaOperations.
+
+	Stessi nomi, argomenti e risultati per vendita, disponibilità, programmazione del
+	giorno, ricerca cliente e report. Le query passano dal driver aiomysql: mentre una
+	attende il database l'event loop serve le altre richieste, quindi un solo processo
+	regge centinaia di casse con un pool di poche decine di connessioni. La logica non è
+	duplicata: i metodi di CinemaOperations che ricevono la sessione girano qui con
+	AsyncSession.run_sync, e le strutture in memoria (mappa posti, listino, indici) sono
+	le stesse istanze globali. Il listino viene compilato con le query sincrone in un
+	thread, fuori dall'event loop; succede al più una volta ogni AppConfig.PRICING_TTL.
+
+	Uso:
+		async with AsyncCinemaOperations() as ops:
+			biglietto = await ops.create_biglietto(proiezione_id, cliente_id, posto_id)
+	"""
+
+	def __init__(self, db: AsyncDatabaseManager = None):
+		self.db = db or AsyncDatabaseManager()
+		self._ops = CinemaOperations()
+		self.seat_map = self._ops.seat_map
+		self.pricing = self._ops.pricing
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, *errore):
+		await self.close()
+
+	async def close(self) -> None:
+		await self.db.dispose()
+
+	# ========== OPERAZIONI CLIENTE ==========
+
+	async def get_cliente_by_id(self, cliente_id: int) -> Optional[Dict]:
+		async with self.db.get_session() as session:
+			return await session.run_sync(self._ops._cliente_by_id, cliente_id)
+
+	async def get_cliente_by_email(self, email: str) -> Optional[Dict]:
+		async with self.db.get_session() as session:
+			return await session.run_sync(self._ops._cliente_by_email, email)
+
+	async def get_storico_cliente(self, cliente_id: int) -> List[Dict]:
+		async with self.db.get_session() as session:
+			return await session.run_sync(self._ops._storico_cliente, cliente_id)
+
+	# ========== OPERAZIONI PROIEZIONI ==========
+
+	async def get_proiezioni_by_data(self, data: date) -> List[Dict]:
+		async with self.db.get_session() as session:
+			return await session.run_sync(self._ops._proiezioni_by_data, data)
+
+	# ========== OPERAZIONI BIGLIETTI ==========
+
+	async def create_biglietto(self, proiezione_id: int, cliente_id: int, posto_id: int,
+							   promozione_id: int = None, token: str = None) -> Dict:
+		await self._prepara_listino(proiezione_id)
+		async with self.db.get_session() as session:
+			biglietto_data = await session.run_sync(self._ops._vendi_biglietto, proiezione_id, cliente_id,
+													posto_id, promozione_id, token)
+		self.seat_map.segna_occupato(proiezione_id, posto_id)
+		return biglietto_data
+
+	async def create_biglietti_batch(self, proiezione_id: int, cliente_id: int, posto_ids: List[int],
+									 promozione_id: int = None, token: str = None) -> List[Dict]:
+		posto_ids = list(dict.fromkeys(posto_ids))
+		if not posto_ids:
+			raise ValueError("Nessun posto selezionato")
+		await self._prepara_listino(proiezione_id)
+		async with self.db.get_session() as session:
+			biglietti = await session.run_sync(self._ops._vendi_biglietti, proiezione_id, cliente_id,
+											   posto_ids, promozione_id, token)
+		for posto_id in posto_ids:
+			self.seat_map.segna_occupato(proiezione_id, posto_id)
+		return biglietti
+
+	async def get_posti_disponibili(self, proiezione_id: int) -> List[Dict]:
+		posti = self.seat_map.posti_liberi(proiezione_id)
+		if posti is None:
+			await self._carica_mappa_posti(proiezione_id)
+			posti = self.seat_map.posti_liberi(proiezione_id)
+		return posti or []
+
+	async def count_posti_disponibili(self, proiezione_id: int) -> int:
+		liberi = self.seat_map.conta_liberi(proiezione_id)
+		if liberi is None:
+			await self._carica_mappa_posti(proiezione_id)
+			liberi = self.seat_map.conta_liberi(proiezione_id)
+		return liberi or 0
+
+	async def _carica_mappa_posti(self, proiezione_id: int) -> None:
+		async with self.db.get_session() as session:
+			righe = await session.run_sync(self._ops._righe_mappa_posti, proiezione_id)
+		self.seat_map.install(proiezione_id, righe)
+
+	async def _prepara_listino(self, proiezione_id: int) -> None:
+		# la vendita legge il prezzo dal listino in memoria; se va compilato o la proiezione
+		# è nuova, le query sincrone del PricingEngine non devono bloccare l'event loop
+		if not self.pricing.pronto(proiezione_id):
+			await asyncio.to_thread(self.pricing.quote, proiezione_id)
+
+	# ========== REPORTS E ANALYTICS ==========
+
+	async def get_incassi_giornalieri(self, data_inizio: date, data_fine: date) -> List[Dict]:
+		async with self.db.get_session() as session:
+			return await session.run_sync(self._ops._incassi_giornalieri, data_inizio, data_fine)
+
+	async def get_film_popolari(self, limit: int = 10) -> List[Dict]:
+		async with self.db.get_session() as session:
+			return await session.run_sync(self._ops._film_popolari, limit)
@@ -0,0 +1,77 @@
+"""200 casse concorrenti: CinemaOperations in un thread pool contro AsyncCinemaOperations.
+
+Ogni cassa ripete cerca cliente -> programmazione del giorno -> vendita di un posto,
+su una proiezione diversa per le due strade. La strada sincrona usa un thread per
+cassa sul pool di DatabaseConfig.SQLALCHEMY_POOL_SIZE + MAX_OVERFLOW connessioni,
+quella asincrona un solo event loop sul pool aiomysql.
+
+Uso: python -m benchmarks.casse_async
+"""
+from benchmarks.common import cronometra, crea_scenario_vendita, percentili
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from tabulate import tabulate
+
+from async_operations import AsyncCinemaOperations
+from crud_operations import CinemaOperations
+
+CASSE = 200
+VENDITE_PER_CASSA = 5
+
+def cassa_sincrona(ops, scenario, posti):
+	latenze = []
+	for posto_id in posti:
+		inizio = time.perf_counter()
+		ops.get_cliente_by_id(scenario['cliente_id'])
+		ops.get_proiezioni_by_data(date.today())
+		ops.create_biglietto(scenario['proiezione_id'], scenario['cliente_id'], posto_id)
+		latenze.append(time.perf_counter() - inizio)
+	return latenze
+
+async def cassa_asincrona(ops, scenario, posti):
+	latenze = []
+	for posto_id in posti:
+		inizio = time.perf_counter()
+		await ops.get_cliente_by_id(scenario['cliente_id'])
+		await ops.get_proiezioni_by_data(date.today())
+		await ops.create_biglietto(scenario['proiezione_id'], scenario['cliente_id'], posto_id)
+		latenze.append(time.perf_counter() - inizio)
+	return latenze
+
+def sincrona(ops, scenario):
+	porzioni = [scenario['posti'][i::CASSE] for i in range(CASSE)]
+	with ThreadPoolExecutor(max_workers=CASSE) as pool:
+		risultati, durata = cronometra(
+			lambda: list(pool.map(lambda posti: cassa_sincrona(ops, scenario, posti), porzioni))
+		)
+	return [l for parziali in risultati for l in parziali], durata
+
+async def asincrona(scenario):
+	porzioni = [scenario['posti'][i::CASSE] for i in range(CASSE)]
+	async with AsyncCinemaOperations() as ops:
+		await ops.db.test_connection()
+		inizio = time.perf_counter()
+		risultati = await asyncio.gather(*(cassa_asincrona(ops, scenario, posti) for posti in porzioni))
+		durata = time.perf_counter() - inizio
+	return [l for parziali in risultati for l in parziali], durata
+
+def main():
+	ops = CinemaOperations()
+	file = CASSE * VENDITE_PER_CASSA // 25
+	scenari = [crea_scenario_vendita(ops, file, 25) for _ in range(2)]
+	righe = []
+	for nome, esegui in (("Sincrona (thread pool)", lambda: sincrona(ops, scenari[0])),
+						 ("Asincrona (event loop)", lambda: asyncio.run(asincrona(scenari[1])))):
+		latenze, durata = esegui()
+		stats = percentili(latenze)
+		righe.append([nome, len(latenze), f"{len(latenze) / durata:.0f} vendite/s",
+					  f"{stats['p50_ms']:.1f} ms", f"{stats['p99_ms']:.1f} ms"])
+	print(f"{CASSE} casse, {VENDITE_PER_CASSA} vendite ciascuna (3 query per vendita)")
+	print(tabulate(righe, headers=["Strada", "Vendite", "Throughput", "p50", "p99"], tablefmt='grid'))
+
+if __name__ == "__main__":
+	main()
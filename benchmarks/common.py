@@ -0,0 +1,92 @@
+"""Utility condivise dagli script di benchmark.
+
+Gli script vanno lanciati dalla cartella principale (es. `python -m benchmarks.posti_layout`)
+e lavorano su un database dedicato, per non sporcare i dati del cinema:
+il nome si imposta con BENCH_DB_NAME (default `cinema_multisala_bench`).
+"""
+import os
+
+# Va fatto prima di importare config/database, che leggono DB_NAME all'import
+os.environ['DB_NAME'] = os.getenv('BENCH_DB_NAME', 'cinema_multisala_bench')
+
+import statistics
+import time
+
+import pymysql
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def _ensure_database_exists():
+	conn = pymysql.connect(
+		host=os.getenv("DB_HOST"),
+		user=os.getenv("DB_USER"),
+		password=os.getenv("DB_PASSWORD"),
+		port=int(os.getenv("DB_PORT", 3306)),
+		autocommit=True
+	)
+	with conn.cursor() as cursor:
+		cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{os.environ['DB_NAME']}` DEFAULT CHARACTER SET utf8mb4;")
+	conn.close()
+
+_ensure_database_exists()
+
+from sqlalchemy import text
+
+from database import db_manager, init_database
+
+init_database()
+
+def cronometra(fn, *args, **kwargs):
+	"""Esegue fn una volta e restituisce (risultato, secondi)"""
+	inizio = time.perf_counter()
+	risultato = fn(*args, **kwargs)
+	return risultato, time.perf_counter() - inizio
+
+def percentili(campioni):
+	"""Riassume una lista di durate (in secondi) in millisecondi"""
+	ordinati = sorted(campioni)
+	def p(q):
+		return ordinati[min(len(ordinati) - 1, int(q * len(ordinati)))] * 1000
+	return {
+		'n': len(ordinati),
+		'media_ms': statistics.mean(ordinati) * 1000,
+		'p50_ms': p(0.50),
+		'p95_ms': p(0.95),
+		'p99_ms': p(0.99),
+		'max_ms': ordinati[-1] * 1000
+	}
+
+def elimina_sale(sala_ids):
+	"""Rimuove le sale create da un benchmark insieme ai loro posti"""
+	if not sala_ids:
+		return
+	with db_manager.get_session() as session:
+		for sala_id in sala_ids:
+			session.execute(text("DELETE FROM POSTO WHERE ID_Sala = :id"), {'id': sala_id})
+			session.execute(text("DELETE FROM SALA WHERE ID_Sala = :id"), {'id': sala_id})
+
+def crea_scenario_vendita(ops, file: int, posti_per_fila: int) -> dict:
+	"""Crea sala, film, tariffa, operatore, cliente e una proiezione pronti per la vendita"""
+	from datetime import date, time as ora
+
+	suffisso = str(time.time_ns())[-9:]
+	with db_manager.get_session() as session:
+		numero = session.execute(text("SELECT COALESCE(MAX(Numero), 0) + 1 FROM SALA")).scalar()
+	sala = ops.create_sala_with_layout(numero, 'Attiva', file, posti_per_fila)
+	regista_id = ops.create_regista("Bench", "Regista", "Italiana", None)
+	film_id = ops.create_film(f"Bench {suffisso}", 120, "Bench", "T", 2024, regista_id)
+	tariffa_id = ops.create_tariffa("Bench", 8.00)
+	operatore_id = ops.create_operatore("bench", f"op{suffisso}", "Proiezionista")
+	cliente_id = ops.create_cliente("Bench", "Cliente", f"bench{suffisso}@example.com")
+	proiezione_id = ops.create_proiezione(date.today(), ora(10, 0), ora(12, 0),
+										  film_id, sala['ID_Sala'], operatore_id, tariffa_id)
+	return {
+		'sala_id': sala['ID_Sala'],
+		'posti': sala['ID_Posti'],
+		'film_id': film_id,
+		'tariffa_id': tariffa_id,
+		'operatore_id': operatore_id,
+		'cliente_id': cliente_id,
+		'proiezione_id': proiezione_id
+	}
@@ -0,0 +1,65 @@
+"""Copia di una settimana di programmazione (14 sale × 7 giorni × 6 spettacoli) con clone_schedule.
+
+Uso: python -m benchmarks.copia_settimana
+"""
+from benchmarks.common import cronometra, crea_scenario_vendita, elimina_sale
+
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import text
+from tabulate import tabulate
+
+from crud_operations import CinemaOperations
+from database import db_manager
+from models import Proiezione
+
+SALE = 14
+SPETTACOLI = 6  # al giorno per sala, ogni 2 ore e mezza dalle 11
+SETTIMANE = 4
+
+def main():
+	ops = CinemaOperations()
+	scenario = crea_scenario_vendita(ops, 1, 1)
+	with db_manager.get_session() as session:
+		numero = session.execute(text("SELECT COALESCE(MAX(Numero), 0) + 1 FROM SALA")).scalar()
+	sale = [ops.create_sala_with_layout(numero + i, 'Attiva', 1, 1)['ID_Sala'] for i in range(SALE)]
+	# settimane lontane, per non incontrare proiezioni di altri benchmark
+	lunedi = date.today() + timedelta(days=3650)
+	lunedi -= timedelta(days=lunedi.weekday())
+
+	righe = []
+	for g in range(7):
+		for sala_id in sale:
+			for k in range(SPETTACOLI):
+				inizio = datetime.combine(lunedi + timedelta(days=g), time(11)) + timedelta(minutes=150 * k)
+				fine = inizio + timedelta(minutes=130)
+				righe.append({
+					'Data': inizio.date(), 'Ora_Inizio': inizio.time(), 'Ora_Fine': fine.time(),
+					'Inizio': inizio, 'Fine': fine,
+					'ID_Film': scenario['film_id'], 'ID_Sala': sala_id,
+					'ID_Operatore': scenario['operatore_id'], 'ID_Tariffa': scenario['tariffa_id']
+				})
+	try:
+		with db_manager.get_session() as session:
+			session.execute(Proiezione.__table__.insert(), righe)
+
+		risultati = []
+		# catena: ogni settimana copia la precedente
+		for s in range(SETTIMANE):
+			esito, secondi = cronometra(ops.clone_schedule, lunedi + timedelta(weeks=s),
+										lunedi + timedelta(weeks=s + 1), 7, sale)
+			risultati.append([f"Settimana {s + 1} -> {s + 2}", esito['Copiate'], len(esito['Saltate']),
+							  f"{secondi * 1000:.1f} ms"])
+		# seconda copia sulla stessa destinazione: tutto saltato per sovrapposizione
+		esito, secondi = cronometra(ops.clone_schedule, lunedi, lunedi + timedelta(weeks=1), 7, sale)
+		risultati.append(["Ripetizione (collisioni)", esito['Copiate'], len(esito['Saltate']),
+						  f"{secondi * 1000:.1f} ms"])
+		print(tabulate(risultati, headers=["Copia", "Copiate", "Saltate", "Tempo"], tablefmt='grid'))
+	finally:
+		with db_manager.get_session() as session:
+			for sala_id in sale:
+				session.execute(text("DELETE FROM PROIEZIONE WHERE ID_Sala = :id"), {'id': sala_id})
+		elimina_sale(sale)
+
+if __name__ == "__main__":
+	main()
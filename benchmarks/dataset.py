@@ -0,0 +1,158 @@
+"""Generatore dei dataset della suite di benchmark (scale in benchmarks.suite.SCALE).
+
+Popola un database vuoto con sale, film, clienti, proiezioni e biglietti usando
+INSERT multi-riga di Core (le scale grandi richiedono comunque decine di minuti),
+poi ricostruisce incassi giornalieri e statistiche film e aggiorna le statistiche
+dell'ottimizzatore. Un database che contiene già il dataset viene riusato così com'è.
+
+Le proiezioni coprono giornate consecutive che finiscono GIORNI_FUTURI giorni dopo
+la generazione; il "giorno di riferimento" (il primo dei giorni futuri, riletto dal
+database) fa da oggi per la suite, così i risultati non cambiano con l'età del dataset.
+
+Usato da benchmarks.suite, che sceglie il database della scala (--solo-dataset per
+generarlo senza misurare).
+"""
+from benchmarks.common import cronometra
+
+import random
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import text
+
+from database import db_manager
+from models import Biglietto, Cliente, Film, Proiezione
+
+FILE = 15
+POSTI_PER_FILA = 20
+PER_GIORNO = 5  # proiezioni da 2 ore ogni 3 ore a partire dalle 11
+GIORNI_FUTURI = 7
+BLOCCO = 10000
+GENERI = ('Azione', 'Commedia', 'Dramma', 'Fantascienza', 'Horror', 'Animazione', 'Thriller', 'Documentario')
+PAROLE = ('notte', 'città', 'ritorno', 'ombra', 'mare', 'guerra', 'amore', 'segreto', 'ultimo', 'viaggio',
+		  'stelle', 'fuoco', 'silenzio', 'cuore', 'tempo', 'lupo', 'inverno', 'strada', 'sogno', 'confine')
+
+def prepara_dataset(ops, scala: str, dimensioni: dict) -> dict:
+	"""Genera il dataset se il database è vuoto; restituisce la sua descrizione"""
+	with db_manager.get_session() as session:
+		proiezioni = session.execute(text("SELECT COUNT(*) FROM PROIEZIONE")).scalar()
+		biglietti = session.execute(text("SELECT COUNT(*) FROM BIGLIETTO")).scalar()
+	if proiezioni == 0:
+		_, secondi = cronometra(_genera, ops, dimensioni)
+		print(f"Dataset '{scala}' generato in {secondi / 60:.1f} minuti")
+	elif proiezioni < dimensioni['proiezioni'] or biglietti < dimensioni['biglietti']:
+		raise RuntimeError(
+			f"Il database contiene già dati ({proiezioni} proiezioni, {biglietti} biglietti) ma non "
+			f"il dataset '{scala}': usa un database vuoto (BENCH_DB_NAME)"
+		)
+	return descrivi_dataset(scala)
+
+def descrivi_dataset(scala: str) -> dict:
+	with db_manager.get_session() as session:
+		sale = {}
+		for riga in session.execute(text("SELECT ID_Sala, ID_Posto FROM POSTO ORDER BY ID_Sala, ID_Posto")):
+			sale.setdefault(riga.ID_Sala, []).append(riga.ID_Posto)
+		clienti = session.execute(text("SELECT MIN(ID_Cliente), MAX(ID_Cliente) FROM CLIENTE")).one()
+		giorni = session.execute(text("SELECT MIN(Data), MAX(Data) FROM PROIEZIONE")).one()
+		conteggi = {
+			tabella.lower(): session.execute(text(f"SELECT COUNT(*) FROM {tabella}")).scalar()
+			for tabella in ('SALA', 'FILM', 'CLIENTE', 'PROIEZIONE', 'BIGLIETTO')
+		}
+	return {
+		'scala': scala,
+		'conteggi': conteggi,
+		'posti': sale,
+		'clienti': tuple(clienti),
+		'primo_giorno': giorni[0],
+		'ultimo_giorno': giorni[1],
+		'riferimento': giorni[1] - timedelta(days=GIORNI_FUTURI - 1),
+	}
+
+def _genera(ops, dimensioni: dict) -> None:
+	if dimensioni['biglietti'] > dimensioni['proiezioni'] * FILE * POSTI_PER_FILA:
+		raise ValueError("Troppi biglietti per le proiezioni: le sale hanno "
+						 f"{FILE * POSTI_PER_FILA} posti")
+	rng = random.Random(42)
+	sale = {}
+	for numero in range(1, dimensioni['sale'] + 1):
+		sala = ops.create_sala_with_layout(numero, 'Attiva', FILE, POSTI_PER_FILA)
+		sale[sala['ID_Sala']] = sala['ID_Posti']
+	regista_id = ops.create_regista("Suite", "Regista", "Italiana", None)
+	tariffa_id = ops.create_tariffa("Suite", 8.00)
+	operatore_id = ops.create_operatore("Suite", "Proiezionista", "Proiezionista")
+
+	_inserisci(Film.__table__, dimensioni['film'], lambda i: {
+		'Titolo': f"{rng.choice(PAROLE).capitalize()} {rng.choice(PAROLE)} {i}",
+		'Durata': 120, 'Genere': rng.choice(GENERI), 'Classificazione': 'T',
+		'Anno_Uscita': 1980 + i % 45, 'ID_Regista': regista_id
+	})
+	_inserisci(Cliente.__table__, dimensioni['clienti'], lambda i: {
+		'Nome': 'Suite', 'Cognome': f'Cliente{i}', 'Email': f'suite.{i}@example.com', 'Telefono': '0000000000'
+	})
+	print(f"Sale, {dimensioni['film']} film e {dimensioni['clienti']} clienti inseriti")
+
+	with db_manager.get_session() as session:
+		film = session.execute(text("SELECT MIN(ID_Film), MAX(ID_Film) FROM FILM")).one()
+		clienti = session.execute(text("SELECT MIN(ID_Cliente), MAX(ID_Cliente) FROM CLIENTE")).one()
+
+	per_giorno = len(sale) * PER_GIORNO
+	giorni = -(-dimensioni['proiezioni'] // per_giorno)
+	primo_giorno = date.today() - timedelta(days=giorni - GIORNI_FUTURI)
+	sala_ids = list(sale)
+
+	def proiezione(i):
+		giorno = primo_giorno + timedelta(days=i // per_giorno)
+		avvio = datetime.combine(giorno, time(11)) + timedelta(hours=3 * (i % PER_GIORNO))
+		fine = avvio + timedelta(hours=2)
+		return {
+			'Data': giorno, 'Ora_Inizio': avvio.time(), 'Ora_Fine': fine.time(), 'Inizio': avvio, 'Fine': fine,
+			'ID_Film': rng.randint(*film), 'ID_Sala': sala_ids[i % per_giorno // PER_GIORNO],
+			'ID_Operatore': operatore_id, 'ID_Tariffa': tariffa_id
+		}
+
+	_inserisci(Proiezione.__table__, dimensioni['proiezioni'], proiezione)
+	print(f"{dimensioni['proiezioni']} proiezioni inserite")
+	_genera_biglietti(rng, sale, clienti, dimensioni)
+	print(f"{dimensioni['biglietti']} biglietti inseriti")
+
+	ops.ricostruisci_incassi()
+	ops.ricostruisci_statistiche_film()
+	with db_manager.engine.connect() as conn:
+		conn.execute(text("ANALYZE TABLE SALA, POSTO, FILM, CLIENTE, PROIEZIONE, BIGLIETTO"))
+	# le righe sono arrivate senza passare da CinemaOperations
+	ops.reference_cache.invalidate()
+	ops.film_search.invalidate()
+	ops.schedule_index.invalidate()
+	ops.seat_map.invalidate()
+
+def _genera_biglietti(rng, sale: dict, clienti, dimensioni: dict) -> None:
+	oggi = date.today()
+	per_proiezione, resto = divmod(dimensioni['biglietti'], dimensioni['proiezioni'])
+	righe = []
+	# le proiezioni vengono lette in streaming mentre i biglietti si scrivono su un'altra connessione
+	with db_manager.engine.connect() as lettura, db_manager.get_session() as session:
+		proiezioni = lettura.execution_options(stream_results=True, yield_per=BLOCCO).execute(text(
+			"SELECT ID_Proiezione, ID_Sala, Data FROM PROIEZIONE ORDER BY ID_Proiezione"
+		))
+		for n, (proiezione_id, sala_id, giorno) in enumerate(proiezioni):
+			passata = giorno < oggi
+			for posto_id in sale[sala_id][:per_proiezione + (n < resto)]:
+				annullato = rng.random() < 0.05
+				emissione = datetime.combine(giorno, time(10)) - timedelta(minutes=rng.randint(0, 7 * 24 * 60))
+				righe.append({
+					'Stato': 'Annullato' if annullato else ('Utilizzato' if passata else 'Valido'),
+					'Prezzo_Applicato': 8.00, 'Data_Emissione': emissione,
+					'ID_Proiezione': proiezione_id, 'ID_Cliente': rng.randint(*clienti), 'ID_Posto': posto_id
+				})
+			if len(righe) >= BLOCCO:
+				session.execute(Biglietto.__table__.insert(), righe)
+				session.commit()
+				righe = []
+		if righe:
+			session.execute(Biglietto.__table__.insert(), righe)
+
+def _inserisci(tabella, quante: int, riga) -> None:
+	with db_manager.get_session() as session:
+		for da in range(0, quante, BLOCCO):
+			session.execute(tabella.insert(), [riga(i) for i in range(da, min(da + BLOCCO, quante))])
+			session.commit()
+
@@ -0,0 +1,65 @@
+"""Esportazione di 500k clienti: lista bufferizzata contro generatore su cursore lato server.
+
+Misura tempo e picco di memoria Python (tracemalloc) delle due strade; col generatore
+il picco deve restare quello di un blocco di AppConfig.STREAM_BLOCCO righe.
+
+Uso: python -m benchmarks.esportazione
+"""
+from benchmarks.common import cronometra
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import text
+from tabulate import tabulate
+
+from crud_operations import CinemaOperations
+from database import db_manager
+from esportazione import esporta
+from models import Cliente
+
+CLIENTI = 500000
+BLOCCO = 10000
+
+def picco(fn, *args):
+	"""(risultato, secondi, picco MB) di fn"""
+	tracemalloc.start()
+	try:
+		risultato, secondi = cronometra(fn, *args)
+		_, massimo = tracemalloc.get_traced_memory()
+	finally:
+		tracemalloc.stop()
+	return risultato, secondi, massimo / 2**20
+
+def main():
+	ops = CinemaOperations()
+	prefisso = f"bench{str(time.time_ns())[-9:]}"
+	with db_manager.get_session() as session:
+		for da in range(0, CLIENTI, BLOCCO):
+			session.execute(Cliente.__table__.insert(), [
+				{'Nome': 'Bench', 'Cognome': f'Cliente{i}', 'Email': f'{prefisso}.{i}@example.com',
+				 'Telefono': '0000000000'}
+				for i in range(da, min(da + BLOCCO, CLIENTI))
+			])
+			session.commit()
+	cartella = tempfile.mkdtemp()
+	try:
+		righe = []
+		for nome, fn in (("get_all_clienti + CSV", lambda p: esporta(ops.get_all_clienti(), p, 'csv')),
+						 ("iter_clienti + CSV", lambda p: esporta(ops.iter_clienti(), p, 'csv')),
+						 ("iter_clienti + JSON lines", lambda p: esporta(ops.iter_clienti(), p, 'jsonl'))):
+			percorso = os.path.join(cartella, f"{len(righe)}.out")
+			scritte, secondi, mb = picco(fn, percorso)
+			righe.append([nome, scritte, f"{secondi:.2f} s", f"{scritte / secondi:,.0f}", f"{mb:.1f} MB"])
+			os.remove(percorso)
+		print(tabulate(righe, headers=["Esportazione", "Righe", "Tempo", "Righe/s", "Picco memoria"],
+					   tablefmt='grid'))
+	finally:
+		os.rmdir(cartella)
+		with db_manager.get_session() as session:
+			session.execute(text("DELETE FROM CLIENTE WHERE Email LIKE :p"), {'p': f'{prefisso}.%'})
+
+if __name__ == "__main__":
+	main()
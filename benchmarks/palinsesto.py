@@ -0,0 +1,55 @@
+"""Generazione del palinsesto settimanale di 14 sale (obiettivo: meno di un secondo).
+
+Uso: python -m benchmarks.palinsesto
+"""
+from benchmarks.common import cronometra, elimina_sale
+
+import random
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+from tabulate import tabulate
+
+from crud_operations import CinemaOperations
+from database import db_manager
+
+SALE = 14
+FILM = 25
+OBIETTIVO = 1.0  # secondi
+
+def main():
+	ops = CinemaOperations()
+	suffisso = str(time.time_ns())[-9:]
+	with db_manager.get_session() as session:
+		numero = session.execute(text("SELECT COALESCE(MAX(Numero), 0) + 1 FROM SALA")).scalar()
+	sale = [ops.create_sala_with_layout(numero + i, 'Attiva', 10, 12)['ID_Sala'] for i in range(SALE)]
+	regista_id = ops.create_regista("Bench", "Regista", "Italiana", None)
+	film = [ops.create_film(f"Bench {suffisso} {i}", random.randint(85, 170), "Bench", "T", 2024, regista_id)
+			for i in range(FILM)]
+	tariffa_id = ops.create_tariffa("Bench", 8.00)
+	for i in range(3):
+		ops.create_operatore("bench", f"pal{suffisso}{i}", "Proiezionista")
+	richieste = {film_id: random.randint(10, 30) for film_id in film}
+	# una settimana lontana, per non incontrare proiezioni di altri benchmark
+	lunedi = date.today() + timedelta(days=3650)
+	lunedi -= timedelta(days=lunedi.weekday())
+
+	try:
+		proposta, t_proposta = cronometra(ops.genera_palinsesto, lunedi, richieste, tariffa_id, salva=False)
+		salvato, t_salvato = cronometra(ops.genera_palinsesto, lunedi, richieste, tariffa_id)
+		print(tabulate([
+			["Solo pianificazione", len(proposta['Proiezioni']), len(proposta['Non_Piazzate']),
+			 f"{t_proposta:.3f} s", "OK" if t_proposta < OBIETTIVO else "SOTTO"],
+			["Pianificazione + inserimento", len(salvato['Proiezioni']), len(salvato['Non_Piazzate']),
+			 f"{t_salvato:.3f} s", "OK" if t_salvato < OBIETTIVO else "SOTTO"]
+		], headers=["Fase", "Proiezioni", "Non piazzate", "Tempo", f"Obiettivo {OBIETTIVO:.0f} s"], tablefmt='grid'))
+	finally:
+		with db_manager.get_session() as session:
+			for sala_id in sale:
+				session.execute(text("DELETE FROM PROIEZIONE WHERE ID_Sala = :id"), {'id': sala_id})
+		elimina_sale(sale)
+		ops.schedule_index.invalidate()
+
+if __name__ == "__main__":
+	main()
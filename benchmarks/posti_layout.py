@@ -0,0 +1,41 @@
+"""Confronto fra creazione posto-per-posto e create_sala_with_layout.
+
+Uso: python -m benchmarks.posti_layout
+"""
+from benchmarks.common import cronometra, elimina_sale
+
+from tabulate import tabulate
+
+from crud_operations import CinemaOperations
+
+# (numero posti, file, posti per fila)
+SCENARI = [(100, 10, 10), (1000, 40, 25), (10000, 100, 100)]
+NUMERO_SALA_BASE = 90000
+
+def per_posto(ops, numero, file, posti_per_fila):
+	sala_id = ops.create_sala(numero, file * posti_per_fila, 'Attiva')
+	for fila, num in ops._build_layout(file, posti_per_fila):
+		ops.create_posto(sala_id, fila, num)
+	return sala_id
+
+def bulk(ops, numero, file, posti_per_fila):
+	return ops.create_sala_with_layout(numero, 'Attiva', file, posti_per_fila)['ID_Sala']
+
+def main():
+	ops = CinemaOperations()
+	rows = []
+	for i, (posti, file, posti_per_fila) in enumerate(SCENARI):
+		sale = []
+		try:
+			sala_id, t_singolo = cronometra(per_posto, ops, NUMERO_SALA_BASE + 2 * i, file, posti_per_fila)
+			sale.append(sala_id)
+			sala_id, t_bulk = cronometra(bulk, ops, NUMERO_SALA_BASE + 2 * i + 1, file, posti_per_fila)
+			sale.append(sala_id)
+		finally:
+			elimina_sale(sale)
+		rows.append([posti, f"{t_singolo:.3f}s", f"{t_bulk:.3f}s", f"{t_singolo / t_bulk:.1f}x"])
+
+	print(tabulate(rows, headers=["Posti", "Per posto", "Layout bulk", "Speedup"], tablefmt='grid'))
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,49 @@
+"""Preventivi al secondo del listino compilato (quote e quote_many).
+
+Uso: python -m benchmarks.prezzi
+"""
+from benchmarks.common import cronometra, crea_scenario_vendita
+
+from datetime import date, time, timedelta
+
+from tabulate import tabulate
+
+from crud_operations import CinemaOperations
+
+PREVENTIVI = 100000
+OBIETTIVO = 100000  # preventivi al secondo
+
+def main():
+	ops = CinemaOperations()
+	scenario = crea_scenario_vendita(ops, 1, 10)
+	ops.create_tariffa("Bench", 9.50, fascia_oraria='Mattina')
+	promo_id = ops.create_promozione("Bench", ops.create_tipo_promozione("Bench", None), 20,
+									 date.today(), date.today() + timedelta(days=1))
+	# una giornata di programmazione sulla sala dello scenario
+	giornata = [scenario['proiezione_id']] + [
+		ops.create_proiezione(date.today() + timedelta(days=1), time(h, 0), time(h, 50),
+							  scenario['film_id'], scenario['sala_id'],
+							  scenario['operatore_id'], scenario['tariffa_id'])
+		for h in range(10, 24)
+	]
+	ops.pricing.quote_many(giornata)  # compila il listino e carica le proiezioni
+
+	def singoli():
+		quote = ops.pricing.quote
+		for i in range(PREVENTIVI):
+			quote(giornata[i % len(giornata)], promo_id if i & 1 else None)
+
+	def vettoriali():
+		for _ in range(PREVENTIVI // len(giornata)):
+			ops.pricing.quote_many(giornata, promo_id)
+
+	_, t_singoli = cronometra(singoli)
+	_, t_vettoriali = cronometra(vettoriali)
+	n_vettoriali = PREVENTIVI // len(giornata) * len(giornata)
+	print(tabulate([
+		["quote", f"{PREVENTIVI / t_singoli:,.0f}/s", "OK" if PREVENTIVI / t_singoli >= OBIETTIVO else "SOTTO"],
+		["quote_many", f"{n_vettoriali / t_vettoriali:,.0f}/s", "OK" if n_vettoriali / t_vettoriali >= OBIETTIVO else "SOTTO"]
+	], headers=["API", "Preventivi", f"Obiettivo {OBIETTIVO:,}/s"], tablefmt='grid'))
+
+if __name__ == "__main__":
+	main()
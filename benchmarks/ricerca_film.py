@@ -0,0 +1,77 @@
+"""Ricerca film su un catalogo di 200k titoli: LIKE '%termine%' contro l'indice in memoria.
+
+Uso: python -m benchmarks.ricerca_film
+"""
+from benchmarks.common import cronometra, percentili
+
+import random
+import string
+import time
+
+from sqlalchemy import text
+from tabulate import tabulate
+
+from crud_operations import CinemaOperations
+from database import db_manager
+from models import Film
+
+TITOLI = 200000
+BLOCCO = 10000
+OBIETTIVO_MS = 5.0
+# digitazione alla cassa: prefissi crescenti e qualche ricerca a più parole
+RICERCHE = ["la", "la c", "la cit", "amo", "amore", "notte", "il sig", "uomo che", "comm", "drammatico notte"]
+PAROLE_COMUNI = ["il", "la", "di", "amore", "notte", "uomo", "città", "signore", "che", "ritorno"]
+
+def titolo_casuale():
+	parole = [random.choice(PAROLE_COMUNI) if random.random() < 0.3 else
+			  "".join(random.choice(string.ascii_lowercase) for _ in range(random.randint(3, 9)))
+			  for _ in range(random.randint(1, 5))]
+	return " ".join(parole).capitalize()
+
+def main():
+	ops = CinemaOperations()
+	suffisso = str(time.time_ns())[-9:]
+	regista_id = ops.create_regista("Bench", f"Regista{suffisso}", "Italiana", None)
+	generi = ["Commedia", "Drammatico", "Azione", "Horror", "Animazione"]
+	with db_manager.get_session() as session:
+		primo = session.execute(text("SELECT COALESCE(MAX(ID_Film), 0) + 1 FROM FILM")).scalar()
+		for da in range(0, TITOLI, BLOCCO):
+			session.execute(Film.__table__.insert(), [
+				{'ID_Film': primo + i, 'Titolo': titolo_casuale(), 'Durata': 100, 'Genere': random.choice(generi),
+				 'Classificazione': 'T', 'Anno_Uscita': 2000, 'ID_Regista': regista_id}
+				for i in range(da, min(da + BLOCCO, TITOLI))
+			])
+			session.commit()
+	try:
+		ops.film_search.invalidate()
+		_, t_caricamento = cronometra(ops.search_film, "amore")
+
+		def campiona(cerca, ripetizioni):
+			campioni = []
+			for _ in range(ripetizioni):
+				for termine in RICERCHE:
+					_, secondi = cronometra(cerca, termine)
+					campioni.append(secondi)
+			return percentili(campioni)
+
+		def cerca_like(termine):
+			with db_manager.get_session() as session:
+				return session.execute(text("SELECT ID_Film, Titolo FROM FILM WHERE Titolo LIKE :t"),
+									   {'t': f'%{termine}%'}).fetchall()
+
+		like = campiona(cerca_like, 1)
+		indice = campiona(ops.search_film, 100)
+		print(f"Caricamento dell'indice: {t_caricamento:.2f} s")
+		print(tabulate([
+			["LIKE '%termine%'", f"{like['p50_ms']:.2f} ms", f"{like['p99_ms']:.2f} ms", "-"],
+			["Indice in memoria", f"{indice['p50_ms']:.3f} ms", f"{indice['p99_ms']:.3f} ms",
+			 "OK" if indice['p99_ms'] < OBIETTIVO_MS else "SOTTO"]
+		], headers=["Ricerca", "p50", "p99", f"Obiettivo {OBIETTIVO_MS:.0f} ms"], tablefmt='grid'))
+	finally:
+		with db_manager.get_session() as session:
+			session.execute(text("DELETE FROM FILM WHERE ID_Regista = :id"), {'id': regista_id})
+			session.execute(text("DELETE FROM REGISTA WHERE ID_Regista = :id"), {'id': regista_id})
+		ops.film_search.invalidate()
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,81 @@
+"""Carico sul servizio HTTP: 32 client keep-alive su programmazione, posti liberi e vendita.
+
+Il servizio gira nello stesso processo su una porta libera; ogni client alterna
+GET /proiezioni, GET /proiezioni/<id>/posti (la metà con If-None-Match, come un chiosco
+che rinfresca la mappa) e POST /biglietti sui propri posti. Client e server condividono
+il GIL: i numeri sono un limite inferiore di quanto regge il servizio da solo.
+
+Uso: python -m benchmarks.servizio_http
+"""
+from benchmarks.common import cronometra, crea_scenario_vendita, percentili
+
+import http.client
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from tabulate import tabulate
+
+from crud_operations import CinemaOperations
+from http_service import crea_server
+
+CLIENT = 32
+GIRI_PER_CLIENT = 25
+
+def client(porta, scenario, posti):
+	connessione = http.client.HTTPConnection('127.0.0.1', porta)
+	latenze = {'programmazione': [], 'posti': [], 'vendita': []}
+	etag = None
+
+	def richiesta(tipo, metodo, percorso, corpo=None, intestazioni=None):
+		inizio = time.perf_counter()
+		connessione.request(metodo, percorso, body=corpo, headers=intestazioni or {})
+		risposta = connessione.getresponse()
+		risposta.read()
+		latenze[tipo].append(time.perf_counter() - inizio)
+		return risposta
+
+	for giro, posto_id in enumerate(posti):
+		richiesta('programmazione', 'GET', f"/proiezioni?data={date.today().isoformat()}")
+		intestazioni = {'If-None-Match': etag} if etag and giro % 2 else None
+		risposta = richiesta('posti', 'GET', f"/proiezioni/{scenario['proiezione_id']}/posti",
+							 intestazioni=intestazioni)
+		etag = risposta.getheader('ETag')
+		corpo = json.dumps({'proiezione_id': scenario['proiezione_id'],
+							'cliente_id': scenario['cliente_id'], 'posto_id': posto_id})
+		risposta = richiesta('vendita', 'POST', '/biglietti', corpo, {'Content-Type': 'application/json'})
+		if risposta.status != 201:
+			raise RuntimeError(f"Vendita fallita: HTTP {risposta.status}")
+	connessione.close()
+	return latenze
+
+def main():
+	ops = CinemaOperations()
+	scenario = crea_scenario_vendita(ops, CLIENT * GIRI_PER_CLIENT // 20, 20)
+	server = crea_server('127.0.0.1', 0, ops)
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	porta = server.server_address[1]
+	try:
+		porzioni = [scenario['posti'][i::CLIENT] for i in range(CLIENT)]
+		with ThreadPoolExecutor(max_workers=CLIENT) as pool:
+			risultati, durata = cronometra(
+				lambda: list(pool.map(lambda posti: client(porta, scenario, posti), porzioni))
+			)
+	finally:
+		server.shutdown()
+		server.server_close()
+
+	righe = []
+	totale = 0
+	for tipo in ('programmazione', 'posti', 'vendita'):
+		campioni = [l for latenze in risultati for l in latenze[tipo]]
+		totale += len(campioni)
+		stats = percentili(campioni)
+		righe.append([tipo, stats['n'], f"{stats['p50_ms']:.2f} ms", f"{stats['p99_ms']:.2f} ms"])
+	print(f"{CLIENT} client, {totale} richieste in {durata:.2f} s: {totale / durata:.0f} richieste/s")
+	print(tabulate(righe, headers=["Endpoint", "Richieste", "p50", "p99"], tablefmt='grid'))
+
+if __name__ == "__main__":
+	main()
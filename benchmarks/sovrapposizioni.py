@@ -0,0 +1,101 @@
+"""Controllo di sovrapposizione in sala con 1M di proiezioni.
+
+Confronta la vecchia query (Data + tre rami OR su Ora_Inizio/Ora_Fine) con la ricerca
+per intervallo su (ID_Sala, Inizio) usata da _check_sala_overlap.
+
+Uso: python -m benchmarks.sovrapposizioni
+"""
+from benchmarks.common import crea_scenario_vendita, elimina_sale, percentili
+
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+from tabulate import tabulate
+
+from crud_operations import CinemaOperations
+from database import db_manager
+from models import Proiezione
+
+SALE = 20
+PROIEZIONI = 1000000
+PER_GIORNO = 5  # proiezioni da 2 ore ogni 3 ore a partire dalle 11
+PROVE = 2000
+BLOCCO = 10000
+
+VECCHIA = text("""
+SELECT ID_Proiezione FROM PROIEZIONE
+WHERE ID_Sala = :sala AND Data = :data
+  AND ((Ora_Inizio <= :ora_inizio AND Ora_Fine > :ora_inizio)
+	OR (Ora_Inizio < :ora_fine AND Ora_Fine >= :ora_fine)
+	OR (Ora_Inizio >= :ora_inizio AND Ora_Fine <= :ora_fine))
+LIMIT 1
+""")
+
+def popola(scenario, sale):
+	righe = []
+	giorni = PROIEZIONI // (len(sale) * PER_GIORNO)
+	inizio = date(2000, 1, 1)
+	with db_manager.get_session() as session:
+		for g in range(giorni):
+			giorno = inizio + timedelta(days=g)
+			for sala_id in sale:
+				for k in range(PER_GIORNO):
+					avvio = datetime.combine(giorno, datetime.min.time()) + timedelta(hours=11 + 3 * k)
+					fine = avvio + timedelta(hours=2)
+					righe.append({
+						'Data': giorno, 'Ora_Inizio': avvio.time(), 'Ora_Fine': fine.time(),
+						'Inizio': avvio, 'Fine': fine,
+						'ID_Film': scenario['film_id'], 'ID_Sala': sala_id,
+						'ID_Operatore': scenario['operatore_id'], 'ID_Tariffa': scenario['tariffa_id']
+					})
+			if len(righe) >= BLOCCO:
+				session.execute(Proiezione.__table__.insert(), righe)
+				session.commit()
+				righe = []
+		if righe:
+			session.execute(Proiezione.__table__.insert(), righe)
+	return giorni
+
+def misura(fn, prove):
+	campioni = []
+	for args in prove:
+		avvio = time.perf_counter()
+		fn(*args)
+		campioni.append(time.perf_counter() - avvio)
+	return percentili(campioni)
+
+def main():
+	ops = CinemaOperations()
+	scenario = crea_scenario_vendita(ops, 1, 1)
+	with db_manager.get_session() as session:
+		numero = session.execute(text("SELECT COALESCE(MAX(Numero), 0) + 1 FROM SALA")).scalar()
+	sale = [ops.create_sala_with_layout(numero + i, 'Attiva', 1, 1)['ID_Sala'] for i in range(SALE)]
+	try:
+		giorni = popola(scenario, sale)
+		prove = []
+		for _ in range(PROVE):
+			giorno = date(2000, 1, 1) + timedelta(days=random.randrange(giorni))
+			ora = random.randrange(10, 22)
+			prove.append((random.choice(sale), giorno, datetime.min.replace(hour=ora).time(),
+						  datetime.min.replace(hour=ora + 2).time()))
+
+		with db_manager.get_session() as session:
+			vecchia = misura(lambda s, d, i, f: session.execute(VECCHIA, {
+				'sala': s, 'data': d, 'ora_inizio': i, 'ora_fine': f
+			}).first(), prove)
+			nuova = misura(lambda s, d, i, f: ops._check_sala_overlap(session, s, d, i, f), prove)
+
+		print(tabulate([
+			["Data + OR su orari", f"{vecchia['p50_ms']:.3f} ms", f"{vecchia['p99_ms']:.3f} ms"],
+			["Range su (ID_Sala, Inizio)", f"{nuova['p50_ms']:.3f} ms", f"{nuova['p99_ms']:.3f} ms"]
+		], headers=["Controllo", "p50", "p99"], tablefmt='grid'))
+	finally:
+		with db_manager.get_session() as session:
+			for sala_id in sale + [scenario['sala_id']]:
+				session.execute(text("DELETE FROM PROIEZIONE WHERE ID_Sala = :id"), {'id': sala_id})
+		elimina_sale(sale)
+
+if __name__ == "__main__":
+	main()
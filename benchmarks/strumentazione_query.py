@@ -0,0 +1,58 @@
+"""Costo della strumentazione delle query sulla vendita: create_biglietto con e senza query_stats.
+
+Vende in sequenza blocchi di posti alternando strumentazione spenta e accesa, così
+derive del database (cache, buffer pool) pesano allo stesso modo sulle due serie.
+La soglia delle query lente è alzata perché il registro non entri nella misura:
+si misura il costo dei listener e del decoratore, che deve restare sotto il 5%.
+
+Uso: python -m benchmarks.strumentazione_query
+"""
+from benchmarks.common import crea_scenario_vendita, percentili
+
+import statistics
+import time
+
+from tabulate import tabulate
+
+from crud_operations import CinemaOperations
+from query_stats import query_stats
+
+GIRI = 10
+VENDITE_PER_GIRO = 100
+
+def vendi(ops, scenario, posti):
+	latenze = []
+	for posto_id in posti:
+		inizio = time.perf_counter()
+		ops.create_biglietto(scenario['proiezione_id'], scenario['cliente_id'], posto_id)
+		latenze.append(time.perf_counter() - inizio)
+	return latenze
+
+def main():
+	ops = CinemaOperations()
+	scenario = crea_scenario_vendita(ops, 2 * GIRI * VENDITE_PER_GIRO // 25 + 1, 25)
+	posti = iter(scenario['posti'])
+	soglia, attiva = query_stats.soglia, query_stats.attiva
+	query_stats.soglia = float('inf')
+	latenze = {False: [], True: []}
+	try:
+		# riscaldamento: listino, mappa posti e pool pronti prima di misurare
+		vendi(ops, scenario, [next(posti) for _ in range(10)])
+		for giro in range(GIRI):
+			for stato in ((False, True) if giro % 2 else (True, False)):
+				query_stats.attiva = stato
+				latenze[stato] += vendi(ops, scenario, [next(posti) for _ in range(VENDITE_PER_GIRO)])
+	finally:
+		query_stats.soglia, query_stats.attiva = soglia, attiva
+
+	righe = []
+	for stato, nome in ((False, "Strumentazione spenta"), (True, "Strumentazione accesa")):
+		stats = percentili(latenze[stato])
+		righe.append([nome, stats['n'], f"{stats['media_ms']:.3f} ms", f"{stats['p50_ms']:.3f} ms",
+					  f"{stats['p99_ms']:.3f} ms"])
+	print(tabulate(righe, headers=["Vendita", "Biglietti", "Media", "p50", "p99"], tablefmt='grid'))
+	costo = statistics.median(latenze[True]) / statistics.median(latenze[False]) - 1
+	print(f"Costo della strumentazione (mediana): {costo * 100:+.1f}%")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,208 @@
+"""Suite di benchmark sui percorsi caldi di CinemaOperations, con confronto su una baseline.
+
+Alla prima esecuzione genera il dataset della scala (benchmarks.dataset) in un
+database dedicato, cinema_multisala_bench_<scala> salvo BENCH_DB_NAME, e lo riusa
+nelle successive. Ogni operazione viene chiamata --ripetizioni volte con argomenti
+casuali ma riproducibili (seme fisso), dopo qualche chiamata di riscaldamento. I
+percentili in ms finiscono in un file JSON; se esiste la baseline della scala, ogni
+operazione il cui p50 o p95 peggiora oltre --tolleranza (e di almeno
+MIN_DIFFERENZA_MS) è una regressione, e il processo esce con codice 1.
+
+Gira solo su MySQL: vendita, incassi e migrazioni usano costrutti (INSERT ... FROM
+DUAL, ON DUPLICATE KEY UPDATE, GET_LOCK) che un database embedded non esegue.
+create_biglietto vende posti veri delle proiezioni future del dataset, che quindi
+si riempie lentamente: rigenerarlo (database vuoto) riporta i numeri confrontabili.
+
+Uso: python -m benchmarks.suite [--scala piccola|media|grande] [--ripetizioni 200]
+	[--output FILE] [--baseline FILE] [--salva-baseline] [--tolleranza 0.15] [--solo-dataset]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, time as ora, timedelta
+
+SCALE = {
+	'piccola': {'sale': 10, 'film': 200, 'clienti': 10000, 'proiezioni': 1000, 'biglietti': 100000},
+	'media': {'sale': 30, 'film': 2000, 'clienti': 500000, 'proiezioni': 100000, 'biglietti': 5000000},
+	'grande': {'sale': 100, 'film': 10000, 'clienti': 2000000, 'proiezioni': 1000000, 'biglietti': 50000000},
+}
+RISCALDAMENTO = 10
+MIN_DIFFERENZA_MS = 0.02  # sotto questa differenza il rumore conta più del codice
+CARTELLA = os.path.dirname(os.path.abspath(__file__))
+
+def _argomenti():
+	parser = argparse.ArgumentParser(description="Suite di benchmark di CinemaOperations")
+	parser.add_argument('--scala', choices=SCALE, default='piccola')
+	parser.add_argument('--ripetizioni', type=int, default=200)
+	parser.add_argument('--output', help="file JSON dei risultati (default risultati_<scala>.json)")
+	parser.add_argument('--baseline', help="baseline da confrontare (default benchmarks/baseline_<scala>.json)")
+	parser.add_argument('--salva-baseline', action='store_true', help="scrive i risultati come nuova baseline")
+	parser.add_argument('--tolleranza', type=float, default=0.15, help="peggioramento relativo ammesso")
+	parser.add_argument('--solo-dataset', action='store_true', help="genera il dataset senza misurare")
+	argomenti = parser.parse_args()
+	argomenti.output = argomenti.output or f"risultati_{argomenti.scala}.json"
+	argomenti.baseline = argomenti.baseline or os.path.join(CARTELLA, f"baseline_{argomenti.scala}.json")
+	return argomenti
+
+def operazioni(ops, dataset: dict, rng: random.Random, ripetizioni: int):
+	"""(nome, argomenti casuali, chiamata): il nome è la chiave nel JSON dei risultati"""
+	from sqlalchemy import text
+
+	from benchmarks.dataset import PAROLE
+	from database import db_manager
+
+	with db_manager.get_session() as session:
+		future = [r[0] for r in session.execute(
+			text("SELECT ID_Proiezione FROM PROIEZIONE WHERE Data >= :da"), {'da': dataset['riferimento']}
+		)]
+	giorni = (dataset['ultimo_giorno'] - dataset['primo_giorno']).days
+	sale = list(dataset['posti'])
+
+	def cliente():
+		return rng.randint(*dataset['clienti'])
+
+	def giorno():
+		return dataset['primo_giorno'] + timedelta(days=rng.randint(0, giorni))
+
+	# posti liberi veri, letti prima di misurare: create_biglietto non deve fallire
+	vendibili = []
+	rng.shuffle(future)
+	for proiezione_id in future:
+		vendibili += [(proiezione_id, p['ID_Posto']) for p in ops.get_posti_disponibili(proiezione_id)]
+		if len(vendibili) >= RISCALDAMENTO + ripetizioni:
+			break
+	else:
+		raise RuntimeError("Posti liberi esauriti nelle proiezioni future: rigenera il dataset")
+	rng.shuffle(vendibili)
+
+	def vendi(proiezione_id, posto_id):
+		ops.create_biglietto(proiezione_id, cliente(), posto_id)
+
+	def posti_mappa_fredda(proiezione_id):
+		ops.seat_map.invalidate(proiezione_id)
+		ops.get_posti_disponibili(proiezione_id)
+
+	def incassi():
+		fine = giorno()
+		return (fine - timedelta(days=29), fine)
+
+	def ricerca():
+		parola = rng.choice(PAROLE)
+		return (rng.choice((parola, parola[:3], f"{parola} {rng.choice(PAROLE)}")),)
+
+	def sovrapposizione():
+		# metà degli slot tocca una proiezione (11:00-13:00), metà cade prima dell'apertura
+		inizio, fine = rng.choice(((ora(11, 30), ora(13, 0)), (ora(9, 0), ora(10, 30))))
+		return (rng.choice(sale), giorno(), inizio, fine)
+
+	def controlla_sovrapposizione(*argomenti):
+		with db_manager.get_session() as session:
+			ops._check_sala_overlap(session, *argomenti)
+
+	return [
+		('create_biglietto', vendibili.pop, vendi),
+		('get_posti_disponibili', lambda: (rng.choice(future),), posti_mappa_fredda),
+		('get_posti_disponibili (in memoria)', lambda: (rng.choice(future),), ops.get_posti_disponibili),
+		('get_proiezioni_by_data', lambda: (giorno(),), ops.get_proiezioni_by_data),
+		('get_storico_cliente', lambda: (cliente(),), ops.get_storico_cliente),
+		('get_incassi_giornalieri', incassi, ops.get_incassi_giornalieri),
+		('get_film_popolari', lambda: (10,), ops.get_film_popolari),
+		('search_film', ricerca, ops.search_film),
+		('_check_sala_overlap', sovrapposizione, controlla_sovrapposizione),
+	]
+
+def misura(ops, dataset: dict, ripetizioni: int) -> dict:
+	from benchmarks.common import percentili
+
+	rng = random.Random(2024)
+	risultati = {}
+	for nome, argomenti, chiamata in operazioni(ops, dataset, rng, ripetizioni):
+		for _ in range(RISCALDAMENTO):
+			chiamata(*argomenti())
+		casi = [argomenti() for _ in range(ripetizioni)]
+		latenze = []
+		for caso in casi:
+			inizio = time.perf_counter()
+			chiamata(*caso)
+			latenze.append(time.perf_counter() - inizio)
+		risultati[nome] = percentili(latenze)
+	return risultati
+
+def confronta(attuali: dict, baseline: dict, tolleranza: float) -> list:
+	"""[nome, esito, variazione p50] per operazione; esito fra ok, migliorata, REGRESSIONE, nuova"""
+	esiti = []
+	for nome, stats in attuali.items():
+		base = baseline.get(nome)
+		if base is None:
+			esiti.append([nome, 'nuova', None])
+			continue
+		peggiorate = [p for p in ('p50_ms', 'p95_ms')
+					  if stats[p] > base[p] * (1 + tolleranza) and stats[p] - base[p] > MIN_DIFFERENZA_MS]
+		migliorata = stats['p50_ms'] < base['p50_ms'] * (1 - tolleranza)
+		esito = 'REGRESSIONE' if peggiorate else ('migliorata' if migliorata else 'ok')
+		variazione = stats['p50_ms'] / base['p50_ms'] - 1 if base['p50_ms'] else None
+		esiti.append([nome, esito, variazione])
+	return esiti
+
+def _scrivi(percorso: str, dati: dict) -> None:
+	with open(percorso, 'w', encoding='utf-8') as file:
+		json.dump(dati, file, indent=2, ensure_ascii=False, default=str)
+		file.write('\n')
+
+def main():
+	argomenti = _argomenti()
+	# prima di importare benchmarks.common, che fissa il database all'import
+	os.environ.setdefault('BENCH_DB_NAME', f"cinema_multisala_bench_{argomenti.scala}")
+
+	from benchmarks.dataset import prepara_dataset
+	from crud_operations import CinemaOperations
+	from tabulate import tabulate
+
+	ops = CinemaOperations()
+	dataset = prepara_dataset(ops, argomenti.scala, SCALE[argomenti.scala])
+	if argomenti.solo_dataset:
+		print(dataset['conteggi'])
+		return
+
+	risultati = {
+		'scala': argomenti.scala,
+		'database': os.environ['DB_NAME'],
+		'dataset': dataset['conteggi'],
+		'riferimento': dataset['riferimento'].isoformat(),
+		'ripetizioni': argomenti.ripetizioni,
+		'eseguito_il': datetime.now().isoformat(timespec='seconds'),
+		'operazioni': misura(ops, dataset, argomenti.ripetizioni),
+	}
+	_scrivi(argomenti.output, risultati)
+
+	baseline = None
+	if os.path.exists(argomenti.baseline):
+		with open(argomenti.baseline, encoding='utf-8') as file:
+			baseline = json.load(file)['operazioni']
+	esiti = {nome: (esito, variazione) for nome, esito, variazione in
+			 confronta(risultati['operazioni'], baseline or {}, argomenti.tolleranza)}
+
+	righe = []
+	for nome, stats in risultati['operazioni'].items():
+		esito, variazione = esiti[nome]
+		righe.append([nome, stats['n'], f"{stats['p50_ms']:.3f}", f"{stats['p95_ms']:.3f}",
+					  f"{stats['p99_ms']:.3f}", f"{variazione * 100:+.1f}%" if variazione is not None else "-",
+					  esito if baseline is not None else "-"])
+	print(f"Scala '{argomenti.scala}' ({risultati['database']}): {dataset['conteggi']}")
+	print(tabulate(righe, headers=["Operazione", "n", "p50 ms", "p95 ms", "p99 ms", "Δ p50", "Esito"],
+				   tablefmt='grid'))
+	print(f"Risultati in {argomenti.output}")
+
+	if argomenti.salva_baseline:
+		_scrivi(argomenti.baseline, risultati)
+		print(f"Baseline salvata in {argomenti.baseline}")
+	elif baseline is None:
+		print(f"Nessuna baseline in {argomenti.baseline}: rilancia con --salva-baseline per crearla")
+	elif any(esito == 'REGRESSIONE' for esito, _ in esiti.values()):
+		sys.exit(1)
+
+if __name__ == "__main__":
+	main()
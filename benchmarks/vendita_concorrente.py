@@ -0,0 +1,65 @@
+"""Throughput della vendita biglietti con 8 casse concorrenti.
+
+Ogni cassa vende la propria porzione di posti; nella seconda fase tutte le casse
+provano a vendere gli stessi posti, per verificare che ognuno venga venduto una
+sola volta e che i conflitti diventino "Posto già occupato".
+
+Uso: python -m benchmarks.vendita_concorrente
+"""
+from benchmarks.common import cronometra, crea_scenario_vendita, percentili
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tabulate import tabulate
+
+from crud_operations import CinemaOperations
+
+CASSE = 8
+POSTI_PER_CASSA = 250
+
+def vendi(ops, scenario, posti):
+	latenze = []
+	conflitti = 0
+	for posto_id in posti:
+		inizio = time.perf_counter()
+		try:
+			ops.create_biglietto(scenario['proiezione_id'], scenario['cliente_id'], posto_id)
+		except ValueError:
+			conflitti += 1
+		latenze.append(time.perf_counter() - inizio)
+	return latenze, conflitti
+
+def fase(ops, scenario, porzioni):
+	with ThreadPoolExecutor(max_workers=CASSE) as pool:
+		risultati, durata = cronometra(
+			lambda: list(pool.map(lambda posti: vendi(ops, scenario, posti), porzioni))
+		)
+	latenze = [l for parziali, _ in risultati for l in parziali]
+	conflitti = sum(c for _, c in risultati)
+	return latenze, conflitti, durata
+
+def main():
+	ops = CinemaOperations()
+
+	scenario = crea_scenario_vendita(ops, CASSE * 10, POSTI_PER_CASSA // 10)
+	porzioni = [scenario['posti'][i::CASSE] for i in range(CASSE)]
+	latenze, conflitti, durata = fase(ops, scenario, porzioni)
+	stats = percentili(latenze)
+	venduti = len(latenze) - conflitti
+
+	scenario_conteso = crea_scenario_vendita(ops, 10, 10)
+	_, conflitti_contesi, _ = fase(ops, scenario_conteso, [scenario_conteso['posti']] * CASSE)
+	venduti_contesi = len(scenario_conteso['posti']) * CASSE - conflitti_contesi
+
+	print(tabulate([
+		["Biglietti venduti", venduti],
+		["Throughput", f"{venduti / durata:.0f} biglietti/s"],
+		["Latenza p50", f"{stats['p50_ms']:.2f} ms"],
+		["Latenza p99", f"{stats['p99_ms']:.2f} ms"],
+		["Posti contesi venduti", f"{venduti_contesi} / {len(scenario_conteso['posti'])}"],
+		["Conflitti segnalati", conflitti_contesi]
+	], tablefmt='grid'))
+
+if __name__ == "__main__":
+	main()
@@ -1,4 +1,5 @@
 import os
+from datetime import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,6 +17,19 @@ class DatabaseConfig:
 	SQLALCHEMY_ECHO = os.getenv('SQLALCHEMY_ECHO', 'False').lower() == 'true'
 	SQLALCHEMY_POOL_SIZE = int(os.getenv('SQLALCHEMY_POOL_SIZE', '5'))
 	SQLALCHEMY_MAX_OVERFLOW = int(os.getenv('SQLALCHEMY_MAX_OVERFLOW', '10'))
+	# secondi di attesa massima di una connessione libera prima dell'errore
+	SQLALCHEMY_POOL_TIMEOUT = int(os.getenv('SQLALCHEMY_POOL_TIMEOUT', '30'))
+	# connessioni più vecchie di così vengono riaperte: deve stare sotto il wait_timeout di MySQL
+	SQLALCHEMY_POOL_RECYCLE = int(os.getenv('SQLALCHEMY_POOL_RECYCLE', '1800'))
+	# SELECT 1 al checkout: scarta le connessioni chiuse dal server invece di far fallire la query
+	SQLALCHEMY_POOL_PRE_PING = os.getenv('SQLALCHEMY_POOL_PRE_PING', 'True').lower() == 'true'
+	# LIFO: si riusano le connessioni più recenti, quelle in eccesso restano ferme e scadono
+	SQLALCHEMY_POOL_USE_LIFO = os.getenv('SQLALCHEMY_POOL_USE_LIFO', 'True').lower() == 'true'
+
+	# AsyncCinemaOperations: driver aiomysql, pool più ampio perché un solo processo serve molte casse
+	SQLALCHEMY_ASYNC_DATABASE_URL = f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+	SQLALCHEMY_ASYNC_POOL_SIZE = int(os.getenv('SQLALCHEMY_ASYNC_POOL_SIZE', '20'))
+	SQLALCHEMY_ASYNC_MAX_OVERFLOW = int(os.getenv('SQLALCHEMY_ASYNC_MAX_OVERFLOW', '30'))
 
 class AppConfig:
 
@@ -24,6 +38,39 @@ class AppConfig:
 	APP_DESCRIPTION = "Sistema di gestione per cinema multisala - E-tivity 4"
 
 	ITEMS_PER_PAGE = 10
+	SEAT_MAP_TTL = 60  # secondi di validità della mappa posti in memoria
+	TENTATIVI_ALLOCAZIONE = 5  # blocchi provati da vendi_posti_contigui prima di arrendersi
+	SEAT_HOLD_TTL = 300  # secondi per cui un posto resta bloccato durante il pagamento
+	SEAT_HOLD_SWEEP_INTERVAL = 30  # secondi fra due pulizie dei blocchi scaduti
+	PRICING_TTL = 300  # secondi di validità del listino prezzi compilato
+	# (fascia, ora di inizio): prima delle 6 si è ancora nella fascia 'Notte'
+	FASCE_ORARIE = (('Mattina', 6), ('Pomeriggio', 12), ('Sera', 18), ('Notte', 22))
+	SCHEDULE_INDEX_TTL = 60  # secondi di validità del palinsesto sale in memoria
+	PALINSESTO_GIORNI = 7  # giornate caricate insieme nel palinsesto in memoria
+	APERTURA_CINEMA = time(10, 0)
+	CHIUSURA_CINEMA = time(2, 0)  # prima dell'apertura: è il giorno dopo
+	DURATA_MASSIMA_PROIEZIONE = 24 * 60  # minuti; limita la ricerca delle sovrapposizioni
+	PAUSA_PULIZIA = 15  # minuti minimi fra due proiezioni nella stessa sala, nel palinsesto generato
+	ARROTONDAMENTO_INIZIO = 5  # minuti: gli orari generati iniziano su multipli di questo valore
+	FILM_SEARCH_TTL = 3600  # secondi di validità dell'indice di ricerca dei film
+	RICERCA_LIMITE = 20  # risultati restituiti da search_film
+	RICERCA_MIN_PREFISSO = 2  # parole più corte vanno cercate intere, non come prefisso
+	REFERENCE_CACHE_TTL = 300  # secondi di validità di tariffe, sale, operatori e tecnologie in memoria
+	REFERENCE_CACHE_MAX_RIGHE = 50000  # oltre questa dimensione una tabella di riferimento non viene tenuta
+	STREAM_BLOCCO = 1000  # righe lette per volta dal cursore lato server nelle esportazioni
+	INCASSI_SLOT = 8  # righe per (giorno, stato) in INCASSO_GIORNALIERO, per non serializzare le casse
+	HTTP_HOST = '127.0.0.1'  # servizio HTTP per chioschi e sito (http_service.py)
+	HTTP_PORT = 8080
+	# Cache-Control delle risposte in lettura, in secondi
+	HTTP_MAX_AGE_PROGRAMMAZIONE = 30
+	HTTP_MAX_AGE_REPORT = 60
+	# latenze per query e per metodo di CinemaOperations (query_stats.py); spenta salvo QUERY_STATS_ATTIVE=true
+	QUERY_STATS_ATTIVE = os.getenv('QUERY_STATS_ATTIVE', 'False').lower() == 'true'
+	QUERY_STATS_MAX_STATEMENT = 500  # statement distinti tracciati, gli altri finiscono insieme
+	SLOW_QUERY_SOGLIA_MS = 200  # le query più lente di così vanno nel registro delle query lente
+	# JSON lines con statement, parametri, metodo ed EXPLAIN; vuoto per tenere le query lente solo in memoria
+	SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG', 'slow_queries.log') or None
+	SLOW_QUERY_MEMORIA = 50  # ultime query lente mostrate nel menu amministrazione
 	DATE_FORMAT = "%Y-%m-%d"
 	TIME_FORMAT = "%H:%M"
 	DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
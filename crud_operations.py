@@ -1,12 +1,48 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, text
-from typing import List, Optional, Dict, Any
-from datetime import date, time, datetime
+from sqlalchemy import and_, func, text, bindparam
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Dict, Any, Iterator
+from datetime import date, time, datetime, timedelta
+import base64
+import json
 import logging
+import random
+import uuid
 from models import *
 from database import db_manager, reset_database
+from migrations import ricostruisci_incassi, ricostruisci_statistiche_film
+from seat_map import seat_map
+from pricing import pricing
+from schedule_index import schedule_index, intervallo_proiezione, finestra_apertura
+from palinsesto import PianificatoreSettimanale
+from film_search import film_search
+from reference_cache import reference_cache
+from query_stats import misura_metodi, non_misurato
+import query_frequenti
+from config import AppConfig
 logger = logging.getLogger(__name__)
 
+# ValueError di _vendi_biglietti per posti presi nel frattempo da un'altra vendita
+_POSTI_CONTESI = ("Posti già occupati", "Posti temporaneamente bloccati")
+
+def _codifica_cursore(*chiave) -> str:
+	# date e orari viaggiano come stringhe ISO, che MySQL confronta correttamente con DATE/TIME
+	valori = [v if v is None or isinstance(v, (int, str)) else str(v) for v in chiave]
+	return base64.urlsafe_b64encode(json.dumps(valori).encode()).decode()
+
+def _decodifica_cursore(cursore: str) -> list:
+	try:
+		return json.loads(base64.urlsafe_b64decode(cursore.encode()))
+	except (ValueError, TypeError):
+		raise ValueError("Cursore di paginazione non valido")
+
+def _pagina(righe: list, limite: int, chiave) -> Dict:
+	"""Taglia le righe (lette con limite + 1) e calcola il cursore della pagina successiva"""
+	successiva = len(righe) > limite > 0
+	righe = righe[:limite]
+	return {'Righe': righe, 'Cursore': _codifica_cursore(*chiave(righe[-1])) if successiva else None}
+
+@misura_metodi
 class CinemaOperations:
 	def create_promozione(self, nome: str, tipo_promozione_id: int, percentuale_sconto: float, data_inizio, data_fine) -> int:
 		with self.db.get_session() as session:
@@ -19,39 +55,18 @@ class CinemaOperations:
 			)
 			session.add(promozione)
 			session.flush()
-			return promozione.ID_Promozione
+			promozione_id = promozione.ID_Promozione
+		self.pricing.invalidate()
+		return promozione_id
 
 	# ======== VISUALIZZA TUTTI ========
 	def get_all_clienti(self):
 		with self.db.get_session() as session:
-			clienti = session.query(Cliente).all()
-			return [
-				{
-					'ID_Cliente': c.ID_Cliente,
-					'Nome': c.Nome,
-					'Cognome': c.Cognome,
-					'Email': c.Email,
-					'Telefono': c.Telefono,
-					'Data_Nascita': c.Data_Nascita
-				}
-				for c in clienti
-			]
+			return [self._dati_cliente(c) for c in session.query(Cliente).all()]
 
 	def get_all_film(self):
 		with self.db.get_session() as session:
-			films = session.query(Film).all()
-			return [
-				{
-					'ID_Film': f.ID_Film,
-					'Titolo': f.Titolo,
-					'Durata': f.Durata,
-					'Genere': f.Genere,
-					'Classificazione': f.Classificazione,
-					'Anno_Uscita': f.Anno_Uscita,
-					'ID_Regista': f.ID_Regista
-				}
-				for f in films
-			]
+			return [self._dati_film(f) for f in session.query(Film).all()]
 
 	def get_all_proiezioni(self):
 		with self.db.get_session() as session:
@@ -67,48 +82,307 @@ class CinemaOperations:
 			return [dict(row._mapping) for row in result]
 
 	def get_all_sale(self):
+		sale = self._tabella_riferimento(Sala)
+		if sale is not None:
+			return sale
 		with self.db.get_session() as session:
-			sale = session.query(Sala).all()
-			return [
-				{
-					'ID_Sala': s.ID_Sala,
-					'Numero': s.Numero,
-					'Capienza': s.Capienza,
-					'Stato': s.Stato
-				}
-				for s in sale
-			]
+			return [self._dati_sala(s) for s in session.query(Sala).all()]
 
 	def get_all_operatori(self):
+		operatori = self._tabella_riferimento(Operatore)
+		if operatori is not None:
+			return operatori
 		with self.db.get_session() as session:
-			operatori = session.query(Operatore).all()
-			return [
-				{
-					'ID_Operatore': o.ID_Operatore,
-					'Nome': o.Nome,
-					'Cognome': o.Cognome,
-					'Username': o.Username,
-					'Ruolo': o.Ruolo
-				}
-				for o in operatori
-			]
+			return [self._dati_operatore(o) for o in session.query(Operatore).all()]
 
 	def get_all_tariffe(self):
+		tariffe = self._tabella_riferimento(Tariffa)
+		if tariffe is not None:
+			return tariffe
 		with self.db.get_session() as session:
-			tariffe = session.query(Tariffa).all()
-			return [
-				{
-					'ID_Tariffa': t.ID_Tariffa,
-					'Nome_Tariffa': t.Nome_Tariffa,
-					'Prezzo_Base': float(t.Prezzo_Base),
-					'Fascia_Oraria': t.Fascia_Oraria,
-					'Giorno_Settimana': t.Giorno_Settimana
-				}
-				for t in tariffe
-			]
+			return [self._dati_tariffa(t) for t in session.query(Tariffa).all()]
+
+	def get_all_tecnologie(self):
+		tecnologie = self._tabella_riferimento(TipoTecnologia)
+		if tecnologie is not None:
+			return tecnologie
+		with self.db.get_session() as session:
+			return [self._dati_tecnologia(t) for t in session.query(TipoTecnologia).all()]
+
+	def _tabella_riferimento(self, modello) -> Optional[List[Dict]]:
+		"""Righe di una tabella di riferimento da reference_cache, caricata alla prima lettura.
+
+		None se la tabella supera AppConfig.REFERENCE_CACHE_MAX_RIGHE: il chiamante la legge
+		dal database.
+		"""
+		righe = self.reference_cache.righe(modello.__tablename__)
+		if righe is not None or not self.reference_cache.caricabile(modello.__tablename__):
+			return righe
+		return self._carica_riferimento(modello)
+
+	def _carica_riferimento(self, modello) -> Optional[List[Dict]]:
+		# ci si ferma a una riga oltre il massimo: scoprire che una tabella è troppo
+		# grande non costa la lettura di tutta la tabella
+		tabella = modello.__tablename__
+		chiave = modello.__mapper__.primary_key[0]
+		dati = getattr(self, self._DATI_RIFERIMENTO[tabella])
+		with self.db.get_session() as session:
+			lette = [dati(r) for r in session.query(modello).order_by(chiave)
+					 .limit(self.reference_cache.massimo + 1)]
+		if not self.reference_cache.install(tabella, {r[chiave.name]: r for r in lette}):
+			return None
+		# le righe lette sono ora quelle della cache: al chiamante vanno copie
+		return [dict(r) for r in lette]
+
+	# ======== RICERCHE PER ID ========
+	# Una lettura per chiave primaria invece di get_all_* e scansione: le tabelle di
+	# riferimento rispondono da reference_cache se già caricata (la riempiono solo i
+	# get_all_*), altrimenti Session.get o IN sulla chiave.
+	# I get_*_by_ids restituiscono {ID: riga} senza gli ID inesistenti.
+
+	def get_film_by_id(self, film_id: int) -> Optional[Dict]:
+		return self._per_id(Film, self._dati_film, film_id)
+
+	def get_sala_by_id(self, sala_id: int) -> Optional[Dict]:
+		return self._per_id(Sala, self._dati_sala, sala_id)
+
+	def get_operatore_by_id(self, operatore_id: int) -> Optional[Dict]:
+		return self._per_id(Operatore, self._dati_operatore, operatore_id)
+
+	def get_tariffa_by_id(self, tariffa_id: int) -> Optional[Dict]:
+		return self._per_id(Tariffa, self._dati_tariffa, tariffa_id)
+
+	def get_proiezione_by_id(self, proiezione_id: int) -> Optional[Dict]:
+		return self.get_proiezioni_by_ids([proiezione_id]).get(proiezione_id)
+
+	def get_film_by_ids(self, film_ids) -> Dict[int, Dict]:
+		return self._per_ids(Film, self._dati_film, film_ids)
+
+	def get_sale_by_ids(self, sala_ids) -> Dict[int, Dict]:
+		return self._per_ids(Sala, self._dati_sala, sala_ids)
+
+	def get_operatori_by_ids(self, operatore_ids) -> Dict[int, Dict]:
+		return self._per_ids(Operatore, self._dati_operatore, operatore_ids)
+
+	def get_tariffe_by_ids(self, tariffa_ids) -> Dict[int, Dict]:
+		return self._per_ids(Tariffa, self._dati_tariffa, tariffa_ids)
+
+	def get_clienti_by_ids(self, cliente_ids) -> Dict[int, Dict]:
+		return self._per_ids(Cliente, self._dati_cliente, cliente_ids)
+
+	def get_proiezioni_by_ids(self, proiezione_ids) -> Dict[int, Dict]:
+		"""Stesse colonne di get_all_proiezioni, più gli ID collegati"""
+		proiezione_ids = [i for i in dict.fromkeys(proiezione_ids) if i is not None]
+		if not proiezione_ids:
+			return {}
+		query = text("""
+		SELECT p.ID_Proiezione, f.Titolo, s.Numero AS Sala, p.Data, p.Ora_Inizio, p.Ora_Fine, t.Prezzo_Base,
+			   p.ID_Film, p.ID_Sala, p.ID_Operatore, p.ID_Tariffa
+		FROM PROIEZIONE p
+		JOIN FILM f ON p.ID_Film = f.ID_Film
+		JOIN SALA s ON p.ID_Sala = s.ID_Sala
+		JOIN TARIFFA t ON p.ID_Tariffa = t.ID_Tariffa
+		WHERE p.ID_Proiezione IN :ids
+		""").bindparams(bindparam('ids', expanding=True))
+		with self.db.get_session() as session:
+			return {row.ID_Proiezione: dict(row._mapping)
+					for row in session.execute(query, {'ids': proiezione_ids})}
+
+	def _per_id(self, modello, dati, chiave: int) -> Optional[Dict]:
+		if chiave is None:
+			return None
+		tabella = modello.__tablename__
+		if tabella in self._DATI_RIFERIMENTO:
+			valida, riga = self.reference_cache.riga(tabella, chiave)
+			if valida:
+				return riga
+		with self.db.get_session() as session:
+			oggetto = session.get(modello, chiave)
+			return dati(oggetto) if oggetto is not None else None
+
+	def _per_ids(self, modello, dati, chiavi) -> Dict[int, Dict]:
+		chiavi = [c for c in dict.fromkeys(chiavi) if c is not None]
+		if not chiavi:
+			return {}
+		tabella = modello.__tablename__
+		if tabella in self._DATI_RIFERIMENTO:
+			righe = self.reference_cache.cerca(tabella, chiavi)
+			if righe is not None:
+				return righe
+		chiave = modello.__mapper__.primary_key[0]
+		with self.db.get_session() as session:
+			oggetti = session.query(modello).filter(chiave.in_(chiavi)).all()
+			return {getattr(o, chiave.name): dati(o) for o in oggetti}
+
+	# ======== VISUALIZZA A PAGINE ========
+	# Paginazione per chiave (seek): ogni pagina riparte dall'ultima chiave vista su un
+	# indice, quindi costa uguale alla prima pagina come alla millesima. Restituiscono
+	# {'Righe': [...], 'Cursore': stringa opaca per la pagina successiva o None}.
+
+	def get_clienti_pagina(self, cursore: str = None, limite: int = AppConfig.ITEMS_PER_PAGE) -> Dict:
+		with self.db.get_session() as session:
+			query = session.query(Cliente).order_by(Cliente.ID_Cliente)
+			if cursore:
+				(ultimo,) = _decodifica_cursore(cursore)
+				query = query.filter(Cliente.ID_Cliente > ultimo)
+			righe = [self._dati_cliente(c) for c in query.limit(limite + 1)]
+		return _pagina(righe, limite, lambda c: (c['ID_Cliente'],))
+
+	def get_film_pagina(self, cursore: str = None, limite: int = AppConfig.ITEMS_PER_PAGE) -> Dict:
+		with self.db.get_session() as session:
+			query = session.query(Film).order_by(Film.ID_Film)
+			if cursore:
+				(ultimo,) = _decodifica_cursore(cursore)
+				query = query.filter(Film.ID_Film > ultimo)
+			righe = [self._dati_film(f) for f in query.limit(limite + 1)]
+		return _pagina(righe, limite, lambda f: (f['ID_Film'],))
+
+	def get_proiezioni_pagina(self, cursore: str = None, limite: int = AppConfig.ITEMS_PER_PAGE) -> Dict:
+		"""Dalla più recente, su idx_proiezione_data letto all'indietro (ID_Proiezione è nell'indice)"""
+		filtro, params = "", {'limite': limite + 1}
+		if cursore:
+			data, ora, ultimo = _decodifica_cursore(cursore)
+			# la prima condizione, ridondante, rende esplicito il range sull'indice
+			filtro = """
+			WHERE p.Data <= :data
+			  AND (p.Data < :data OR p.Ora_Inizio < :ora OR (p.Ora_Inizio = :ora AND p.ID_Proiezione < :ultimo))
+			"""
+			params.update(data=data, ora=ora, ultimo=ultimo)
+		query = f"""
+		SELECT p.ID_Proiezione, f.Titolo, s.Numero AS Sala, p.Data, p.Ora_Inizio, p.Ora_Fine, t.Prezzo_Base
+		FROM PROIEZIONE p
+		JOIN FILM f ON p.ID_Film = f.ID_Film
+		JOIN SALA s ON p.ID_Sala = s.ID_Sala
+		JOIN TARIFFA t ON p.ID_Tariffa = t.ID_Tariffa
+		{filtro}
+		ORDER BY p.Data DESC, p.Ora_Inizio DESC, p.ID_Proiezione DESC
+		LIMIT :limite
+		"""
+		with self.db.get_session() as session:
+			righe = [dict(row._mapping) for row in session.execute(text(query), params)]
+		return _pagina(righe, limite, lambda p: (p['Data'], p['Ora_Inizio'], p['ID_Proiezione']))
+
+	def get_promozioni_pagina(self, cursore: str = None, limite: int = AppConfig.ITEMS_PER_PAGE) -> Dict:
+		with self.db.get_session() as session:
+			query = session.query(Promozione).order_by(Promozione.ID_Promozione)
+			if cursore:
+				(ultimo,) = _decodifica_cursore(cursore)
+				query = query.filter(Promozione.ID_Promozione > ultimo)
+			righe = [self._dati_promozione(p) for p in query.limit(limite + 1)]
+		return _pagina(righe, limite, lambda p: (p['ID_Promozione'],))
+
+	def get_sale_pagina(self, cursore: str = None, limite: int = AppConfig.ITEMS_PER_PAGE) -> Dict:
+		with self.db.get_session() as session:
+			query = session.query(Sala).order_by(Sala.ID_Sala)
+			if cursore:
+				(ultimo,) = _decodifica_cursore(cursore)
+				query = query.filter(Sala.ID_Sala > ultimo)
+			righe = [self._dati_sala(s) for s in query.limit(limite + 1)]
+		return _pagina(righe, limite, lambda s: (s['ID_Sala'],))
+
+	def get_operatori_pagina(self, cursore: str = None, limite: int = AppConfig.ITEMS_PER_PAGE) -> Dict:
+		with self.db.get_session() as session:
+			query = session.query(Operatore).order_by(Operatore.ID_Operatore)
+			if cursore:
+				(ultimo,) = _decodifica_cursore(cursore)
+				query = query.filter(Operatore.ID_Operatore > ultimo)
+			righe = [self._dati_operatore(o) for o in query.limit(limite + 1)]
+		return _pagina(righe, limite, lambda o: (o['ID_Operatore'],))
+
+	def get_tariffe_pagina(self, cursore: str = None, limite: int = AppConfig.ITEMS_PER_PAGE) -> Dict:
+		with self.db.get_session() as session:
+			query = session.query(Tariffa).order_by(Tariffa.ID_Tariffa)
+			if cursore:
+				(ultimo,) = _decodifica_cursore(cursore)
+				query = query.filter(Tariffa.ID_Tariffa > ultimo)
+			righe = [self._dati_tariffa(t) for t in query.limit(limite + 1)]
+		return _pagina(righe, limite, lambda t: (t['ID_Tariffa'],))
+
+	@staticmethod
+	def _dati_cliente(c) -> Dict:
+		return {
+			'ID_Cliente': c.ID_Cliente,
+			'Nome': c.Nome,
+			'Cognome': c.Cognome,
+			'Email': c.Email,
+			'Telefono': c.Telefono,
+			'Data_Nascita': c.Data_Nascita
+		}
+
+	@staticmethod
+	def _dati_film(f) -> Dict:
+		return {
+			'ID_Film': f.ID_Film,
+			'Titolo': f.Titolo,
+			'Durata': f.Durata,
+			'Genere': f.Genere,
+			'Classificazione': f.Classificazione,
+			'Anno_Uscita': f.Anno_Uscita,
+			'ID_Regista': f.ID_Regista
+		}
+
+	@staticmethod
+	def _dati_sala(s) -> Dict:
+		return {
+			'ID_Sala': s.ID_Sala,
+			'Numero': s.Numero,
+			'Capienza': s.Capienza,
+			'Stato': s.Stato
+		}
+
+	@staticmethod
+	def _dati_operatore(o) -> Dict:
+		return {
+			'ID_Operatore': o.ID_Operatore,
+			'Nome': o.Nome,
+			'Cognome': o.Cognome,
+			'Username': o.Username,
+			'Ruolo': o.Ruolo
+		}
+
+	@staticmethod
+	def _dati_tariffa(t) -> Dict:
+		return {
+			'ID_Tariffa': t.ID_Tariffa,
+			'Nome_Tariffa': t.Nome_Tariffa,
+			'Prezzo_Base': float(t.Prezzo_Base),
+			'Fascia_Oraria': t.Fascia_Oraria,
+			'Giorno_Settimana': t.Giorno_Settimana
+		}
+
+	@staticmethod
+	def _dati_tecnologia(t) -> Dict:
+		return {
+			'ID_Tecnologia': t.ID_Tecnologia,
+			'Nome_Tecnologia': t.Nome_Tecnologia,
+			'Descrizione_Tecnologia': t.Descrizione_Tecnologia
+		}
+
+	@staticmethod
+	def _dati_promozione(p) -> Dict:
+		return {
+			'ID_Promozione': p.ID_Promozione,
+			'Nome': p.Nome,
+			'Percentuale_Sconto': float(p.Percentuale_Sconto),
+			'Data_Inizio': p.Data_Inizio,
+			'Data_Fine': p.Data_Fine
+		}
+
+	# tabella -> metodo che converte una riga ORM nel dizionario restituito dai get_all_*
+	_DATI_RIFERIMENTO = {
+		Sala.__tablename__: '_dati_sala',
+		Operatore.__tablename__: '_dati_operatore',
+		Tariffa.__tablename__: '_dati_tariffa',
+		TipoTecnologia.__tablename__: '_dati_tecnologia'
+	}
 
 	def __init__(self):
 		self.db = db_manager
+		self.seat_map = seat_map
+		self.pricing = pricing
+		self.schedule_index = schedule_index
+		self.film_search = film_search
+		self.reference_cache = reference_cache
 
 	# ========== OPERAZIONI CLIENTE ==========
 
@@ -128,33 +402,25 @@ class CinemaOperations:
 
 	def get_cliente_by_email(self, email: str) -> Optional[Dict]:
 		with self.db.get_session() as session:
-			cliente = session.query(Cliente).filter(Cliente.Email == email).first()
-			if cliente:
-				return {
-					'ID_Cliente': cliente.ID_Cliente,
-					'Nome': cliente.Nome,
-					'Cognome': cliente.Cognome,
-					'Email': cliente.Email,
-					'Telefono': cliente.Telefono,
-					'Data_Nascita': cliente.Data_Nascita,
-					'Data_Registrazione': cliente.Data_Registrazione
-				}
-			return None
+			return self._cliente_by_email(session, email)
 
 	def get_cliente_by_id(self, cliente_id: int) -> Optional[Dict]:
 		with self.db.get_session() as session:
-			cliente = session.query(Cliente).filter(Cliente.ID_Cliente == cliente_id).first()
-			if cliente:
-				return {
-					'ID_Cliente': cliente.ID_Cliente,
-					'Nome': cliente.Nome,
-					'Cognome': cliente.Cognome,
-					'Email': cliente.Email,
-					'Telefono': cliente.Telefono,
-					'Data_Nascita': cliente.Data_Nascita,
-					'Data_Registrazione': cliente.Data_Registrazione
-				}
-			return None
+			return self._cliente_by_id(session, cliente_id)
+
+	# Le letture con la sessione come parametro servono anche ad AsyncCinemaOperations (run_sync)
+
+	def _cliente_by_email(self, session: Session, email: str) -> Optional[Dict]:
+		cliente = session.query(Cliente).filter(Cliente.Email == email).first()
+		return self._dati_cliente_completi(cliente) if cliente else None
+
+	def _cliente_by_id(self, session: Session, cliente_id: int) -> Optional[Dict]:
+		cliente = session.query(Cliente).filter(Cliente.ID_Cliente == cliente_id).first()
+		return self._dati_cliente_completi(cliente) if cliente else None
+
+	@classmethod
+	def _dati_cliente_completi(cls, cliente) -> Dict:
+		return dict(cls._dati_cliente(cliente), Data_Registrazione=cliente.Data_Registrazione)
 
 	def update_cliente(self, cliente_id: int, **kwargs) -> bool:
 		with self.db.get_session() as session:
@@ -179,7 +445,9 @@ class CinemaOperations:
 			)
 			session.add(sala)
 			session.flush()
-			return sala.ID_Sala
+			sala_id = sala.ID_Sala
+		self.reference_cache.invalidate(Sala.__tablename__)
+		return sala_id
 
 	def create_posto(self, sala_id: int, fila: str, numero_posto: int) -> int:
 		with self.db.get_session() as session:
@@ -191,7 +459,87 @@ class CinemaOperations:
 			)
 			session.add(posto)
 			session.flush()
-			return posto.ID_Posto
+			posto_id = posto.ID_Posto
+		self.seat_map.invalidate()
+		return posto_id
+
+	def create_sala_with_layout(self, numero: int, stato: str, file, posti_per_fila: int,
+							   buchi=None) -> Dict:
+		"""Crea la sala e la sua griglia di posti in un'unica transazione.
+
+		`file` è il numero di file (etichettate A..Z, AA..) o la lista delle etichette,
+		`buchi` le coppie (fila, numero) da saltare. La capienza è derivata dai posti creati.
+		"""
+		posti = self._build_layout(file, posti_per_fila, buchi)
+		if not posti:
+			raise ValueError("La sala deve avere almeno un posto")
+
+		with self.db.get_session() as session:
+			sala = Sala(
+				Numero=numero,
+				Capienza=len(posti),
+				Stato=stato
+			)
+			session.add(sala)
+			session.flush()
+			posto_ids = self._insert_posti(session, sala.ID_Sala, posti)
+			sala_id = sala.ID_Sala
+		self.reference_cache.invalidate(Sala.__tablename__)
+		return {'ID_Sala': sala_id, 'ID_Posti': posto_ids}
+
+	def create_posti_layout(self, sala_id: int, file, posti_per_fila: int, buchi=None) -> List[int]:
+		"""Aggiunge una griglia di posti a una sala esistente con un solo INSERT multi-riga.
+
+		La capienza della sala è aggiornata nella stessa transazione al numero dei suoi posti.
+		"""
+		posti = self._build_layout(file, posti_per_fila, buchi)
+		with self.db.get_session() as session:
+			sala = session.get(Sala, sala_id)
+			if sala is None:
+				raise ValueError("Sala non trovata")
+			posto_ids = self._insert_posti(session, sala_id, posti)
+			sala.Capienza = session.query(func.count(Posto.ID_Posto)).filter(Posto.ID_Sala == sala_id).scalar()
+		self.seat_map.invalidate()
+		self.reference_cache.invalidate(Sala.__tablename__)
+		return posto_ids
+
+	@staticmethod
+	def _build_layout(file, posti_per_fila: int, buchi=None) -> List[tuple]:
+		if isinstance(file, int):
+			etichette = []
+			for i in range(file):
+				# A..Z, poi AA, AB, ... (Fila è VARCHAR(2))
+				if i < 26:
+					etichette.append(chr(ord('A') + i))
+				else:
+					etichette.append(chr(ord('A') + i // 26 - 1) + chr(ord('A') + i % 26))
+			file = etichette
+		esclusi = {(str(f), int(n)) for f, n in (buchi or ())}
+		return [
+			(fila, num)
+			for fila in file
+			for num in range(1, posti_per_fila + 1)
+			if (fila, num) not in esclusi
+		]
+
+	def _insert_posti(self, session: Session, sala_id: int, posti: List[tuple]) -> List[int]:
+		if not posti:
+			return []
+		# executemany: PyMySQL raggruppa le righe in INSERT multi-valore
+		session.execute(
+			Posto.__table__.insert(),
+			[
+				{'ID_Sala': sala_id, 'Fila': fila, 'Numero_Posto': num, 'Stato_Posto': 'Disponibile'}
+				for fila, num in posti
+			]
+		)
+		# MySQL non supporta RETURNING: gli ID generati vengono riletti con una sola query
+		result = session.execute(
+			text("SELECT ID_Posto, Fila, Numero_Posto FROM POSTO WHERE ID_Sala = :sala_id"),
+			{'sala_id': sala_id}
+		)
+		ids = {(row.Fila, row.Numero_Posto): row.ID_Posto for row in result}
+		return [ids[posto] for posto in posti]
 
 	def create_tecnologia(self, nome_tecnologia: str, descrizione: str) -> int:
 		with self.db.get_session() as session:
@@ -201,7 +549,9 @@ class CinemaOperations:
 			)
 			session.add(tecnologia)
 			session.flush()
-			return tecnologia.ID_Tecnologia
+			tecnologia_id = tecnologia.ID_Tecnologia
+		self.reference_cache.invalidate(TipoTecnologia.__tablename__)
+		return tecnologia_id
 
 	def add_tecnologia_to_sala(self, sala_id: int, tecnologia_id: int) -> int:
 		with self.db.get_session() as session:
@@ -213,15 +563,22 @@ class CinemaOperations:
 			session.flush()
 			return getattr(supporta, 'ID_Supporta', None)
 
-	def create_tariffa(self, nome_tariffa: str, prezzo_base: float) -> int:
+	def create_tariffa(self, nome_tariffa: str, prezzo_base: float,
+					   fascia_oraria: str = None, giorno_settimana: str = None) -> int:
+		"""Con fascia e/o giorno la tariffa è una variante delle tariffe con lo stesso nome"""
 		with self.db.get_session() as session:
 			tariffa = Tariffa(
 				Nome_Tariffa=nome_tariffa,
-				Prezzo_Base=prezzo_base
+				Prezzo_Base=prezzo_base,
+				Fascia_Oraria=fascia_oraria,
+				Giorno_Settimana=giorno_settimana
 			)
 			session.add(tariffa)
 			session.flush()
-			return tariffa.ID_Tariffa
+			tariffa_id = tariffa.ID_Tariffa
+		self.pricing.invalidate()
+		self.reference_cache.invalidate(Tariffa.__tablename__)
+		return tariffa_id
 
 	def create_operatore(self, nome: str, cognome: str, ruolo: str) -> int:
 		with self.db.get_session() as session:
@@ -234,7 +591,9 @@ class CinemaOperations:
 			)
 			session.add(operatore)
 			session.flush()
-			return operatore.ID_Operatore
+			operatore_id = operatore.ID_Operatore
+		self.reference_cache.invalidate(Operatore.__tablename__)
+		return operatore_id
 
 	def create_tipo_promozione(self, nome_tipo: str, descrizione_tipo: str) -> int:
 		with self.db.get_session() as session:
@@ -259,10 +618,17 @@ class CinemaOperations:
 				Anno_Uscita=anno_uscita,
 				ID_Regista=regista_id
 			)
+			film.statistiche = StatisticheFilm(
+				Biglietti_Venduti=0, Incasso=0, Numero_Recensioni=0, Somma_Valutazioni=0
+			)
 			session.add(film)
 			session.flush()
 			film_id = film.ID_Film
-			return film_id
+			regista = session.get(Regista, regista_id)
+			riga = (film_id, titolo, durata, genere, classificazione, anno_uscita, regista_id,
+					regista.Nome_Regista if regista else None, regista.Cognome_Regista if regista else None)
+		self.film_search.aggiungi(riga)
+		return film_id
 
 	def get_film_by_genere(self, genere: str) -> List[Dict]:
 		with self.db.get_session() as session:
@@ -280,38 +646,46 @@ class CinemaOperations:
 				for f in films
 			]
 
-	def search_film(self, search_term: str) -> List[Dict]:
+	def search_film(self, search_term: str, limit: int = AppConfig.RICERCA_LIMITE) -> List[Dict]:
+		"""Film per parole (o inizi di parola) di titolo, regista e genere, dal più pertinente.
+
+		Maiuscole e accenti sono ignorati. La ricerca avviene sull'indice in memoria,
+		caricato con una sola query al primo utilizzo.
+		"""
+		risultati = self.film_search.cerca(search_term, limit)
+		if risultati is None:
+			self._carica_indice_film()
+			risultati = self.film_search.cerca(search_term, limit) or []
+		return risultati
+
+	def _carica_indice_film(self) -> None:
 		with self.db.get_session() as session:
-			films = session.query(Film).filter(
-				Film.Titolo.like(f'%{search_term}%')
-			).all()
-			return [
-				{
-					'ID_Film': f.ID_Film,
-					'Titolo': f.Titolo,
-					'Durata': f.Durata,
-					'Genere': f.Genere,
-					'Classificazione': f.Classificazione,
-					'Anno_Uscita': f.Anno_Uscita,
-					'ID_Regista': f.ID_Regista
-				}
-				for f in films
-			]
+			righe = session.query(
+				Film.ID_Film, Film.Titolo, Film.Durata, Film.Genere, Film.Classificazione,
+				Film.Anno_Uscita, Film.ID_Regista, Regista.Nome_Regista, Regista.Cognome_Regista
+			).outerjoin(Regista, Film.ID_Regista == Regista.ID_Regista).all()
+		self.film_search.install(righe)
 
 	def delete_film(self, film_id: int) -> bool:
 		with self.db.get_session() as session:
 			film = session.query(Film).filter(Film.ID_Film == film_id).first()
-			if film:
-				session.delete(film)
-				return True
-			return False
+			if not film:
+				return False
+			session.delete(film)
+		self.film_search.rimuovi(film_id)
+		return True
 
 	# ========== OPERAZIONI PROIEZIONI ==========
 
 	def create_proiezione(self, data: date, ora_inizio: time, ora_fine: time,
 						 film_id: int, sala_id: int, operatore_id: int, tariffa_id: int) -> int:
+		# Scarto immediato dal palinsesto in memoria; il controllo sul database resta
+		# dentro la transazione per le proiezioni create da altri processi
+		if not self.is_slot_libero(sala_id, data, ora_inizio, ora_fine):
+			raise ValueError("Sovrapposizione con altre proiezioni nella stessa sala")
 		with self.db.get_session() as session:
 			if self._check_sala_overlap(session, sala_id, data, ora_inizio, ora_fine):
+				self.schedule_index.invalidate()
 				raise ValueError("Sovrapposizione con altre proiezioni nella stessa sala")
 
 			proiezione = Proiezione(
@@ -326,159 +700,715 @@ class CinemaOperations:
 			session.add(proiezione)
 			session.flush()
 			proiezione_id = proiezione.ID_Proiezione
-			return proiezione_id
+		self.schedule_index.aggiungi(proiezione_id, sala_id, film_id,
+									 *intervallo_proiezione(data, ora_inizio, ora_fine))
+		return proiezione_id
+
+	def is_slot_libero(self, sala_id: int, data: date, ora_inizio: time, ora_fine: time,
+					   pausa_minuti: int = 0) -> bool:
+		inizio, fine = intervallo_proiezione(data, ora_inizio, ora_fine)
+		self._assicura_palinsesto(inizio.date(), fine.date())
+		return self.schedule_index.libero(sala_id, inizio, fine, timedelta(minutes=pausa_minuti))
+
+	def get_proiezioni_sala(self, sala_id: int, data: date) -> List[Dict]:
+		"""Proiezioni della sala che cadono nell'orario di apertura della giornata"""
+		apertura, chiusura = finestra_apertura(data)
+		self._assicura_palinsesto(apertura.date(), chiusura.date())
+		return [
+			{'ID_Proiezione': iv.proiezione_id, 'ID_Film': iv.film_id, 'Inizio': iv.inizio, 'Fine': iv.fine}
+			for iv in self.schedule_index.occupazioni(sala_id, apertura, chiusura)
+		]
+
+	def get_buchi_sala(self, sala_id: int, data: date, durata_minuti: int,
+					   pausa_minuti: int = 0) -> List[tuple]:
+		"""Intervalli liberi di almeno `durata_minuti` nell'orario di apertura della giornata"""
+		apertura, chiusura = finestra_apertura(data)
+		self._assicura_palinsesto(apertura.date(), chiusura.date())
+		return self.schedule_index.buchi(sala_id, apertura, chiusura, timedelta(minutes=durata_minuti),
+										 timedelta(minutes=pausa_minuti))
+
+	def primo_slot_libero(self, sala_id: int, dopo: datetime, durata_minuti: int,
+						  pausa_minuti: int = 0) -> Optional[datetime]:
+		"""Primo orario >= `dopo` in cui la sala ospita `durata_minuti` entro la chiusura"""
+		giorno = dopo.date()
+		apertura, chiusura = finestra_apertura(giorno)
+		if dopo < apertura and dopo.time() <= AppConfig.CHIUSURA_CINEMA:
+			# dopo mezzanotte si è ancora nella serata del giorno prima
+			apertura, chiusura = finestra_apertura(giorno - timedelta(days=1))
+		self._assicura_palinsesto(apertura.date(), chiusura.date())
+		return self.schedule_index.primo_libero(sala_id, max(dopo, apertura), timedelta(minutes=durata_minuti),
+												chiusura, timedelta(minutes=pausa_minuti))
+
+	def _assicura_palinsesto(self, data_inizio: date, data_fine: date) -> None:
+		# anche il giorno prima: una proiezione serale può finire dopo mezzanotte
+		mancanti = self.schedule_index.giorni_mancanti(data_inizio - timedelta(days=1), data_fine)
+		if not mancanti:
+			return
+		da = mancanti[0]
+		a = max(mancanti[-1], da + timedelta(days=AppConfig.PALINSESTO_GIORNI - 1))
+		with self.db.get_session() as session:
+			righe = session.query(
+				Proiezione.ID_Proiezione, Proiezione.ID_Sala, Proiezione.ID_Film,
+				Proiezione.Data, Proiezione.Ora_Inizio, Proiezione.Ora_Fine
+			).filter(Proiezione.Data.between(da, a)).all()
+		self.schedule_index.install(da, a, righe)
+
+	def genera_palinsesto(self, data_inizio: date, richieste: Dict[int, int], tariffa_id: int,
+						  giorni: int = 7, turni: Dict[int, List[tuple]] = None,
+						  pausa_minuti: int = AppConfig.PAUSA_PULIZIA, salva: bool = True) -> Dict:
+		"""Genera il palinsesto di `giorni` giornate per tutte le sale attive.
+
+		`richieste` associa a ogni ID_Film il numero di proiezioni da fare nel periodo;
+		`turni` associa a ogni ID_Operatore gli intervalli (inizio, fine) in cui è in servizio
+		(default: tutti i proiezionisti per tutto l'orario di apertura). Con `salva` le
+		proiezioni sono inserite in un'unica transazione. Restituisce le proiezioni
+		proposte e le richieste che non è stato possibile piazzare.
+		"""
+		richieste = {film_id: numero for film_id, numero in richieste.items() if numero > 0}
+		date_periodo = [data_inizio + timedelta(days=i) for i in range(giorni)]
+		da = datetime.combine(data_inizio - timedelta(days=1), time())
+		a = datetime.combine(date_periodo[-1] + timedelta(days=2), time())
+
+		with self.db.get_session() as session:
+			durate = dict(session.query(Film.ID_Film, Film.Durata)
+						  .filter(Film.ID_Film.in_(list(richieste))).all())
+			mancanti = [film_id for film_id in richieste if film_id not in durate]
+			if mancanti:
+				raise ValueError(f"Film non trovati: {mancanti}")
+			sale = dict(session.query(Sala.ID_Sala, Sala.Capienza).filter(Sala.Stato == 'Attiva').all())
+			if turni is None:
+				proiezionisti = [o for (o,) in session.query(Operatore.ID_Operatore)
+								 .filter(Operatore.Ruolo == 'Proiezionista').all()]
+				turni = {o: [finestra_apertura(g) for g in date_periodo] for o in proiezionisti}
+			esistenti = session.query(
+				Proiezione.ID_Proiezione, Proiezione.ID_Sala, Proiezione.ID_Film,
+				Proiezione.Data, Proiezione.Ora_Inizio, Proiezione.Ora_Fine,
+				Proiezione.ID_Operatore, Proiezione.Inizio, Proiezione.Fine
+			).filter(Proiezione.Inizio >= da, Proiezione.Inizio < a).all()
+
+		pianificatore = PianificatoreSettimanale(sale, durate, turni, timedelta(minutes=pausa_minuti))
+		pianificatore.occupa(da.date(), a.date(), [r[:6] for r in esistenti], [r[6:] for r in esistenti])
+		proposte, non_piazzate = pianificatore.pianifica(date_periodo, richieste)
+
+		if salva:
+			self.salva_palinsesto(proposte, tariffa_id)
+
+		return {'Proiezioni': proposte, 'Non_Piazzate': non_piazzate}
+
+	def salva_palinsesto(self, proiezioni: List[Dict], tariffa_id: int) -> int:
+		"""Inserisce in un'unica transazione le proiezioni proposte da genera_palinsesto(salva=False).
+
+		Se nel frattempo una di esse si sovrappone a proiezioni create da altri, non viene
+		salvato nulla e si solleva ValueError. Restituisce il numero di proiezioni inserite.
+		"""
+		if not proiezioni:
+			return 0
+		da = min(p['Inizio'] for p in proiezioni)
+		a = max(p['Inizio'] for p in proiezioni) + timedelta(minutes=1)
+		with self.db.get_session() as session:
+			ultimo_id = session.execute(text("SELECT COALESCE(MAX(ID_Proiezione), 0) FROM PROIEZIONE")).scalar()
+			# Inserimento Core in blocco: l'evento ORM non scatta, Inizio/Fine sono già calcolati
+			try:
+				session.execute(Proiezione.__table__.insert(), [
+					dict(p, ID_Tariffa=tariffa_id) for p in proiezioni
+				])
+			except IntegrityError as e:
+				if 'unique_sala_orario' in str(e.orig):
+					raise ValueError("Il palinsesto è cambiato dopo la proposta, rigenerarlo")
+				raise ValueError("Film, sala, operatore o tariffa non trovati")
+			# proiezioni create da altri processi nel frattempo: si annulla tutto
+			if self._sovrapposizioni_periodo(session, da, a, ultimo_id):
+				raise ValueError("Il palinsesto è cambiato dopo la proposta, rigenerarlo")
+		self.schedule_index.invalidate()
+		return len(proiezioni)
+
+	def clone_schedule(self, data_origine: date, data_destinazione: date, giorni: int = 7,
+					   sale: List[int] = None) -> Dict:
+		"""Copia le proiezioni di `giorni` giornate a partire da `data_origine` su `data_destinazione`.
+
+		Un solo INSERT ... SELECT sposta date e intervalli; le proiezioni che nella sala di
+		destinazione si sovrapporrebbero a quelle esistenti (unique_sala_orario compreso) o
+		che cadono in sale non attive sono saltate e restituite in 'Saltate', con il motivo.
+		"""
+		spostamento = (data_destinazione - data_origine).days
+		if spostamento == 0:
+			raise ValueError("Origine e destinazione coincidono")
+
+		params = {
+			'da': data_origine,
+			'a': data_origine + timedelta(days=giorni - 1),
+			'spostamento': spostamento,
+			'durata_massima': AppConfig.DURATA_MASSIMA_PROIEZIONE
+		}
+		filtro_sale = ""
+		if sale is not None:
+			filtro_sale = " AND p.ID_Sala IN :sale"
+			params['sale'] = list(sale) or [0]
+		# ricerca per intervallo su idx_proiezione_sala_inizio, come _check_sala_overlap
+		occupata = """EXISTS (
+			SELECT 1 FROM PROIEZIONE q
+			WHERE q.ID_Sala = p.ID_Sala
+			  AND q.Inizio > p.Inizio + INTERVAL :spostamento DAY - INTERVAL :durata_massima MINUTE
+			  AND q.Inizio < p.Fine + INTERVAL :spostamento DAY
+			  AND q.Fine > p.Inizio + INTERVAL :spostamento DAY
+		)"""
+		saltate_query = text(f"""
+		SELECT p.ID_Proiezione, p.ID_Sala, p.ID_Film, p.Data, p.Ora_Inizio, p.Ora_Fine,
+			   CASE WHEN s.Stato <> 'Attiva' THEN 'Sala non attiva' ELSE 'Sovrapposizione' END AS Motivo
+		FROM PROIEZIONE p
+		JOIN SALA s ON s.ID_Sala = p.ID_Sala
+		WHERE p.Data BETWEEN :da AND :a{filtro_sale}
+		  AND (s.Stato <> 'Attiva' OR {occupata})
+		ORDER BY p.Data, p.Ora_Inizio
+		""")
+		copia_query = text(f"""
+		INSERT INTO PROIEZIONE (Data, Ora_Inizio, Ora_Fine, Inizio, Fine,
+								ID_Film, ID_Sala, ID_Operatore, ID_Tariffa)
+		SELECT p.Data + INTERVAL :spostamento DAY, p.Ora_Inizio, p.Ora_Fine,
+			   p.Inizio + INTERVAL :spostamento DAY, p.Fine + INTERVAL :spostamento DAY,
+			   p.ID_Film, p.ID_Sala, p.ID_Operatore, p.ID_Tariffa
+		FROM PROIEZIONE p
+		JOIN SALA s ON s.ID_Sala = p.ID_Sala
+		WHERE p.Data BETWEEN :da AND :a{filtro_sale}
+		  AND s.Stato = 'Attiva' AND NOT {occupata}
+		""")
+		if sale is not None:
+			saltate_query = saltate_query.bindparams(bindparam('sale', expanding=True))
+			copia_query = copia_query.bindparams(bindparam('sale', expanding=True))
+
+		with self.db.get_session() as session:
+			saltate = [dict(row._mapping) for row in session.execute(saltate_query, params)]
+			copiate = session.execute(copia_query, params).rowcount
+		self.schedule_index.invalidate()
+		return {'Copiate': copiate, 'Saltate': saltate}
+
+	def _sovrapposizioni_periodo(self, session: Session, da: datetime, a: datetime, ultimo_id: int) -> bool:
+		"""True se una proiezione con ID oltre `ultimo_id` che inizia in [da, a) si sovrappone a un'altra
+
+		Le coppie di proiezioni già presenti prima dell'inserimento non contano.
+		"""
+		query = text("""
+		SELECT 1
+		FROM PROIEZIONE p
+		JOIN PROIEZIONE q ON q.ID_Sala = p.ID_Sala AND q.ID_Proiezione <> p.ID_Proiezione
+			AND q.Inizio > p.Inizio - INTERVAL :durata_massima MINUTE AND q.Inizio < p.Fine AND q.Fine > p.Inizio
+		WHERE p.Inizio >= :da AND p.Inizio < :a AND p.ID_Proiezione > :ultimo_id
+		LIMIT 1
+		""")
+		return session.execute(query, {
+			'durata_massima': AppConfig.DURATA_MASSIMA_PROIEZIONE, 'da': da, 'a': a, 'ultimo_id': ultimo_id
+		}).first() is not None
 
 	def get_proiezioni_by_data(self, data: date) -> List[Dict]:
 		with self.db.get_session() as session:
-			query = """
-			SELECT p.ID_Proiezione, f.Titolo, s.Numero AS Sala,
-				   p.Ora_Inizio, p.Ora_Fine, t.Prezzo_Base,
-				   (s.Capienza - COUNT(b.ID_Biglietto)) AS Posti_Disponibili
-			FROM PROIEZIONE p
-			JOIN FILM f ON p.ID_Film = f.ID_Film
-			JOIN SALA s ON p.ID_Sala = s.ID_Sala
-			JOIN TARIFFA t ON p.ID_Tariffa = t.ID_Tariffa
-			LEFT JOIN BIGLIETTO b ON p.ID_Proiezione = b.ID_Proiezione AND b.Stato = 'Valido'
-			WHERE p.Data = :data
-			GROUP BY p.ID_Proiezione
-			HAVING Posti_Disponibili > 0
-			ORDER BY p.Ora_Inizio
-			"""
-			result = session.execute(text(query), {'data': data})
-			return [dict(row._mapping) for row in result]
+			return self._proiezioni_by_data(session, data)
+
+	def _proiezioni_by_data(self, session: Session, data: date) -> List[Dict]:
+		result = session.execute(text(query_frequenti.PROIEZIONI_PER_DATA), {'data': data})
+		return [dict(row._mapping) for row in result]
 
 	def delete_proiezione(self, proiezione_id: int) -> bool:
 		with self.db.get_session() as session:
 			proiezione = session.query(Proiezione).filter(Proiezione.ID_Proiezione == proiezione_id).first()
-			if proiezione:
-				session.delete(proiezione)
-				return True
-			return False
+			if not proiezione:
+				return False
+			session.delete(proiezione)
+		self.seat_map.invalidate(proiezione_id)
+		self.pricing.dimentica_proiezione(proiezione_id)
+		self.schedule_index.rimuovi(proiezione_id)
+		return True
 
 	def _check_sala_overlap(self, session: Session, sala_id: int, data: date,
 						   ora_inizio: time, ora_fine: time, proiezione_id: int = None) -> bool:
-		query = session.query(Proiezione).filter(
-			and_(
-				Proiezione.ID_Sala == sala_id,
-				Proiezione.Data == data,
-				or_(
-					and_(Proiezione.Ora_Inizio <= ora_inizio, Proiezione.Ora_Fine > ora_inizio),
-					and_(Proiezione.Ora_Inizio < ora_fine, Proiezione.Ora_Fine >= ora_fine),
-					and_(Proiezione.Ora_Inizio >= ora_inizio, Proiezione.Ora_Fine <= ora_fine)
-				)
-			)
+		inizio, fine = intervallo_proiezione(data, ora_inizio, ora_fine)
+		return session.execute(text(query_frequenti.SOVRAPPOSIZIONE_SALA), {
+			'sala_id': sala_id,
+			'inizio_minimo': inizio - timedelta(minutes=AppConfig.DURATA_MASSIMA_PROIEZIONE),
+			'inizio': inizio,
+			'fine': fine,
+			'escludi': proiezione_id or 0
+		}).first() is not None
+
+	# ========== OPERAZIONI BIGLIETTI ==========
+
+	def create_biglietto(self, proiezione_id: int, cliente_id: int, posto_id: int,
+						promozione_id: int = None, token: str = None) -> Dict:
+		"""Vende un posto; se il posto è bloccato serve il `token` restituito da blocca_posto"""
+		with self.db.get_session() as session:
+			biglietto_data = self._vendi_biglietto(session, proiezione_id, cliente_id, posto_id,
+												   promozione_id, token)
+		self.seat_map.segna_occupato(proiezione_id, posto_id)
+		return biglietto_data
+
+	def _vendi_biglietto(self, session: Session, proiezione_id: int, cliente_id: int, posto_id: int,
+						 promozione_id: int = None, token: str = None) -> Dict:
+		# Inserimento ottimistico: il prezzo arriva dal listino in memoria e la
+		# doppia vendita è impedita dal vincolo unique_posto_proiezione, senza SELECT preventive
+		prezzo = self.pricing.quote(proiezione_id, promozione_id)
+		query = """
+		INSERT INTO BIGLIETTO (Stato, Prezzo_Applicato, Data_Emissione,
+							   ID_Proiezione, ID_Cliente, ID_Promozione, ID_Posto)
+		SELECT 'Valido', :prezzo, :data_emissione, :proiezione_id, :cliente_id, :promozione_id, :posto_id
+		FROM DUAL
+		WHERE NOT EXISTS (
+			SELECT 1 FROM BLOCCO_POSTO h
+			WHERE h.ID_Proiezione = :proiezione_id AND h.ID_Posto = :posto_id
+			  AND h.Scadenza > :data_emissione AND (:token IS NULL OR h.Token <> :token)
 		)
+		"""
+		data_emissione = datetime.now().replace(microsecond=0)
+		try:
+			result = session.execute(text(query), {
+				'prezzo': prezzo,
+				'data_emissione': data_emissione,
+				'cliente_id': cliente_id,
+				'promozione_id': promozione_id,
+				'posto_id': posto_id,
+				'proiezione_id': proiezione_id,
+				'token': token
+			})
+		except IntegrityError as e:
+			if 'unique_posto_proiezione' in str(e.orig):
+				# la mappa in memoria era evidentemente vecchia
+				self.seat_map.invalidate(proiezione_id)
+				raise ValueError("Posto già occupato per questa proiezione")
+			raise
 
-		if proiezione_id:
-			query = query.filter(Proiezione.ID_Proiezione != proiezione_id)
+		if result.rowcount == 0:
+			raise ValueError("Posto temporaneamente bloccato da un altro acquisto")
 
-		return query.first() is not None
+		if token:
+			session.execute(
+				text("DELETE FROM BLOCCO_POSTO WHERE ID_Proiezione = :proiezione_id AND ID_Posto = :posto_id"),
+				{'proiezione_id': proiezione_id, 'posto_id': posto_id}
+			)
+		self._aggiorna_incassi(session, data_emissione.date(), 'Valido', 1, prezzo)
+		self._aggiorna_statistiche_film(session, proiezione_id, 1, prezzo)
 
-	# ========== OPERAZIONI BIGLIETTI ==========
+		return {
+			'ID_Biglietto': result.lastrowid,
+			'Prezzo_Applicato': prezzo,
+			'Stato': 'Valido',
+			'Data_Emissione': data_emissione
+		}
+
+	def create_biglietti_batch(self, proiezione_id: int, cliente_id: int, posto_ids: List[int],
+							  promozione_id: int = None, token: str = None) -> List[Dict]:
+		"""Vende più posti della stessa proiezione in un'unica transazione (tutto o niente).
+
+		I posti sono verificati con una sola query e prezzati una volta dal listino, poi i
+		biglietti sono inseriti con un solo executemany. Restituisce un dict per posto.
+		"""
+		posto_ids = list(dict.fromkeys(posto_ids))
+		if not posto_ids:
+			raise ValueError("Nessun posto selezionato")
 
-	def create_biglietto(self, proiezione_id: int, cliente_id: int, posto_id: int,
-						promozione_id: int = None) -> Dict:
 		with self.db.get_session() as session:
-			if self._check_posto_occupied(session, proiezione_id, posto_id):
+			biglietti = self._vendi_biglietti(session, proiezione_id, cliente_id, posto_ids,
+											  promozione_id, token)
+		for posto_id in posto_ids:
+			self.seat_map.segna_occupato(proiezione_id, posto_id)
+		return biglietti
+
+	def _vendi_biglietti(self, session: Session, proiezione_id: int, cliente_id: int,
+						 posto_ids: List[int], promozione_id: int = None, token: str = None) -> List[Dict]:
+		prezzo = self.pricing.quote(proiezione_id, promozione_id)
+		query = text("""
+		SELECT po.ID_Posto, po.Fila, po.Numero_Posto, po.Stato_Posto,
+			   b.ID_Biglietto IS NOT NULL AS Occupato,
+			   h.ID_Posto IS NOT NULL AS Bloccato
+		FROM PROIEZIONE p
+		LEFT JOIN POSTO po ON po.ID_Sala = p.ID_Sala AND po.ID_Posto IN :posto_ids
+		LEFT JOIN BIGLIETTO b ON b.ID_Proiezione = p.ID_Proiezione AND b.ID_Posto = po.ID_Posto
+		LEFT JOIN BLOCCO_POSTO h ON h.ID_Proiezione = p.ID_Proiezione AND h.ID_Posto = po.ID_Posto
+			AND h.Scadenza > :ora AND (:token IS NULL OR h.Token <> :token)
+		WHERE p.ID_Proiezione = :proiezione_id
+		""").bindparams(bindparam('posto_ids', expanding=True))
+		data_emissione = datetime.now().replace(microsecond=0)
+		righe = session.execute(query, {
+			'ora': data_emissione,
+			'token': token,
+			'posto_ids': posto_ids,
+			'proiezione_id': proiezione_id
+		}).fetchall()
+
+		if not righe:
+			raise ValueError("Proiezione non trovata")
+
+		posti = {r.ID_Posto: r for r in righe if r.ID_Posto is not None}
+		mancanti = [pid for pid in posto_ids if pid not in posti]
+		if mancanti:
+			raise ValueError(f"Posti non appartenenti alla sala della proiezione: {mancanti}")
+		non_disponibili = [self._etichetta_posto(posti[pid]) for pid in posto_ids
+						   if posti[pid].Stato_Posto != 'Disponibile']
+		if non_disponibili:
+			raise ValueError(f"Posti non disponibili: {', '.join(non_disponibili)}")
+		# Il vincolo unique_posto_proiezione vale anche per i biglietti annullati
+		occupati = [self._etichetta_posto(posti[pid]) for pid in posto_ids if posti[pid].Occupato]
+		if occupati:
+			raise ValueError(f"Posti già occupati per questa proiezione: {', '.join(occupati)}")
+		bloccati = [self._etichetta_posto(posti[pid]) for pid in posto_ids if posti[pid].Bloccato]
+		if bloccati:
+			raise ValueError(f"Posti temporaneamente bloccati da un altro acquisto: {', '.join(bloccati)}")
+
+		try:
+			session.execute(
+				Biglietto.__table__.insert(),
+				[
+					{
+						'Stato': 'Valido',
+						'Prezzo_Applicato': prezzo,
+						'Data_Emissione': data_emissione,
+						'ID_Proiezione': proiezione_id,
+						'ID_Cliente': cliente_id,
+						'ID_Promozione': promozione_id,
+						'ID_Posto': posto_id
+					}
+					for posto_id in posto_ids
+				]
+			)
+		except IntegrityError as e:
+			if 'unique_posto_proiezione' in str(e.orig):
+				# un'altra cassa ha venduto uno dei posti nel frattempo
+				self.seat_map.invalidate(proiezione_id)
 				raise ValueError("Posto già occupato per questa proiezione")
+			raise
 
-			prezzo = self._calculate_price(session, proiezione_id, promozione_id)
+		result = session.execute(
+			text("SELECT ID_Biglietto, ID_Posto FROM BIGLIETTO "
+				 "WHERE ID_Proiezione = :proiezione_id AND ID_Posto IN :posto_ids")
+			.bindparams(bindparam('posto_ids', expanding=True)),
+			{'proiezione_id': proiezione_id, 'posto_ids': posto_ids}
+		)
+		ids = {row.ID_Posto: row.ID_Biglietto for row in result}
 
-			biglietto = Biglietto(
-				Prezzo_Applicato=prezzo,
-				ID_Proiezione=proiezione_id,
-				ID_Cliente=cliente_id,
-				ID_Posto=posto_id,
-				ID_Promozione=promozione_id
+		if token:
+			session.execute(
+				text("DELETE FROM BLOCCO_POSTO WHERE ID_Proiezione = :proiezione_id AND Token = :token "
+					 "AND ID_Posto IN :posto_ids").bindparams(bindparam('posto_ids', expanding=True)),
+				{'proiezione_id': proiezione_id, 'token': token, 'posto_ids': posto_ids}
 			)
-			session.add(biglietto)
-			session.flush()
-			session.refresh(biglietto)
-
-			# Restituisce un dizionario invece dell'oggetto per evitare problemi di sessione
-			return {
-				'ID_Biglietto': biglietto.ID_Biglietto,
-				'Prezzo_Applicato': float(biglietto.Prezzo_Applicato),
-				'Stato': biglietto.Stato,
-				'Data_Emissione': biglietto.Data_Emissione
+		self._aggiorna_incassi(session, data_emissione.date(), 'Valido',
+							   len(posto_ids), prezzo * len(posto_ids))
+		self._aggiorna_statistiche_film(session, proiezione_id, len(posto_ids), prezzo * len(posto_ids))
+
+		return [
+			{
+				'ID_Biglietto': ids[posto_id],
+				'ID_Posto': posto_id,
+				'Fila': posti[posto_id].Fila,
+				'Numero_Posto': posti[posto_id].Numero_Posto,
+				'Prezzo_Applicato': prezzo,
+				'Stato': 'Valido',
+				'Data_Emissione': data_emissione
 			}
+			for posto_id in posto_ids
+		]
+
+	def trova_posti_contigui(self, proiezione_id: int, quanti: int, punteggio=None) -> List[Dict]:
+		"""Suggerisce il miglior blocco di `quanti` posti attaccati, senza riservarlo"""
+		if quanti < 1:
+			raise ValueError("Il numero di posti deve essere positivo")
+		blocco = self.seat_map.miglior_blocco(proiezione_id, quanti, punteggio)
+		if blocco is None:
+			self._carica_mappa_posti(proiezione_id)
+			blocco = self.seat_map.miglior_blocco(proiezione_id, quanti, punteggio)
+		return blocco or []
+
+	def vendi_posti_contigui(self, proiezione_id: int, cliente_id: int, quanti: int,
+							 promozione_id: int = None, punteggio=None) -> List[Dict]:
+		"""Sceglie il miglior blocco di posti attaccati e lo vende in un'unica transazione.
+
+		I posti del blocco vengono prima rivendicati per questa proiezione in BLOCCO_POSTO
+		(INSERT IGNORE in una transazione breve): i posti che un'altra cassa sta vendendo
+		restano fuori senza attese e si passa al blocco successivo escludendoli. Le righe
+		sono per (proiezione, posto), quindi le vendite di altre proiezioni della stessa
+		sala non si incrociano.
+		"""
+		if quanti < 1:
+			raise ValueError("Il numero di posti deve essere positivo")
+
+		esclusi = set()
+		for tentativo in range(AppConfig.TENTATIVI_ALLOCAZIONE):
+			blocco = self.seat_map.miglior_blocco(proiezione_id, quanti, punteggio, esclusi)
+			if blocco is None:
+				self._carica_mappa_posti(proiezione_id)
+				blocco = self.seat_map.miglior_blocco(proiezione_id, quanti, punteggio, esclusi)
+			if not blocco:
+				break
+			posto_ids = [p['ID_Posto'] for p in blocco]
+
+			token = uuid.uuid4().hex
+			biglietti = None
+			try:
+				presi = self._rivendica_posti(proiezione_id, posto_ids, token)
+				if len(presi) < len(posto_ids):
+					esclusi.update(pid for pid in posto_ids if pid not in presi)
+					continue
+				with self.db.get_session() as session:
+					biglietti = self._vendi_biglietti(session, proiezione_id, cliente_id,
+													  posto_ids, promozione_id, token)
+			except ValueError as e:
+				if not str(e).startswith(_POSTI_CONTESI) or tentativo == AppConfig.TENTATIVI_ALLOCAZIONE - 1:
+					raise
+				# mappa vecchia (posti venduti o bloccati altrove): il blocco resta escluso,
+				# altrimenti la mappa ricaricata lo riproporrebbe
+				esclusi.update(posto_ids)
+				self.seat_map.invalidate(proiezione_id)
+				continue
+			finally:
+				if biglietti is None:
+					self._rilascia_token(proiezione_id, token)
+
+			for posto_id in posto_ids:
+				self.seat_map.segna_occupato(proiezione_id, posto_id)
+			return biglietti
+
+		raise ValueError(f"Nessun blocco di {quanti} posti contigui disponibile")
+
+	@staticmethod
+	def _etichetta_posto(posto) -> str:
+		return f"{posto.Fila}{posto.Numero_Posto}"
 
 	def get_posti_disponibili(self, proiezione_id: int) -> List[Dict]:
+		posti = self.seat_map.posti_liberi(proiezione_id)
+		if posti is None:
+			self._carica_mappa_posti(proiezione_id)
+			posti = self.seat_map.posti_liberi(proiezione_id)
+		return posti or []
+
+	def count_posti_disponibili(self, proiezione_id: int) -> int:
+		liberi = self.seat_map.conta_liberi(proiezione_id)
+		if liberi is None:
+			self._carica_mappa_posti(proiezione_id)
+			liberi = self.seat_map.conta_liberi(proiezione_id)
+		return liberi or 0
+
+	def _carica_mappa_posti(self, proiezione_id: int) -> None:
 		with self.db.get_session() as session:
+			righe = self._righe_mappa_posti(session, proiezione_id)
+		self.seat_map.install(proiezione_id, righe)
+
+	def _righe_mappa_posti(self, session: Session, proiezione_id: int) -> list:
+		return session.execute(text(query_frequenti.MAPPA_POSTI), {
+			'proiezione_id': proiezione_id,
+			'ora': datetime.now()
+		}).fetchall()
+
+	# ========== BLOCCHI POSTO ==========
+
+	def blocca_posto(self, proiezione_id: int, posto_id: int, token: str = None,
+					 ttl: int = None) -> Dict:
+		"""Blocca un posto libero durante il pagamento per `ttl` secondi (default AppConfig.SEAT_HOLD_TTL).
+
+		Lo stesso `token` può bloccare più posti; va poi passato a create_biglietto o a
+		create_biglietti_batch. Un blocco scaduto sullo stesso posto viene sostituito.
+		"""
+		token = token or uuid.uuid4().hex
+		ora = datetime.now().replace(microsecond=0)
+		scadenza = ora + timedelta(seconds=ttl or AppConfig.SEAT_HOLD_TTL)
+		chiave = {'proiezione_id': proiezione_id, 'posto_id': posto_id}
+		with self.db.get_session() as session:
+			session.execute(
+				text("DELETE FROM BLOCCO_POSTO WHERE ID_Proiezione = :proiezione_id "
+					 "AND ID_Posto = :posto_id AND Scadenza <= :ora"),
+				{**chiave, 'ora': ora}
+			)
 			query = """
-			SELECT po.ID_Posto, po.Numero_Posto, po.Fila
-			FROM POSTO po
-			WHERE po.ID_Sala = (SELECT ID_Sala FROM PROIEZIONE WHERE ID_Proiezione = :proiezione_id)
-			  AND po.Stato_Posto = 'Disponibile'
-			  AND po.ID_Posto NOT IN (
-				SELECT b.ID_Posto
-				FROM BIGLIETTO b
-				WHERE b.ID_Proiezione = :proiezione_id AND b.Stato = 'Valido'
-			  )
-			ORDER BY po.Fila, po.Numero_Posto
+			INSERT INTO BLOCCO_POSTO (ID_Proiezione, ID_Posto, Token, Scadenza)
+			SELECT :proiezione_id, :posto_id, :token, :scadenza FROM DUAL
+			WHERE NOT EXISTS (
+				SELECT 1 FROM BIGLIETTO
+				WHERE ID_Proiezione = :proiezione_id AND ID_Posto = :posto_id
+			)
 			"""
-			result = session.execute(text(query), {'proiezione_id': proiezione_id})
-			return [dict(row._mapping) for row in result]
+			try:
+				result = session.execute(text(query), {**chiave, 'token': token, 'scadenza': scadenza})
+			except IntegrityError as e:
+				if 'Duplicate entry' in str(e.orig):
+					raise ValueError("Posto temporaneamente bloccato da un altro acquisto")
+				raise ValueError("Proiezione o posto non trovati")
+			if result.rowcount == 0:
+				raise ValueError("Posto già occupato per questa proiezione")
+
+		self.seat_map.segna_bloccato(proiezione_id, posto_id, scadenza.timestamp())
+		return {'Token': token, 'Scadenza': scadenza}
+
+	def rilascia_posto(self, proiezione_id: int, posto_id: int, token: str) -> bool:
+		with self.db.get_session() as session:
+			result = session.execute(
+				text("DELETE FROM BLOCCO_POSTO WHERE ID_Proiezione = :proiezione_id "
+					 "AND ID_Posto = :posto_id AND Token = :token"),
+				{'proiezione_id': proiezione_id, 'posto_id': posto_id, 'token': token}
+			)
+		if result.rowcount == 0:
+			return False
+		self.seat_map.segna_sbloccato(proiezione_id, posto_id)
+		return True
+
+	def _rivendica_posti(self, proiezione_id: int, posto_ids: List[int], token: str) -> set:
+		"""Blocca per la proiezione i posti non già bloccati da altri; restituisce quelli ottenuti"""
+		ora = datetime.now().replace(microsecond=0)
+		scadenza = ora + timedelta(seconds=AppConfig.SEAT_HOLD_TTL)
+		with self.db.get_session() as session:
+			session.execute(
+				text("DELETE FROM BLOCCO_POSTO WHERE ID_Proiezione = :proiezione_id "
+					 "AND ID_Posto IN :posto_ids AND Scadenza <= :ora")
+				.bindparams(bindparam('posto_ids', expanding=True)),
+				{'proiezione_id': proiezione_id, 'posto_ids': posto_ids, 'ora': ora}
+			)
+			# la chiave (ID_Proiezione, ID_Posto) scarta i posti già bloccati da un'altra cassa
+			session.execute(
+				text("INSERT IGNORE INTO BLOCCO_POSTO (ID_Proiezione, ID_Posto, Token, Scadenza) "
+					 "VALUES (:proiezione_id, :posto_id, :token, :scadenza)"),
+				[{'proiezione_id': proiezione_id, 'posto_id': posto_id, 'token': token, 'scadenza': scadenza}
+				 for posto_id in posto_ids]
+			)
+			return set(session.execute(
+				text("SELECT ID_Posto FROM BLOCCO_POSTO WHERE ID_Proiezione = :proiezione_id AND Token = :token"),
+				{'proiezione_id': proiezione_id, 'token': token}
+			).scalars())
+
+	def _rilascia_token(self, proiezione_id: int, token: str) -> None:
+		with self.db.get_session() as session:
+			session.execute(
+				text("DELETE FROM BLOCCO_POSTO WHERE ID_Proiezione = :proiezione_id AND Token = :token"),
+				{'proiezione_id': proiezione_id, 'token': token}
+			)
+
+	def scadi_blocchi(self) -> int:
+		"""Elimina in un solo statement tutti i blocchi scaduti; restituisce quanti erano.
+
+		La mappa posti non va aggiornata: ignora già da sola i blocchi oltre la scadenza.
+		"""
+		with self.db.get_session() as session:
+			result = session.execute(
+				text("DELETE FROM BLOCCO_POSTO WHERE Scadenza <= :ora"),
+				{'ora': datetime.now()}
+			)
+			return result.rowcount
 
 	def get_storico_cliente(self, cliente_id: int) -> List[Dict]:
 		with self.db.get_session() as session:
-			query = """
-			SELECT b.ID_Biglietto, f.Titolo, p.Data, p.Ora_Inizio, s.Numero AS Sala,
-				   CONCAT(po.Fila, po.Numero_Posto) AS Posto,
-				   b.Prezzo_Applicato, b.Stato,
-				   pr.Nome AS Promozione
-			FROM BIGLIETTO b
-			JOIN PROIEZIONE p ON b.ID_Proiezione = p.ID_Proiezione
-			JOIN FILM f ON p.ID_Film = f.ID_Film
-			JOIN SALA s ON p.ID_Sala = s.ID_Sala
-			JOIN POSTO po ON b.ID_Posto = po.ID_Posto
-			LEFT JOIN PROMOZIONE pr ON b.ID_Promozione = pr.ID_Promozione
-			WHERE b.ID_Cliente = :cliente_id
-			ORDER BY p.Data DESC, p.Ora_Inizio DESC
-			"""
-			result = session.execute(text(query), {'cliente_id': cliente_id})
-			return [dict(row._mapping) for row in result]
+			return self._storico_cliente(session, cliente_id)
+
+	def _storico_cliente(self, session: Session, cliente_id: int) -> List[Dict]:
+		result = session.execute(text(query_frequenti.STORICO_CLIENTE), {'cliente_id': cliente_id})
+		return [dict(row._mapping) for row in result]
+
+	def get_biglietti(self, proiezione_id: int = None, cliente_id: int = None, data: date = None,
+					  stato: str = None, cursore: str = None, limite: int = AppConfig.ITEMS_PER_PAGE) -> Dict:
+		"""Biglietti con cliente, film, sala e posto in una sola query, dal più recente.
+
+		Filtri facoltativi per proiezione (idx_biglietto_proiezione_stato), cliente
+		(idx_biglietto_cliente), data della proiezione (idx_proiezione_data) e stato;
+		paginazione per chiave su ID_Biglietto come i get_*_pagina.
+		"""
+		condizioni, params = [], {'limite': limite + 1}
+		for colonna, nome, valore in (('b.ID_Proiezione', 'proiezione_id', proiezione_id),
+									  ('b.ID_Cliente', 'cliente_id', cliente_id),
+									  ('p.Data', 'data', data),
+									  ('b.Stato', 'stato', stato)):
+			if valore is not None:
+				condizioni.append(f"{colonna} = :{nome}")
+				params[nome] = valore
+		if cursore:
+			(ultimo,) = _decodifica_cursore(cursore)
+			condizioni.append("b.ID_Biglietto < :ultimo")
+			params['ultimo'] = ultimo
+		filtro = f"WHERE {' AND '.join(condizioni)}" if condizioni else ""
+		query = query_frequenti.BIGLIETTI.format(filtro=filtro)
+		with self.db.get_session() as session:
+			righe = [dict(row._mapping) for row in session.execute(text(query), params)]
+		return _pagina(righe, limite, lambda b: (b['ID_Biglietto'],))
 
 	def update_biglietto_stato(self, biglietto_id: int, nuovo_stato: str) -> bool:
 		with self.db.get_session() as session:
-			result = session.query(Biglietto).filter(
+			biglietto = session.query(
+				Biglietto.ID_Proiezione, Biglietto.ID_Posto, Biglietto.Stato,
+				Biglietto.Prezzo_Applicato, Biglietto.Data_Emissione
+			).filter(
+				Biglietto.ID_Biglietto == biglietto_id
+			).with_for_update().first()
+			if not biglietto:
+				return False
+			session.query(Biglietto).filter(
 				Biglietto.ID_Biglietto == biglietto_id
 			).update({'Stato': nuovo_stato})
-			return result > 0
-
-	def _check_posto_occupied(self, session: Session, proiezione_id: int, posto_id: int) -> bool:
-		return session.query(Biglietto).filter(
-			and_(
-				Biglietto.ID_Proiezione == proiezione_id,
-				Biglietto.ID_Posto == posto_id,
-				Biglietto.Stato == 'Valido'
-			)
-		).first() is not None
+			if biglietto.Stato != nuovo_stato:
+				giorno = biglietto.Data_Emissione.date()
+				self._aggiorna_incassi(session, giorno, biglietto.Stato, -1, -biglietto.Prezzo_Applicato)
+				self._aggiorna_incassi(session, giorno, nuovo_stato, 1, biglietto.Prezzo_Applicato)
+			# Le statistiche film contano tutti i biglietti non annullati
+			if (biglietto.Stato == 'Annullato') != (nuovo_stato == 'Annullato'):
+				segno = 1 if biglietto.Stato == 'Annullato' else -1
+				self._aggiorna_statistiche_film(session, biglietto.ID_Proiezione,
+												segno, segno * biglietto.Prezzo_Applicato)
 
-	def _calculate_price(self, session: Session, proiezione_id: int, promozione_id: int = None) -> float:
-		proiezione = session.query(Proiezione).filter(
-			Proiezione.ID_Proiezione == proiezione_id
-		).first()
+		# Il posto resta occupato in ogni stato: unique_posto_proiezione non ammette
+		# un secondo biglietto, nemmeno su uno annullato
+		return True
 
-		if not proiezione:
-			raise ValueError("Proiezione non trovata")
+	# ========== ESPORTAZIONE ==========
+	# Generatori su cursore lato server (SSCursor di PyMySQL): le righe arrivano a blocchi
+	# di AppConfig.STREAM_BLOCCO mentre vengono consumate, la memoria non cresce con la
+	# tabella. Tengono occupata una connessione finché non sono esauriti o chiusi.
 
-		prezzo_base = float(proiezione.tariffa.Prezzo_Base)
+	@non_misurato
+	def iter_clienti(self) -> Iterator[Dict]:
+		return self._iter_query("""
+		SELECT ID_Cliente, Nome, Cognome, Email, Telefono, Data_Nascita
+		FROM CLIENTE
+		ORDER BY ID_Cliente
+		""")
 
-		if promozione_id:
-			promozione = session.query(Promozione).filter(
-				and_(
-					Promozione.ID_Promozione == promozione_id,
-					Promozione.Data_Inizio <= date.today(),
-					Promozione.Data_Fine >= date.today()
-				)
-			).first()
+	@non_misurato
+	def iter_proiezioni(self, data_inizio: date = None, data_fine: date = None) -> Iterator[Dict]:
+		"""Proiezioni in ordine di data; solo data_inizio è un giorno, solo data_fine tutto fino a quel giorno"""
+		filtro, params = "", {}
+		if data_inizio is not None:
+			filtro = "WHERE p.Data BETWEEN :data_inizio AND :data_fine"
+			params = {'data_inizio': data_inizio, 'data_fine': data_fine or data_inizio}
+		elif data_fine is not None:
+			filtro = "WHERE p.Data <= :data_fine"
+			params = {'data_fine': data_fine}
+		return self._iter_query(f"""
+		SELECT p.ID_Proiezione, p.Data, p.Ora_Inizio, p.Ora_Fine, p.ID_Film, f.Titolo,
+			   p.ID_Sala, s.Numero AS Sala, p.ID_Operatore, p.ID_Tariffa, t.Prezzo_Base
+		FROM PROIEZIONE p
+		JOIN FILM f ON p.ID_Film = f.ID_Film
+		JOIN SALA s ON p.ID_Sala = s.ID_Sala
+		JOIN TARIFFA t ON p.ID_Tariffa = t.ID_Tariffa
+		{filtro}
+		ORDER BY p.Data, p.Ora_Inizio, p.ID_Proiezione
+		""", params)
 
-			if promozione:
-				sconto = float(promozione.Percentuale_Sconto) / 100
-				prezzo_base = prezzo_base * (1 - sconto)
+	@non_misurato
+	def iter_biglietti(self, data_inizio: date = None, data_fine: date = None) -> Iterator[Dict]:
+		"""Biglietti in ordine di emissione; con le date legge solo quel tratto di idx_biglietto_emissione
+		(solo data_inizio è un giorno, solo data_fine tutto fino a quel giorno)"""
+		filtro, params = "", {}
+		if data_inizio is not None:
+			filtro = "WHERE Data_Emissione >= :da AND Data_Emissione < :a"
+			params = {'da': data_inizio, 'a': (data_fine or data_inizio) + timedelta(days=1)}
+		elif data_fine is not None:
+			filtro = "WHERE Data_Emissione < :a"
+			params = {'a': data_fine + timedelta(days=1)}
+		return self._iter_query(f"""
+		SELECT ID_Biglietto, ID_Proiezione, ID_Cliente, ID_Posto, ID_Promozione,
+			   Stato, Prezzo_Applicato, Data_Emissione
+		FROM BIGLIETTO
+		{filtro}
+		ORDER BY Data_Emissione, ID_Biglietto
+		""", params)
 
-		return round(prezzo_base, 2)
+	def _iter_query(self, query: str, params: dict = None) -> Iterator[Dict]:
+		with self.db.engine.connect() as conn:
+			result = conn.execution_options(
+				stream_results=True, yield_per=AppConfig.STREAM_BLOCCO
+			).execute(text(query), params or {})
+			for row in result:
+				yield dict(row._mapping)
 
 	# ========== OPERAZIONI RECENSIONI ==========
 
@@ -499,6 +1429,12 @@ class CinemaOperations:
 			)
 			session.add(recensione)
 			session.flush()
+			session.execute(text("""
+			INSERT INTO STATISTICHE_FILM (ID_Film, Biglietti_Venduti, Incasso, Numero_Recensioni, Somma_Valutazioni)
+			VALUES (:film_id, 0, 0, 1, :valutazione)
+			ON DUPLICATE KEY UPDATE Numero_Recensioni = Numero_Recensioni + 1,
+									Somma_Valutazioni = Somma_Valutazioni + VALUES(Somma_Valutazioni)
+			"""), {'film_id': film_id, 'valutazione': valutazione})
 			return recensione.ID_Recensione
 
 	def get_recensioni_film(self, film_id: int) -> Dict:
@@ -525,40 +1461,86 @@ class CinemaOperations:
 
 	def get_incassi_giornalieri(self, data_inizio: date, data_fine: date) -> List[Dict]:
 		with self.db.get_session() as session:
-			query = """
-			SELECT DATE(b.Data_Emissione) AS Data,
-				   COUNT(b.ID_Biglietto) AS Biglietti_Venduti,
-				   SUM(b.Prezzo_Applicato) AS Incasso_Totale,
-				   AVG(b.Prezzo_Applicato) AS Prezzo_Medio
-			FROM BIGLIETTO b
-			WHERE b.Stato IN ('Valido', 'Utilizzato')
-			  AND DATE(b.Data_Emissione) BETWEEN :data_inizio AND :data_fine
-			GROUP BY DATE(b.Data_Emissione)
-			ORDER BY Data DESC
-			"""
-			result = session.execute(text(query), {
-				'data_inizio': data_inizio,
-				'data_fine': data_fine
-			})
-			return [dict(row._mapping) for row in result]
+			return self._incassi_giornalieri(session, data_inizio, data_fine)
+
+	def _incassi_giornalieri(self, session: Session, data_inizio: date, data_fine: date) -> List[Dict]:
+		# Letto da INCASSO_GIORNALIERO: al più stati x slot righe per giorno, per chiave primaria
+		query = """
+		SELECT i.Data,
+			   SUM(i.Biglietti) AS Biglietti_Venduti,
+			   SUM(i.Incasso) AS Incasso_Totale,
+			   SUM(i.Incasso) / SUM(i.Biglietti) AS Prezzo_Medio
+		FROM INCASSO_GIORNALIERO i
+		WHERE i.Stato IN ('Valido', 'Utilizzato')
+		  AND i.Data BETWEEN :data_inizio AND :data_fine
+		GROUP BY i.Data
+		HAVING Biglietti_Venduti > 0
+		ORDER BY i.Data DESC
+		"""
+		result = session.execute(text(query), {
+			'data_inizio': data_inizio,
+			'data_fine': data_fine
+		})
+		return [dict(row._mapping) for row in result]
+
+	def ricostruisci_incassi(self, data_inizio: date = None, data_fine: date = None) -> int:
+		"""Ricalcola INCASSO_GIORNALIERO da BIGLIETTO (tutto lo storico o solo l'intervallo).
+
+		Il popolamento iniziale lo fa la migrazione 3; questo serve dopo modifiche fatte
+		a mano sui biglietti. Restituisce il numero di righe scritte.
+		"""
+		with self.db.get_session() as session:
+			return ricostruisci_incassi(session, data_inizio, data_fine)
+
+	def _aggiorna_incassi(self, session: Session, giorno: date, stato: str, biglietti: int, incasso) -> None:
+		# Lo slot casuale distribuisce gli aggiornamenti di una giornata su più righe,
+		# così le casse non si contendono il lock di una sola riga
+		session.execute(text("""
+		INSERT INTO INCASSO_GIORNALIERO (Data, Stato, Slot, Biglietti, Incasso)
+		VALUES (:data, :stato, :slot, :biglietti, :incasso)
+		ON DUPLICATE KEY UPDATE Biglietti = Biglietti + VALUES(Biglietti), Incasso = Incasso + VALUES(Incasso)
+		"""), {
+			'data': giorno,
+			'stato': stato,
+			'slot': random.randrange(AppConfig.INCASSI_SLOT),
+			'biglietti': biglietti,
+			'incasso': incasso
+		})
 
 	def get_film_popolari(self, limit: int = 10) -> List[Dict]:
 		with self.db.get_session() as session:
-			query = """
-			SELECT f.Titolo,
-				   COUNT(b.ID_Biglietto) AS Biglietti_Venduti,
-				   SUM(b.Prezzo_Applicato) AS Incasso,
-				   AVG(r.Valutazione) AS Valutazione_Media
-			FROM FILM f
-			LEFT JOIN PROIEZIONE p ON f.ID_Film = p.ID_Film
-			LEFT JOIN BIGLIETTO b ON p.ID_Proiezione = b.ID_Proiezione AND b.Stato != 'Annullato'
-			LEFT JOIN RECENSIONE r ON f.ID_Film = r.ID_Film
-			GROUP BY f.ID_Film
-			ORDER BY Biglietti_Venduti DESC
-			LIMIT :limit
-			"""
-			result = session.execute(text(query), {'limit': limit})
-			return [dict(row._mapping) for row in result]
+			return self._film_popolari(session, limit)
+
+	def _film_popolari(self, session: Session, limit: int = 10) -> List[Dict]:
+		# Servito da STATISTICHE_FILM: scansione dell'indice su Biglietti_Venduti fino a LIMIT
+		query = """
+		SELECT f.Titolo,
+			   s.Biglietti_Venduti,
+			   s.Incasso,
+			   s.Somma_Valutazioni / NULLIF(s.Numero_Recensioni, 0) AS Valutazione_Media
+		FROM STATISTICHE_FILM s
+		JOIN FILM f ON f.ID_Film = s.ID_Film
+		ORDER BY s.Biglietti_Venduti DESC
+		LIMIT :limit
+		"""
+		result = session.execute(text(query), {'limit': limit})
+		return [dict(row._mapping) for row in result]
+
+	def ricostruisci_statistiche_film(self) -> int:
+		"""Ricalcola STATISTICHE_FILM aggregando biglietti e recensioni separatamente.
+		Il popolamento iniziale lo fa la migrazione 4."""
+		with self.db.get_session() as session:
+			return ricostruisci_statistiche_film(session)
+
+	def _aggiorna_statistiche_film(self, session: Session, proiezione_id: int, biglietti: int, incasso) -> None:
+		session.execute(text("""
+		INSERT INTO STATISTICHE_FILM (ID_Film, Biglietti_Venduti, Incasso, Numero_Recensioni, Somma_Valutazioni)
+		SELECT p.ID_Film, :biglietti, :incasso, 0, 0
+		FROM PROIEZIONE p
+		WHERE p.ID_Proiezione = :proiezione_id
+		ON DUPLICATE KEY UPDATE Biglietti_Venduti = Biglietti_Venduti + :biglietti,
+								Incasso = Incasso + :incasso
+		"""), {'proiezione_id': proiezione_id, 'biglietti': biglietti, 'incasso': incasso})
 
 	def create_regista(self, nome: str, cognome: str, nazionalita: str, data_nascita: str) -> int:
 		with self.db.get_session() as session:
@@ -576,23 +1558,14 @@ class CinemaOperations:
 	def delete_promozione(self, promozione_id: int) -> bool:
 		with self.db.get_session() as session:
 			promo = session.query(Promozione).filter(Promozione.ID_Promozione == promozione_id).first()
-			if promo:
-				session.delete(promo)
-				return True
-			return False
+			if not promo:
+				return False
+			session.delete(promo)
+		self.pricing.invalidate()
+		return True
 
 	def get_all_promozioni(self):
 		with self.db.get_session() as session:
-			promozioni = session.query(Promozione).all()
-			return [
-				{
-					'ID_Promozione': p.ID_Promozione,
-					'Nome': p.Nome,
-					'Percentuale_Sconto': float(p.Percentuale_Sconto),
-					'Data_Inizio': p.Data_Inizio,
-					'Data_Fine': p.Data_Fine
-				}
-				for p in promozioni
-			]
+			return [self._dati_promozione(p) for p in session.query(Promozione).all()]
 
 ops = CinemaOperations()
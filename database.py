@@ -1,12 +1,16 @@
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
-from contextlib import contextmanager
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from contextlib import asynccontextmanager, contextmanager
 import logging
-from typing import Generator
+from typing import AsyncGenerator, Dict, Generator
 
 from config import DatabaseConfig
 from models import Base
+from migrations import applica_migrazioni
+from pool_stats import QueuePoolMisurato, pool_stats
+from query_stats import query_stats
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,9 +27,16 @@ class DatabaseManager:
 			self.engine = create_engine(
 				DatabaseConfig.SQLALCHEMY_DATABASE_URL,
 				echo=DatabaseConfig.SQLALCHEMY_ECHO,
+				poolclass=QueuePoolMisurato,
 				pool_size=DatabaseConfig.SQLALCHEMY_POOL_SIZE,
-				max_overflow=DatabaseConfig.SQLALCHEMY_MAX_OVERFLOW
+				max_overflow=DatabaseConfig.SQLALCHEMY_MAX_OVERFLOW,
+				pool_timeout=DatabaseConfig.SQLALCHEMY_POOL_TIMEOUT,
+				pool_recycle=DatabaseConfig.SQLALCHEMY_POOL_RECYCLE,
+				pool_pre_ping=DatabaseConfig.SQLALCHEMY_POOL_PRE_PING,
+				pool_use_lifo=DatabaseConfig.SQLALCHEMY_POOL_USE_LIFO
 			)
+			pool_stats.collega(self.engine)
+			query_stats.collega(self.engine)
 
 			self.SessionLocal = sessionmaker(
 				autocommit=False,
@@ -51,14 +62,28 @@ class DatabaseManager:
 			logger.error(f"Errore nella connessione al database: {e}")
 			raise
 
+	def statistiche_pool(self) -> Dict:
+		"""Stato del pool e contatori raccolti dagli eventi dall'avvio (o dall'ultimo azzeramento)"""
+		return pool_stats.statistiche(self.engine.pool)
+
+	def azzera_statistiche_pool(self) -> None:
+		pool_stats.azzera()
+
 	def create_tables(self):
 		try:
 			Base.metadata.create_all(bind=self.engine)
 			logger.info("Tabelle create con successo")
+			self.apply_migrations()
 		except Exception as e:
 			logger.error(f"Errore nella creazione delle tabelle: {e}")
 			raise
 
+	def apply_migrations(self):
+		# create_all non aggiunge colonne o indici a tabelle esistenti
+		versioni = applica_migrazioni(self.engine)
+		if versioni:
+			logger.info(f"Migrazioni applicate: {versioni}")
+
 	def drop_tables(self):
 		try:
 			Base.metadata.drop_all(bind=self.engine)
@@ -93,6 +118,57 @@ class DatabaseManager:
 			logger.error(f"Errore nell'esecuzione della query: {e}")
 			raise
 
+class AsyncDatabaseManager:
+	"""Controparte asincrona di DatabaseManager, usata da AsyncCinemaOperations.
+
+	Non c'è un'istanza globale: il pool di aiomysql appartiene all'event loop che lo usa,
+	quindi ogni AsyncCinemaOperations crea il proprio e lo chiude con dispose().
+	"""
+
+	def __init__(self):
+		self.engine = create_async_engine(
+			DatabaseConfig.SQLALCHEMY_ASYNC_DATABASE_URL,
+			echo=DatabaseConfig.SQLALCHEMY_ECHO,
+			pool_size=DatabaseConfig.SQLALCHEMY_ASYNC_POOL_SIZE,
+			max_overflow=DatabaseConfig.SQLALCHEMY_ASYNC_MAX_OVERFLOW,
+			pool_timeout=DatabaseConfig.SQLALCHEMY_POOL_TIMEOUT,
+			pool_recycle=DatabaseConfig.SQLALCHEMY_POOL_RECYCLE,
+			pool_pre_ping=DatabaseConfig.SQLALCHEMY_POOL_PRE_PING,
+			pool_use_lifo=DatabaseConfig.SQLALCHEMY_POOL_USE_LIFO
+		)
+		query_stats.collega(self.engine.sync_engine)
+		self.SessionLocal = async_sessionmaker(
+			autoflush=False,
+			expire_on_commit=False,
+			bind=self.engine
+		)
+
+	async def test_connection(self):
+		try:
+			async with self.engine.connect() as connection:
+				await connection.execute(text("SELECT 1"))
+				logger.info("Connessione asincrona al database verificata")
+				return True
+		except Exception as e:
+			logger.error(f"Errore nella connessione asincrona al database: {e}")
+			raise
+
+	@asynccontextmanager
+	async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
+		session = self.SessionLocal()
+		try:
+			yield session
+			await session.commit()
+		except Exception as e:
+			await session.rollback()
+			logger.error(f"Errore nella sessione database: {e}")
+			raise
+		finally:
+			await session.close()
+
+	async def dispose(self):
+		await self.engine.dispose()
+
 # Istanza globale del database manager
 db_manager = DatabaseManager()
 
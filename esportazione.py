@@ -0,0 +1,43 @@
+import csv
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable
+
+FORMATI = ('csv', 'jsonl')
+
+def valore_json(valore):
+	"""default di json.dumps per i tipi restituiti dal database (usato anche da http_service)"""
+	if isinstance(valore, Decimal):
+		return float(valore)
+	if isinstance(valore, (date, datetime, time)):
+		return valore.isoformat()
+	if isinstance(valore, timedelta):
+		# PyMySQL restituisce le colonne TIME come timedelta
+		return str(valore)
+	raise TypeError(f"Valore non serializzabile: {valore!r}")
+
+def esporta(righe: Iterable[Dict], percorso: str, formato: str) -> int:
+	"""Scrive le righe su file man mano che arrivano; restituisce quante ne ha scritte.
+
+	Le righe non vengono mai raccolte in una lista: con i generatori iter_* di
+	CinemaOperations la memoria usata resta costante qualunque sia la dimensione.
+	"""
+	if formato not in FORMATI:
+		raise ValueError(f"Formato non supportato: {formato} (ammessi: {', '.join(FORMATI)})")
+	scritte = 0
+	with open(percorso, 'w', newline='', encoding='utf-8') as file:
+		if formato == 'csv':
+			scrittore = None
+			for riga in righe:
+				if scrittore is None:
+					scrittore = csv.DictWriter(file, fieldnames=list(riga))
+					scrittore.writeheader()
+				scrittore.writerow(riga)
+				scritte += 1
+		else:
+			for riga in righe:
+				file.write(json.dumps(riga, default=valore_json, ensure_ascii=False))
+				file.write('\n')
+				scritte += 1
+	return scritte
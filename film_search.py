@@ -0,0 +1,248 @@
+import re
+import threading
+import time as _time
+import unicodedata
+from bisect import bisect_left, insort
+from heapq import heapify, heappop, heappush, nsmallest
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import AppConfig
+
+# peso di una parola a seconda del campo in cui compare; corrispondenza esatta = peso doppio
+PESO_TITOLO = 3
+PESO_REGISTA = 2
+PESO_GENERE = 1
+BONUS_INIZIO = 5  # il titolo inizia con quanto digitato
+
+_SEPARATORI = re.compile(r'\W+')
+
+def normalizza(testo: Optional[str]) -> str:
+	"""Minuscolo, senza accenti e con la punteggiatura ridotta a spazi"""
+	if not testo:
+		return ''
+	if testo.isascii():
+		return ' '.join(_SEPARATORI.sub(' ', testo.lower()).split())
+	scomposto = unicodedata.normalize('NFKD', testo)
+	senza_accenti = ''.join(c for c in scomposto if not unicodedata.combining(c))
+	return ' '.join(_SEPARATORI.sub(' ', senza_accenti.casefold()).split())
+
+def parole(testo: Optional[str]) -> List[str]:
+	return normalizza(testo).split()
+
+class FilmSearchIndex:
+	"""Indice invertito per prefisso su titolo, regista e genere dei film.
+
+	Ogni parola normalizzata ha la lista dei film che la contengono, già ordinata per
+	punteggio e titolo più corto; il vocabolario è ordinato, quindi le parole che
+	iniziano con un prefisso sono un intervallo trovato per bisezione. Con una parola
+	sola (il caso della ricerca mentre si scrive) le liste dell'intervallo sono fuse in
+	modo pigro e ci si ferma ai primi `limite` film, anche se ne corrispondono decine di
+	migliaia. Con più parole i candidati vengono dalla più selettiva e le altre sono
+	verificate sulle parole dei soli candidati; le parole più corte di
+	AppConfig.RICERCA_MIN_PREFISSO valgono come prefisso solo in questa verifica.
+	L'indice è per processo, aggiornato da create_film/delete_film e ricaricato dopo
+	AppConfig.FILM_SEARCH_TTL secondi per i film inseriti da altri processi.
+	"""
+
+	def __init__(self, ttl: float = AppConfig.FILM_SEARCH_TTL):
+		self.ttl = ttl
+		self._lock = threading.Lock()
+		self._caricato_il: Optional[float] = None
+		# parola -> voci (-punteggio statico, ordine, ID_Film, peso, iniziale) in ordine
+		self._liste: Dict[str, List[tuple]] = {}
+		self._vocabolario: List[str] = []
+		# ID_Film -> (peso di ogni parola del film, (lunghezza, titolo normalizzato), dati del film,
+		#            parole del film separate da spazi)
+		self._film: Dict[int, Tuple[Dict[str, int], Tuple[int, str], Dict, str]] = {}
+
+	def caricato(self) -> bool:
+		return self._caricato_il is not None and not (
+			self.ttl and _time.monotonic() - self._caricato_il > self.ttl)
+
+	def install(self, righe) -> None:
+		"""Ricostruisce l'indice dalle righe (ID_Film, Titolo, Durata, Genere, Classificazione,
+		Anno_Uscita, ID_Regista, Nome_Regista, Cognome_Regista)"""
+		liste: Dict[str, List[tuple]] = {}
+		film = {}
+		for riga in righe:
+			film[riga[0]] = voce = _voce(riga)
+			for parola, elemento in _elementi(riga[0], voce):
+				liste.setdefault(parola, []).append(elemento)
+		for lista in liste.values():
+			lista.sort()
+		with self._lock:
+			self._liste = liste
+			self._vocabolario = sorted(liste)
+			self._film = film
+			self._caricato_il = _time.monotonic()
+
+	def aggiungi(self, riga) -> None:
+		"""Aggiunge o sostituisce un film (stesse colonne di install); no-op se l'indice non è caricato"""
+		with self._lock:
+			if self._caricato_il is None:
+				return
+			self._rimuovi(riga[0])
+			self._film[riga[0]] = voce = _voce(riga)
+			for parola, elemento in _elementi(riga[0], voce):
+				lista = self._liste.get(parola)
+				if lista is None:
+					lista = self._liste[parola] = []
+					insort(self._vocabolario, parola)
+				insort(lista, elemento)
+
+	def rimuovi(self, film_id: int) -> None:
+		with self._lock:
+			self._rimuovi(film_id)
+
+	def invalidate(self) -> None:
+		with self._lock:
+			self._caricato_il = None
+			self._liste = {}
+			self._vocabolario = []
+			self._film = {}
+
+	def cerca(self, testo: str, limite: int = AppConfig.RICERCA_LIMITE) -> Optional[List[Dict]]:
+		"""Film più pertinenti per `testo`; None se l'indice non è caricato o è scaduto"""
+		if not self.caricato():
+			return None
+		cercate = list(dict.fromkeys(parole(testo)))
+		if not cercate or limite <= 0:
+			return []
+		frase = ' '.join(cercate)
+		with self._lock:
+			lunghe = [p for p in cercate if len(p) >= AppConfig.RICERCA_MIN_PREFISSO]
+			guida = min(lunghe or cercate, key=self._stima)
+			altre = [p for p in cercate if p != guida]
+			if altre:
+				migliori = self._cerca_frase(guida, altre, frase, limite)
+			else:
+				migliori = self._cerca_parola(guida, limite)
+			return [dict(self._film[fid][2]) for _, _, fid in migliori]
+
+	def _cerca_parola(self, parola: str, limite: int) -> List[tuple]:
+		# con una parola sola il punteggio statico delle liste è quello definitivo:
+		# i primi `limite` film distinti della fusione sono il risultato
+		migliori, visti = [], set()
+		for punti, ordine, fid in self._scorri(parola):
+			if fid not in visti:
+				visti.add(fid)
+				migliori.append((-punti, ordine, fid))
+				if len(migliori) == limite:
+					break
+		return migliori
+
+	def _cerca_frase(self, guida: str, altre: List[str], frase: str, limite: int) -> List[tuple]:
+		# candidati dalla parola più selettiva, poi verifica delle altre sulle parole del film
+		candidati: Dict[int, int] = {}
+		for parola in self._intervallo(guida):
+			moltiplicatore = 2 if parola == guida else 1
+			for _, _, fid, peso, _ in self._liste[parola]:
+				punti = peso * moltiplicatore
+				if candidati.get(fid, 0) < punti:
+					candidati[fid] = punti
+		# le altre parole con liste non troppo più lunghe scartano subito i candidati per insiemi
+		for parola in altre:
+			if len(parola) >= AppConfig.RICERCA_MIN_PREFISSO and self._stima(parola) <= 4 * len(candidati):
+				presenti = {e[2] for p in self._intervallo(parola) for e in self._liste[p]}
+				candidati = {fid: punti for fid, punti in candidati.items() if fid in presenti}
+		risultati = []
+		for fid, punti in candidati.items():
+			pesi, ordine, _, testo = self._film[fid]
+			for parola in altre:
+				# una sola ricerca di sottostringa scarta i film senza parole che iniziano così
+				aggiunta = _punti(pesi, parola) if ' ' + parola in testo else 0
+				if not aggiunta:
+					break
+				punti += aggiunta
+			else:
+				if ordine[1].startswith(frase):
+					punti += BONUS_INIZIO
+				risultati.append((-punti, ordine, fid))
+		return nsmallest(limite, risultati)
+
+	def _intervallo(self, parola: str) -> List[str]:
+		if len(parola) < AppConfig.RICERCA_MIN_PREFISSO:
+			return [parola] if parola in self._liste else []
+		i = bisect_left(self._vocabolario, parola)
+		return self._vocabolario[i:bisect_left(self._vocabolario, parola + '\uffff', i)]
+
+	def _stima(self, parola: str) -> int:
+		"""Numero (con ripetizioni) di film che la parola porterebbe come candidati"""
+		return sum(len(self._liste[p]) for p in self._intervallo(parola))
+
+	def _scorri(self, parola: str) -> Iterator[tuple]:
+		"""Voci delle parole dell'intervallo fuse per punteggio decrescente: (punti, ordine, ID_Film)"""
+		testa = []
+		for indice, candidata in enumerate(self._intervallo(parola)):
+			moltiplicatore = 2 if candidata == parola else 1
+			lista = self._liste[candidata]
+			testa.append(_chiave(lista[0], moltiplicatore) + (indice, 0, lista, moltiplicatore))
+		heapify(testa)
+		while testa:
+			negativo, ordine, fid, indice, posizione, lista, moltiplicatore = heappop(testa)
+			yield -negativo, ordine, fid
+			if posizione + 1 < len(lista):
+				heappush(testa, _chiave(lista[posizione + 1], moltiplicatore)
+						 + (indice, posizione + 1, lista, moltiplicatore))
+
+	def _rimuovi(self, film_id: int) -> None:
+		voce = self._film.pop(film_id, None)
+		if voce is None:
+			return
+		for parola, elemento in _elementi(film_id, voce):
+			lista = self._liste.get(parola)
+			if lista is None:
+				continue
+			i = bisect_left(lista, elemento)
+			if i < len(lista) and lista[i] == elemento:
+				del lista[i]
+			if not lista:
+				del self._liste[parola]
+				i = bisect_left(self._vocabolario, parola)
+				if i < len(self._vocabolario) and self._vocabolario[i] == parola:
+					del self._vocabolario[i]
+
+def _chiave(elemento: tuple, moltiplicatore: int) -> tuple:
+	_, ordine, fid, peso, iniziale = elemento
+	return -(peso * moltiplicatore + BONUS_INIZIO * iniziale), ordine, fid
+
+def _punti(pesi: Dict[str, int], cercata: str) -> int:
+	"""Punti della parola cercata sulle parole di un film (0 se non corrisponde)"""
+	migliore = pesi.get(cercata, 0) * 2
+	for parola, peso in pesi.items():
+		if peso > migliore and parola.startswith(cercata):
+			migliore = peso
+	return migliore
+
+def _voce(riga) -> tuple:
+	film_id, titolo, durata, genere, classificazione, anno_uscita, regista_id, nome_regista, cognome_regista = riga
+	titolo_normalizzato = normalizza(titolo)
+	pesi: Dict[str, int] = {}
+	for testo, peso in ((normalizza(genere), PESO_GENERE),
+						(normalizza(f"{nome_regista or ''} {cognome_regista or ''}"), PESO_REGISTA),
+						(titolo_normalizzato, PESO_TITOLO)):
+		for parola in testo.split():
+			if pesi.get(parola, 0) < peso:
+				pesi[parola] = peso
+	dati = {
+		'ID_Film': film_id,
+		'Titolo': titolo,
+		'Durata': durata,
+		'Genere': genere,
+		'Classificazione': classificazione,
+		'Anno_Uscita': anno_uscita,
+		'ID_Regista': regista_id
+	}
+	return pesi, (len(titolo_normalizzato), titolo_normalizzato), dati, ' ' + ' '.join(pesi)
+
+def _elementi(film_id: int, voce: tuple):
+	"""Voci del film nelle liste delle sue parole; l'ordine naturale delle tuple è quello
+	di punteggio (con o senza corrispondenza esatta) e poi di titolo più corto"""
+	pesi, ordine, _, _ = voce
+	prima = ordine[1].split(' ', 1)[0]
+	for parola, peso in pesi.items():
+		iniziale = int(parola == prima)
+		yield parola, (-(2 * peso + BONUS_INIZIO * iniziale), ordine, film_id, peso, iniziale)
+
+# Istanza globale condivisa da tutte le CinemaOperations del processo
+film_search = FilmSearchIndex()
@@ -0,0 +1,31 @@
+import logging
+import threading
+
+from config import AppConfig
+
+logger = logging.getLogger(__name__)
+
+class SweeperBlocchi(threading.Thread):
+	"""Thread di background che elimina periodicamente i blocchi posto scaduti.
+
+	Ogni ciclo costa un solo DELETE su BLOCCO_POSTO (indice su Scadenza),
+	indipendentemente da quanti blocchi sono scaduti.
+	"""
+
+	def __init__(self, ops, intervallo: float = AppConfig.SEAT_HOLD_SWEEP_INTERVAL):
+		super().__init__(name="sweeper-blocchi", daemon=True)
+		self.ops = ops
+		self.intervallo = intervallo
+		self._fermo = threading.Event()
+
+	def run(self):
+		while not self._fermo.wait(self.intervallo):
+			try:
+				scaduti = self.ops.scadi_blocchi()
+				if scaduti:
+					logger.info(f"Eliminati {scaduti} blocchi posto scaduti")
+			except Exception as e:
+				logger.error(f"Errore nella pulizia dei blocchi posto: {e}")
+
+	def ferma(self):
+		self._fermo.set()
@@ -0,0 +1,243 @@
+"""Servizio HTTP/JSON sulle operazioni di cassa, per chioschi, sito e display in sala.
+
+Endpoint:
+	GET   /proiezioni?data=YYYY-MM-DD          programmazione del giorno (default oggi)
+	GET   /proiezioni/<id>/posti               posti liberi della proiezione
+	POST  /biglietti                           {"proiezione_id", "cliente_id", "posto_id" | "posto_ids",
+	                                            "promozione_id"?, "token"?}
+	PATCH /biglietti/<id>                      {"stato": "Valido" | "Utilizzato" | "Annullato"}
+	GET   /report/incassi?da=...&a=...         incassi giornalieri (default ultimi 30 giorni)
+	GET   /report/film-popolari?limit=10       classifica dei film
+
+Un thread per richiesta (ThreadingHTTPServer) su un'unica CinemaOperations: pool di
+connessioni e strutture in memoria sono condivisi, e all'avvio il pool viene riempito
+per non pagare le connessioni sulle prime richieste. Le risposte in lettura hanno ETag
+(If-None-Match -> 304) e Cache-Control; i posti liberi cambiano a ogni vendita, quindi
+vanno sempre rivalidati. Gli errori di dati diventano 400, le proiezioni inesistenti
+404, i posti già venduti o bloccati 409.
+
+Uso: python http_service.py [--host 127.0.0.1] [--porta 8080]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import re
+from datetime import date, timedelta
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from config import AppConfig, DatabaseConfig
+from crud_operations import CinemaOperations
+from esportazione import valore_json
+
+logger = logging.getLogger(__name__)
+
+STATI_BIGLIETTO = ('Valido', 'Utilizzato', 'Annullato')
+# ValueError della vendita che indicano un conflitto sul posto, non un errore nei dati
+_CONFLITTI = ("Posto già occupato", "Posto temporaneamente bloccato")
+# ValueError che indicano una risorsa inesistente
+_NON_TROVATI = ("Proiezione non trovata",)
+
+_CACHE_PROGRAMMAZIONE = f"public, max-age={AppConfig.HTTP_MAX_AGE_PROGRAMMAZIONE}"
+_CACHE_REPORT = f"private, max-age={AppConfig.HTTP_MAX_AGE_REPORT}"
+_CACHE_POSTI = "no-cache"
+
+class CinemaHTTPHandler(BaseHTTPRequestHandler):
+	# HTTP/1.1: la connessione resta aperta fra una richiesta e l'altra dello stesso client
+	protocol_version = "HTTP/1.1"
+	ops: CinemaOperations = None
+
+	# (metodo, percorso, nome del gestore, Cache-Control)
+	ROTTE = [
+		('GET', re.compile(r'^/proiezioni$'), '_programmazione', _CACHE_PROGRAMMAZIONE),
+		('GET', re.compile(r'^/proiezioni/(\d+)/posti$'), '_posti', _CACHE_POSTI),
+		('POST', re.compile(r'^/biglietti$'), '_vendi', None),
+		('PATCH', re.compile(r'^/biglietti/(\d+)$'), '_aggiorna_stato', None),
+		('GET', re.compile(r'^/report/incassi$'), '_incassi', _CACHE_REPORT),
+		('GET', re.compile(r'^/report/film-popolari$'), '_film_popolari', _CACHE_REPORT),
+	]
+
+	def do_GET(self):
+		self._gestisci('GET')
+
+	def do_POST(self):
+		self._gestisci('POST')
+
+	def do_PATCH(self):
+		self._gestisci('PATCH')
+
+	def log_message(self, formato, *args):
+		logger.debug(formato % args)
+
+	def _gestisci(self, metodo: str):
+		url = urlsplit(self.path)
+		try:
+			lunghezza = int(self.headers.get('Content-Length') or 0)
+			if lunghezza < 0:
+				raise ValueError
+		except ValueError:
+			# senza una lunghezza valida il corpo non si può saltare: la connessione va chiusa
+			self.close_connection = True
+			return self._invia(HTTPStatus.BAD_REQUEST, {'Errore': "Content-Length non valido"})
+		# il corpo va letto comunque, o la richiesta successiva sulla connessione si sfasa
+		grezzo = self.rfile.read(lunghezza)
+		percorso_noto = False
+		for metodo_rotta, schema, gestore, cache in self.ROTTE:
+			trovato = schema.match(url.path)
+			if trovato:
+				percorso_noto = True
+				if metodo_rotta == metodo:
+					break
+		else:
+			if percorso_noto:
+				return self._invia(HTTPStatus.METHOD_NOT_ALLOWED, {'Errore': "Metodo non consentito"})
+			return self._invia(HTTPStatus.NOT_FOUND, {'Errore': "Risorsa non trovata"})
+
+		try:
+			parametri = {k: v[-1] for k, v in parse_qs(url.query).items()}
+			corpo = _json_corpo(grezzo)
+			stato, dati = getattr(self, gestore)(*(int(g) for g in trovato.groups()),
+												 parametri=parametri, corpo=corpo)
+		except ValueError as e:
+			if str(e).startswith(_CONFLITTI):
+				stato = HTTPStatus.CONFLICT
+			elif str(e).startswith(_NON_TROVATI):
+				stato = HTTPStatus.NOT_FOUND
+			else:
+				stato = HTTPStatus.BAD_REQUEST
+			return self._invia(stato, {'Errore': str(e)})
+		except Exception:
+			logger.exception(f"Errore in {metodo} {url.path}")
+			return self._invia(HTTPStatus.INTERNAL_SERVER_ERROR, {'Errore': "Errore interno"})
+		self._invia(stato, dati, cache if stato == HTTPStatus.OK else None)
+
+	def _invia(self, stato: HTTPStatus, dati, cache: str = None):
+		contenuto = json.dumps(dati, default=valore_json, ensure_ascii=False).encode('utf-8')
+		etag = None
+		if cache is not None:
+			etag = f'"{hashlib.sha1(contenuto).hexdigest()[:20]}"'
+			if etag in (self.headers.get('If-None-Match') or ''):
+				stato, contenuto = HTTPStatus.NOT_MODIFIED, b''
+		self.send_response(stato)
+		if etag is not None:
+			self.send_header('ETag', etag)
+			self.send_header('Cache-Control', cache)
+		if stato != HTTPStatus.NOT_MODIFIED:
+			self.send_header('Content-Type', 'application/json; charset=utf-8')
+		self.send_header('Content-Length', str(len(contenuto)))
+		self.end_headers()
+		self.wfile.write(contenuto)
+
+	# ========== GESTORI ==========
+	# Ricevono i gruppi del percorso come interi e restituiscono (stato HTTP, dati)
+
+	def _programmazione(self, parametri: dict, corpo: dict):
+		data = _data(parametri.get('data'), date.today())
+		return HTTPStatus.OK, self.ops.get_proiezioni_by_data(data)
+
+	def _posti(self, proiezione_id: int, parametri: dict, corpo: dict):
+		posti = self.ops.get_posti_disponibili(proiezione_id)
+		# lista vuota: proiezione esaurita o inesistente, solo qui serve la query in più
+		if not posti and self.ops.get_proiezione_by_id(proiezione_id) is None:
+			return HTTPStatus.NOT_FOUND, {'Errore': "Proiezione non trovata"}
+		return HTTPStatus.OK, {'ID_Proiezione': proiezione_id, 'Liberi': len(posti), 'Posti': posti}
+
+	def _vendi(self, parametri: dict, corpo: dict):
+		proiezione_id = _intero(corpo, 'proiezione_id')
+		cliente_id = _intero(corpo, 'cliente_id')
+		promozione_id = _intero(corpo, 'promozione_id', obbligatorio=False)
+		token = corpo.get('token')
+		if 'posto_ids' in corpo:
+			if not isinstance(corpo['posto_ids'], list):
+				raise ValueError("posto_ids deve essere una lista")
+			posto_ids = [_intero({'posto_id': p}, 'posto_id') for p in corpo['posto_ids']]
+			biglietti = self.ops.create_biglietti_batch(proiezione_id, cliente_id, posto_ids,
+														promozione_id, token)
+		else:
+			biglietti = [self.ops.create_biglietto(proiezione_id, cliente_id, _intero(corpo, 'posto_id'),
+												   promozione_id, token)]
+		return HTTPStatus.CREATED, {'Biglietti': biglietti}
+
+	def _aggiorna_stato(self, biglietto_id: int, parametri: dict, corpo: dict):
+		stato = corpo.get('stato')
+		if stato not in STATI_BIGLIETTO:
+			raise ValueError(f"stato deve essere uno fra {', '.join(STATI_BIGLIETTO)}")
+		if not self.ops.update_biglietto_stato(biglietto_id, stato):
+			return HTTPStatus.NOT_FOUND, {'Errore': "Biglietto non trovato"}
+		return HTTPStatus.OK, {'ID_Biglietto': biglietto_id, 'Stato': stato}
+
+	def _incassi(self, parametri: dict, corpo: dict):
+		data_fine = _data(parametri.get('a'), date.today())
+		data_inizio = _data(parametri.get('da'), data_fine - timedelta(days=29))
+		if data_inizio > data_fine:
+			raise ValueError("La data di inizio deve essere precedente alla data di fine")
+		return HTTPStatus.OK, self.ops.get_incassi_giornalieri(data_inizio, data_fine)
+
+	def _film_popolari(self, parametri: dict, corpo: dict):
+		limite = _intero(parametri, 'limit', obbligatorio=False) or 10
+		return HTTPStatus.OK, self.ops.get_film_popolari(max(1, min(limite, 100)))
+
+def _json_corpo(grezzo: bytes) -> dict:
+	if not grezzo:
+		return {}
+	try:
+		corpo = json.loads(grezzo)
+	except ValueError:
+		raise ValueError("Il corpo della richiesta non è JSON valido")
+	if not isinstance(corpo, dict):
+		raise ValueError("Il corpo della richiesta deve essere un oggetto JSON")
+	return corpo
+
+def _data(valore, default: date) -> date:
+	if not valore:
+		return default
+	try:
+		return date.fromisoformat(valore)
+	except ValueError:
+		raise ValueError(f"Data non valida: {valore} (formato YYYY-MM-DD)")
+
+def _intero(dati: dict, nome: str, obbligatorio: bool = True):
+	valore = dati.get(nome)
+	if valore is None:
+		if obbligatorio:
+			raise ValueError(f"Campo obbligatorio mancante: {nome}")
+		return None
+	try:
+		return int(valore)
+	except (TypeError, ValueError):
+		raise ValueError(f"{nome} deve essere un intero")
+
+def crea_server(host: str = AppConfig.HTTP_HOST, porta: int = AppConfig.HTTP_PORT,
+				ops: CinemaOperations = None) -> ThreadingHTTPServer:
+	"""Server pronto per serve_forever(), con il pool di connessioni già aperto"""
+	ops = ops or CinemaOperations()
+	# tante connessioni quante ne tiene il pool: le prime richieste non aspettano il database
+	connessioni = [ops.db.engine.connect() for _ in range(DatabaseConfig.SQLALCHEMY_POOL_SIZE)]
+	for connessione in connessioni:
+		connessione.close()
+	handler = type('CinemaHTTPHandlerOps', (CinemaHTTPHandler,), {'ops': ops})
+	server = ThreadingHTTPServer((host, porta), handler)
+	server.daemon_threads = True
+	return server
+
+def main():
+	parser = argparse.ArgumentParser(description="Servizio HTTP/JSON del cinema")
+	parser.add_argument('--host', default=AppConfig.HTTP_HOST)
+	parser.add_argument('--porta', type=int, default=AppConfig.HTTP_PORT)
+	argomenti = parser.parse_args()
+
+	from database import init_database
+	init_database()
+	server = crea_server(argomenti.host, argomenti.porta)
+	logger.info(f"Servizio HTTP in ascolto su http://{argomenti.host}:{argomenti.porta}")
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
+
+if __name__ == "__main__":
+	main()
@@ -29,9 +29,12 @@ from datetime import date, time, datetime, timedelta
 from tabulate import tabulate
 import logging
 
-from config import AppConfig
+from config import AppConfig, DatabaseConfig
 from database import init_database, reset_database
 from crud_operations import CinemaOperations
+from esportazione import FORMATI, esporta
+from hold_sweeper import SweeperBlocchi
+from query_stats import query_stats
 from models import *
 
 logging.basicConfig(
@@ -143,70 +146,81 @@ class CinemaApp:
 		return self.valida_float(percentuale, "Percentuale sconto", 0, 100)
 
 	def mostra_film_disponibili(self):
-		"""Mostra tutti i film disponibili in una tabella"""
-		film = self.cinema_ops.get_all_film()
-		if film:
-			headers = ["ID", "Titolo", "Genere", "Durata", "Anno", "Classificazione"]
-			rows = []
-			for f in film:
-				rows.append([
-					f['ID_Film'],
-					f['Titolo'],
-					f['Genere'],
-					f"{f['Durata']} min",
-					f['Anno_Uscita'],
-					f['Classificazione']
-				])
-			print(f"\n🎬 FILM DISPONIBILI:")
-			print(f"{tabulate(rows, headers=headers, tablefmt='grid')}")
+		"""Mostra i film disponibili in una tabella, una pagina alla volta"""
+		if self.sfoglia(
+			self.cinema_ops.get_film_pagina,
+			["ID", "Titolo", "Genere", "Durata", "Anno", "Classificazione"],
+			lambda f: [f['ID_Film'], f['Titolo'], f['Genere'], f"{f['Durata']} min", f['Anno_Uscita'], f['Classificazione']],
+			"\n🎬 FILM DISPONIBILI:"
+		):
 			return True
-		else:
-			print("❌ Nessun film disponibile!")
-			return False
+		print("❌ Nessun film disponibile!")
+		return False
 
 	def mostra_proiezioni_disponibili(self):
-		"""Mostra tutte le proiezioni disponibili in una tabella"""
-		proiezioni = self.cinema_ops.get_all_proiezioni()
-		if proiezioni:
-			headers = ["ID", "Film", "Sala", "Data", "Ora Inizio", "Ora Fine", "Prezzo"]
-			rows = []
-			for p in proiezioni:
-				rows.append([
-					p['ID_Proiezione'],
-					p['Titolo'][:25] + "..." if len(p['Titolo']) > 25 else p['Titolo'],
-					p['Sala'],
-					p['Data'],
-					p['Ora_Inizio'],
-					p['Ora_Fine'],
-					f"€{p['Prezzo_Base']}"
-				])
-			print(f"\n🎪 PROIEZIONI DISPONIBILI:")
-			print(f"{tabulate(rows, headers=headers, tablefmt='grid')}")
+		"""Mostra le proiezioni disponibili in una tabella, una pagina alla volta"""
+		if self.sfoglia(
+			self.cinema_ops.get_proiezioni_pagina,
+			["ID", "Film", "Sala", "Data", "Ora Inizio", "Ora Fine", "Prezzo"],
+			self.riga_proiezione,
+			"\n🎪 PROIEZIONI DISPONIBILI:"
+		):
 			return True
-		else:
-			print("❌ Nessuna proiezione disponibile!")
-			return False
+		print("❌ Nessuna proiezione disponibile!")
+		return False
 
 	def mostra_clienti_disponibili(self):
-		"""Mostra tutti i clienti disponibili in una tabella"""
-		clienti = self.cinema_ops.get_all_clienti()
-		if clienti:
-			headers = ["ID", "Nome", "Cognome", "Email", "Telefono"]
-			rows = []
-			for c in clienti:
-				rows.append([
-					c['ID_Cliente'],
-					c['Nome'],
-					c['Cognome'],
-					c['Email'],
-					c['Telefono'] or "-"
-				])
-			print(f"\n👤 CLIENTI DISPONIBILI:")
-			print(f"{tabulate(rows, headers=headers, tablefmt='grid')}")
+		"""Mostra i clienti disponibili in una tabella, una pagina alla volta"""
+		if self.sfoglia(
+			self.cinema_ops.get_clienti_pagina,
+			["ID", "Nome", "Cognome", "Email", "Telefono"],
+			lambda c: [c['ID_Cliente'], c['Nome'], c['Cognome'], c['Email'], c['Telefono'] or "-"],
+			"\n👤 CLIENTI DISPONIBILI:"
+		):
 			return True
-		else:
-			print("❌ Nessun cliente disponibile!")
-			return False
+		print("❌ Nessun cliente disponibile!")
+		return False
+
+	def sfoglia(self, carica_pagina, headers, riga, titolo=None):
+		"""Mostra un elenco paginato (get_*_pagina) con navigazione avanti/indietro.
+
+		Restituisce False se l'elenco è vuoto. I cursori delle pagine già viste restano
+		in una pila, così 'p' torna indietro senza contare le righe.
+		"""
+		cursori = [None]
+		while True:
+			pagina = carica_pagina(cursori[-1])
+			if not pagina['Righe'] and len(cursori) == 1:
+				return False
+			if titolo:
+				print(titolo)
+			print(tabulate([riga(r) for r in pagina['Righe']], headers=headers, tablefmt='grid'))
+			comandi = []
+			if pagina['Cursore']:
+				comandi.append("invio = successiva")
+			if len(cursori) > 1:
+				comandi.append("p = precedente")
+			if not comandi:
+				return True
+			scelta = input(f"Pagina {len(cursori)} ({', '.join(comandi)}, q = fine): ").strip().lower()
+			if scelta == 'p' and len(cursori) > 1:
+				cursori.pop()
+			elif scelta == '' and pagina['Cursore']:
+				cursori.append(pagina['Cursore'])
+			else:
+				return True
+
+	@staticmethod
+	def riga_proiezione(p):
+		return [
+			p['ID_Proiezione'],
+			p['Titolo'][:25] + "..." if len(p['Titolo']) > 25 else p['Titolo'],
+			p['Sala'],
+			p['Data'],
+			p['Ora_Inizio'],
+			p['Ora_Fine'],
+			f"€{p['Prezzo_Base']}"
+		]
 
 	def mostra_sale_disponibili(self):
 		"""Mostra tutte le sale disponibili in una tabella"""
@@ -273,8 +287,7 @@ class CinemaApp:
 	def check_database_empty(self):
 		"""Verifica se il database è vuoto controllando se esistono film"""
 		try:
-			films = self.cinema_ops.get_all_film()
-			return len(films) == 0
+			return not self.cinema_ops.get_film_pagina(limite=1)['Righe']
 		except Exception as e:
 			logger.error(f"Errore nel controllo del database: {e}")
 			return True
@@ -293,20 +306,12 @@ class CinemaApp:
 			film2_id = self.cinema_ops.create_film("Inception", 148, "Fantascienza", "T", 2010, regista2_id)
 			film3_id = self.cinema_ops.create_film("Risate Infinite", 90, "Commedia", "T", 2022, regista2_id)
 
-			# === SALE ===
-			sala1_id = self.cinema_ops.create_sala(1, 100, "Attiva")
-			sala2_id = self.cinema_ops.create_sala(2, 80, "Attiva")
-
-			# === POSTI ===
+			# === SALE E POSTI ===
 			# Sala 1 (100 posti): 10 file da A a J, 10 posti per fila
-			for fila in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J']:
-				for num in range(1, 11):
-					self.cinema_ops.create_posto(sala1_id, fila, num)
+			sala1_id = self.cinema_ops.create_sala_with_layout(1, "Attiva", 10, 10)['ID_Sala']
 
 			# Sala 2 (80 posti): 8 file da A a H, 10 posti per fila
-			for fila in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H']:
-				for num in range(1, 11):
-					self.cinema_ops.create_posto(sala2_id, fila, num)
+			sala2_id = self.cinema_ops.create_sala_with_layout(2, "Attiva", 8, 10)['ID_Sala']
 
 			# === TECNOLOGIE ===
 			tech1_id = self.cinema_ops.create_tecnologia("2D", "Proiezione standard")
@@ -382,7 +387,12 @@ class CinemaApp:
 			else:
 				print("📊 Database già popolato. Avvio dell'applicazione...")
 
-			self.main_menu()
+			sweeper = SweeperBlocchi(self.cinema_ops)
+			sweeper.start()
+			try:
+				self.main_menu()
+			finally:
+				sweeper.ferma()
 		except Exception as e:
 			logger.error(f"Errore nell'avvio dell'applicazione: {e}")
 			print(f"❌ Errore: {e}")
@@ -457,21 +467,11 @@ class CinemaApp:
 				print("❌ Opzione non valida!")
 
 	def visualizza_tutti_clienti(self):
-		clienti = self.cinema_ops.get_all_clienti()
-		if clienti:
-			headers = ["ID", "Nome", "Cognome", "Email", "Telefono", "Data Nascita"]
-			rows = []
-			for c in clienti:
-				rows.append([
-					c['ID_Cliente'],
-					c['Nome'],
-					c['Cognome'],
-					c['Email'],
-					c['Telefono'] or "-",
-					c['Data_Nascita'] or "-"
-				])
-			print(f"\n{tabulate(rows, headers=headers, tablefmt='grid')}")
-		else:
+		if not self.sfoglia(
+			self.cinema_ops.get_clienti_pagina,
+			["ID", "Nome", "Cognome", "Email", "Telefono", "Data Nascita"],
+			lambda c: [c['ID_Cliente'], c['Nome'], c['Cognome'], c['Email'], c['Telefono'] or "-", c['Data_Nascita'] or "-"]
+		):
 			print("❌ Nessun cliente presente.")
 
 	def registra_cliente(self):
@@ -765,21 +765,11 @@ class CinemaApp:
 			print(f"❌ Errore: {e}")
 
 	def visualizza_tutti_film(self):
-		film = self.cinema_ops.get_all_film()
-		if film:
-			headers = ["ID", "Titolo", "Genere", "Durata", "Anno", "Classificazione"]
-			rows = []
-			for f in film:
-				rows.append([
-					f['ID_Film'],
-					f['Titolo'],
-					f['Genere'],
-					f['Durata'],
-					f['Anno_Uscita'],
-					f['Classificazione']
-				])
-			print(f"\n{tabulate(rows, headers=headers, tablefmt='grid')}")
-		else:
+		if not self.sfoglia(
+			self.cinema_ops.get_film_pagina,
+			["ID", "Titolo", "Genere", "Durata", "Anno", "Classificazione"],
+			lambda f: [f['ID_Film'], f['Titolo'], f['Genere'], f['Durata'], f['Anno_Uscita'], f['Classificazione']]
+		):
 			print("❌ Nessun film presente.")
 
 	def elimina_film(self):
@@ -795,7 +785,7 @@ class CinemaApp:
 				return
 			film_id = self.valida_intero(val, "ID Film", 1)
 			if film_id is not None:
-				film = next((f for f in self.cinema_ops.get_all_film() if f['ID_Film'] == film_id), None)
+				film = self.cinema_ops.get_film_by_id(film_id)
 				if film:
 					conferma = input(f"Sei sicuro di voler eliminare '{film['Titolo']}'? (si/no): ").strip().lower()
 					if conferma == 'si':
@@ -869,9 +859,11 @@ class CinemaApp:
 			print("2. Aggiungi proiezione")
 			print("3. Visualizza tutte le proiezioni")
 			print("4. Elimina proiezione")
-			print("5. Torna al menu principale")
+			print("5. Genera palinsesto settimanale")
+			print("6. Copia settimana")
+			print("7. Torna al menu principale")
 
-			choice = input("\nScegli un'opzione (1-5): ").strip()
+			choice = input("\nScegli un'opzione (1-7): ").strip()
 
 			if choice == '1':
 				self.proiezioni_per_data()
@@ -882,27 +874,20 @@ class CinemaApp:
 			elif choice == '4':
 				self.elimina_proiezione()
 			elif choice == '5':
+				self.genera_palinsesto()
+			elif choice == '6':
+				self.copia_settimana()
+			elif choice == '7':
 				break
 			else:
 				print("❌ Opzione non valida!")
 
 	def visualizza_tutte_proiezioni(self):
-		proiezioni = self.cinema_ops.get_all_proiezioni()
-		if proiezioni:
-			headers = ["ID", "Film", "Sala", "Data", "Ora Inizio", "Ora Fine", "Prezzo"]
-			rows = []
-			for p in proiezioni:
-				rows.append([
-					p['ID_Proiezione'],
-					p['Titolo'][:25] + "..." if len(p['Titolo']) > 25 else p['Titolo'],
-					p['Sala'],
-					p['Data'],
-					p['Ora_Inizio'],
-					p['Ora_Fine'],
-					f"€{p['Prezzo_Base']}"
-				])
-			print(f"\n{tabulate(rows, headers=headers, tablefmt='grid')}")
-		else:
+		if not self.sfoglia(
+			self.cinema_ops.get_proiezioni_pagina,
+			["ID", "Film", "Sala", "Data", "Ora Inizio", "Ora Fine", "Prezzo"],
+			self.riga_proiezione
+		):
 			print("❌ Nessuna proiezione presente.")
 
 	def proiezioni_per_data(self):
@@ -948,8 +933,7 @@ class CinemaApp:
 				return
 			while True:
 				film_id = self.valida_intero(input("\nID Film: ").strip(), "ID Film", 1)
-				film = self.cinema_ops.get_all_film()
-				film_selezionato = next((f for f in film if f['ID_Film'] == film_id), None)
+				film_selezionato = self.cinema_ops.get_film_by_id(film_id)
 				if film_selezionato:
 					print(f"✅ Film selezionato: {film_selezionato['Titolo']}")
 					break
@@ -960,75 +944,62 @@ class CinemaApp:
 				return
 			while True:
 				sala_id = self.valida_intero(input("\nID Sala: ").strip(), "ID Sala", 1)
-				sale = self.cinema_ops.get_all_sale()
-				sala_selezionata = next((s for s in sale if s['ID_Sala'] == sala_id), None)
+				sala_selezionata = self.cinema_ops.get_sala_by_id(sala_id)
 				if sala_selezionata:
 					print(f"✅ Sala selezionata: {sala_selezionata['Numero']} (Capienza: {sala_selezionata['Capienza']})")
 					break
 				print("❌ Sala non trovata! Verifica l'ID della sala.")
 
-			from crud_operations import db_manager
+			durata_minuti = film_selezionato['Durata']
 			while True:
 				while True:
 					data = self.valida_data(input("\nData proiezione (YYYY-MM-DD): ").strip(), "Data proiezione")
 					if data is not None:
-						# Mostra proiezioni già presenti in quella sala e data (come dizionari)
-						with db_manager.get_session() as session:
-							from sqlalchemy import select, join
-							from models import Proiezione, Film
-							j = join(Proiezione, Film, Proiezione.ID_Film == Film.ID_Film)
-							stmt = select(
-								Proiezione.Ora_Inizio,
-								Proiezione.Ora_Fine,
-								Film.Titolo
-							).select_from(j).where(
-								Proiezione.ID_Sala == sala_id,
-								Proiezione.Data == data
-							).order_by(Proiezione.Ora_Inizio)
-							result = session.execute(stmt)
-							proiezioni = [dict(row._mapping) for row in result]
-						if proiezioni:
-							print(f"\nProiezioni già presenti in sala {sala_selezionata['Numero']} il {data}:")
-							headers = ["Ora Inizio", "Ora Fine", "Titolo"]
-							rows = []
-							for p in proiezioni:
-								rows.append([
-									p['Ora_Inizio'].strftime('%H:%M'),
-									p['Ora_Fine'].strftime('%H:%M'),
-									p['Titolo']
-								])
-							from tabulate import tabulate
-							print(tabulate(rows, headers=headers, tablefmt='grid'))
-						else:
-							print(f"\nNessuna proiezione presente in sala {sala_selezionata['Numero']} il {data}.")
 						break
+				# Proiezioni e spazi liberi della sala, dal palinsesto in memoria
+				proiezioni = self.cinema_ops.get_proiezioni_sala(sala_id, data)
+				if proiezioni:
+					film_sala = self.cinema_ops.get_film_by_ids(p['ID_Film'] for p in proiezioni)
+					print(f"\nProiezioni già presenti in sala {sala_selezionata['Numero']} il {data}:")
+					headers = ["Ora Inizio", "Ora Fine", "Titolo"]
+					rows = []
+					for p in proiezioni:
+						rows.append([
+							p['Inizio'].strftime('%H:%M'),
+							p['Fine'].strftime('%H:%M'),
+							film_sala[p['ID_Film']]['Titolo'] if p['ID_Film'] in film_sala else p['ID_Film']
+						])
+					print(tabulate(rows, headers=headers, tablefmt='grid'))
+				else:
+					print(f"\nNessuna proiezione presente in sala {sala_selezionata['Numero']} il {data}.")
+				buchi = self.cinema_ops.get_buchi_sala(sala_id, data, durata_minuti)
+				if not buchi:
+					print(f"❌ Nessuno spazio libero di {durata_minuti} minuti in questa sala il {data}.")
+					continue
+				print("🕒 Spazi liberi: " + ", ".join(f"{da.strftime('%H:%M')}-{a.strftime('%H:%M')}" for da, a in buchi))
+
 				while True:
 					ora_inizio = self.valida_ora(input("Ora inizio (HH:MM): ").strip(), "Ora inizio")
 					if ora_inizio is not None:
 						break
-				durata_minuti = film_selezionato['Durata']
 				ora_inizio_dt = datetime.combine(data, ora_inizio)
 				ora_fine_dt = ora_inizio_dt + timedelta(minutes=durata_minuti)
 				ora_fine = ora_fine_dt.time()
 				print(f"⏰ Ora fine calcolata: {ora_fine.strftime('%H:%M')} (durata film: {durata_minuti} minuti)")
 
-				# Controllo sovrapposizione
-				with db_manager.get_session() as session:
-					from crud_operations import CinemaOperations
-					if CinemaOperations()._check_sala_overlap(session, sala_id, data, ora_inizio, ora_fine):
-						print("❌ Esiste già una proiezione sovrapposta in questa sala in quell'orario. Riprova con data/ora/sala diversi.")
-						continue
-					else:
-						break
-				break
+				# Controllo sovrapposizione senza andare sul database
+				if self.cinema_ops.is_slot_libero(sala_id, data, ora_inizio, ora_fine):
+					break
+				primo = self.cinema_ops.primo_slot_libero(sala_id, ora_inizio_dt, durata_minuti)
+				suggerimento = f" Primo orario libero: {primo.strftime('%H:%M')}." if primo else ""
+				print(f"❌ Esiste già una proiezione sovrapposta in questa sala in quell'orario.{suggerimento}")
 
 			# Mostra operatori disponibili
 			if not self.mostra_operatori_disponibili():
 				return
 			while True:
 				operatore_id = self.valida_intero(input("\nID Operatore: ").strip(), "ID Operatore", 1)
-				operatori = self.cinema_ops.get_all_operatori()
-				operatore_selezionato = next((o for o in operatori if o['ID_Operatore'] == operatore_id), None)
+				operatore_selezionato = self.cinema_ops.get_operatore_by_id(operatore_id)
 				if operatore_selezionato:
 					print(f"✅ Operatore selezionato: {operatore_selezionato['Nome']} {operatore_selezionato['Cognome']}")
 					break
@@ -1039,8 +1010,7 @@ class CinemaApp:
 				return
 			while True:
 				tariffa_id = self.valida_intero(input("\nID Tariffa: ").strip(), "ID Tariffa", 1)
-				tariffe = self.cinema_ops.get_all_tariffe()
-				tariffa_selezionata = next((t for t in tariffe if t['ID_Tariffa'] == tariffa_id), None)
+				tariffa_selezionata = self.cinema_ops.get_tariffa_by_id(tariffa_id)
 				if tariffa_selezionata:
 					print(f"✅ Tariffa selezionata: {tariffa_selezionata['Nome_Tariffa']} (€{tariffa_selezionata['Prezzo_Base']})")
 					break
@@ -1055,28 +1025,131 @@ class CinemaApp:
 		except Exception as e:
 			print(f"❌ Errore: {e}")
 
+	def genera_palinsesto(self):
+		print("\n🗓️  GENERA PALINSESTO SETTIMANALE")
+		print("-" * 32)
+
+		try:
+			if not self.mostra_film_disponibili():
+				return
+			while True:
+				data_inizio = self.valida_data(input("\nPrimo giorno (YYYY-MM-DD): ").strip(), "Primo giorno")
+				if data_inizio is not None:
+					break
+
+			print("\nProiezioni da fare nella settimana, come ID_Film:numero separati da virgola (es. 3:10, 7:4)")
+			while True:
+				richieste = self.leggi_richieste_palinsesto(input("Richieste: ").strip())
+				if richieste is None:
+					continue
+				if not richieste:
+					print("❌ Nessuna proiezione richiesta.")
+					return
+				film = self.cinema_ops.get_film_by_ids(richieste)
+				mancanti = [film_id for film_id in richieste if film_id not in film]
+				if not mancanti:
+					break
+				print(f"❌ Film non trovati: {', '.join(map(str, mancanti))}")
+			for film_id, numero in richieste.items():
+				print(f"  {film[film_id]['Titolo']} ({film[film_id]['Durata']} min): {numero}")
+
+			if not self.mostra_tariffe_disponibili():
+				return
+			while True:
+				tariffa_id = self.valida_intero(input("\nID Tariffa: ").strip(), "ID Tariffa", 1)
+				tariffa_selezionata = self.cinema_ops.get_tariffa_by_id(tariffa_id)
+				if tariffa_selezionata:
+					print(f"✅ Tariffa selezionata: {tariffa_selezionata['Nome_Tariffa']} (€{tariffa_selezionata['Prezzo_Base']})")
+					break
+				print("❌ Tariffa non trovata! Verifica l'ID della tariffa.")
+
+			# Prima solo la proposta, poi il salvataggio su conferma
+			esito = self.cinema_ops.genera_palinsesto(data_inizio, richieste, tariffa_id, salva=False)
+			titoli = {film_id: f['Titolo'] for film_id, f in film.items()}
+			sale = self.cinema_ops.get_sale_by_ids({p['ID_Sala'] for p in esito['Proiezioni']})
+			numeri_sala = {sala_id: s['Numero'] for sala_id, s in sale.items()}
+			if esito['Proiezioni']:
+				headers = ["Data", "Sala", "Ora Inizio", "Ora Fine", "Film", "Operatore"]
+				rows = []
+				for p in sorted(esito['Proiezioni'], key=lambda p: (p['Inizio'], numeri_sala[p['ID_Sala']])):
+					rows.append([
+						p['Data'],
+						numeri_sala[p['ID_Sala']],
+						p['Ora_Inizio'].strftime('%H:%M'),
+						p['Ora_Fine'].strftime('%H:%M'),
+						titoli[p['ID_Film']],
+						p['ID_Operatore']
+					])
+				print(f"\n{tabulate(rows, headers=headers, tablefmt='grid')}")
+			if esito['Non_Piazzate']:
+				print("\n⚠️  Proiezioni non piazzate:")
+				rows = [[n['Data'], titoli[n['ID_Film']], n['Motivo']] for n in esito['Non_Piazzate']]
+				print(tabulate(rows, headers=["Data", "Film", "Motivo"], tablefmt='grid'))
+			if not esito['Proiezioni']:
+				print("❌ Nessuna proiezione piazzabile.")
+				return
+
+			conferma = input(f"\nSalvare {len(esito['Proiezioni'])} proiezioni? (si/no): ").strip().lower()
+			if conferma != 'si':
+				print("Operazione annullata.")
+				return
+			# si salva la proposta mostrata, non una nuova generazione
+			create = self.cinema_ops.salva_palinsesto(esito['Proiezioni'], tariffa_id)
+			print(f"✅ Palinsesto salvato: {create} proiezioni create.")
+
+		except ValueError as e:
+			print(f"❌ Errore nei dati: {e}")
+		except Exception as e:
+			print(f"❌ Errore: {e}")
+
+	def leggi_richieste_palinsesto(self, valore):
+		"""{ID_Film: numero} da "ID:numero, ID:numero"; None (con messaggio) se non valido"""
+		richieste = {}
+		for voce in filter(None, (v.strip() for v in valore.split(','))):
+			film_id, separatore, numero = voce.partition(':')
+			if not separatore:
+				print(f"❌ '{voce}' non è nel formato ID_Film:numero!")
+				return None
+			film_id = self.valida_intero(film_id.strip(), "ID Film", 1)
+			numero = self.valida_intero(numero.strip(), "Numero proiezioni", 0)
+			if film_id is None or numero is None:
+				return None
+			if numero:
+				richieste[film_id] = richieste.get(film_id, 0) + numero
+		return richieste
+
+	def copia_settimana(self):
+		print("\n📋 COPIA SETTIMANA")
+		print("-" * 18)
+
+		try:
+			while True:
+				origine = self.valida_data(input("Primo giorno da copiare (YYYY-MM-DD): ").strip(), "Primo giorno da copiare")
+				if origine is not None:
+					break
+			while True:
+				destinazione = self.valida_data(input("Primo giorno di destinazione (YYYY-MM-DD): ").strip(), "Primo giorno di destinazione")
+				if destinazione is not None:
+					break
+
+			esito = self.cinema_ops.clone_schedule(origine, destinazione)
+			print(f"✅ Proiezioni copiate: {esito['Copiate']}")
+			if esito['Saltate']:
+				print("\n⚠️  Proiezioni non copiate:")
+				rows = [[p['ID_Proiezione'], p['ID_Sala'], p['Data'], p['Ora_Inizio'], p['Motivo']]
+						for p in esito['Saltate']]
+				print(tabulate(rows, headers=["ID", "Sala", "Data", "Ora Inizio", "Motivo"], tablefmt='grid'))
+
+		except ValueError as e:
+			print(f"❌ Errore nei dati: {e}")
+		except Exception as e:
+			print(f"❌ Errore: {e}")
+
 	def elimina_proiezione(self):
 		print("\n🗑️  ELIMINA PROIEZIONE")
 		print("-" * 20)
-		proiezioni = self.cinema_ops.get_all_proiezioni()
-		if not proiezioni:
-			print("❌ Nessuna proiezione da eliminare.")
+		if not self.mostra_proiezioni_disponibili():
 			return
-		headers = ["ID", "Film", "Sala", "Data", "Ora Inizio", "Ora Fine", "Prezzo"]
-		rows = []
-		for p in proiezioni:
-			rows.append([
-				p['ID_Proiezione'],
-				p['Titolo'][:25] + "..." if len(p['Titolo']) > 25 else p['Titolo'],
-				p['Sala'],
-				p['Data'],
-				p['Ora_Inizio'],
-				p['Ora_Fine'],
-				f"€{p['Prezzo_Base']}"
-			])
-		print(f"\nPROIEZIONI DISPONIBILI:")
-		from tabulate import tabulate
-		print(tabulate(rows, headers=headers, tablefmt='grid'))
 		while True:
 			val = input("ID Proiezione da eliminare (scrivi 'indietro' o 'q' per annullare): ").strip()
 			if val.lower() in ('indietro', 'q'):
@@ -1084,7 +1157,7 @@ class CinemaApp:
 				return
 			proiezione_id = self.valida_intero(val, "ID Proiezione", 1)
 			if proiezione_id is not None:
-				proiezione = next((p for p in proiezioni if p['ID_Proiezione'] == proiezione_id), None)
+				proiezione = self.cinema_ops.get_proiezione_by_id(proiezione_id)
 				if proiezione:
 					conferma = input(f"Sei sicuro di voler eliminare la proiezione di '{proiezione['Titolo']}' in sala {proiezione['Sala']} del {proiezione['Data']}? (si/no): ").strip().lower()
 					if conferma == 'si':
@@ -1107,9 +1180,10 @@ class CinemaApp:
 			print("1. Vendi biglietto")
 			print("2. Posti disponibili")
 			print("3. Aggiorna stato biglietto")
-			print("4. Torna al menu principale")
+			print("4. Vendita di gruppo")
+			print("5. Torna al menu principale")
 
-			choice = input("\nScegli un'opzione (1-4): ").strip()
+			choice = input("\nScegli un'opzione (1-5): ").strip()
 
 			if choice == '1':
 				self.vendi_biglietto()
@@ -1118,6 +1192,8 @@ class CinemaApp:
 			elif choice == '3':
 				self.aggiorna_biglietto()
 			elif choice == '4':
+				self.vendi_biglietti_gruppo()
+			elif choice == '5':
 				break
 			else:
 				print("❌ Opzione non valida!")
@@ -1131,8 +1207,7 @@ class CinemaApp:
 				return
 			while True:
 				proiezione_id = self.valida_intero(input("\nID Proiezione: ").strip(), "ID Proiezione", 1)
-				proiezioni = self.cinema_ops.get_all_proiezioni()
-				proiezione_selezionata = next((p for p in proiezioni if p['ID_Proiezione'] == proiezione_id), None)
+				proiezione_selezionata = self.cinema_ops.get_proiezione_by_id(proiezione_id)
 				if proiezione_selezionata:
 					print(f"✅ Proiezione selezionata: {proiezione_selezionata['Titolo']} - Sala {proiezione_selezionata['Sala']}")
 					break
@@ -1142,8 +1217,7 @@ class CinemaApp:
 				return
 			while True:
 				cliente_id = self.valida_intero(input("\nID Cliente: ").strip(), "ID Cliente", 1)
-				clienti = self.cinema_ops.get_all_clienti()
-				cliente_selezionato = next((c for c in clienti if c['ID_Cliente'] == cliente_id), None)
+				cliente_selezionato = self.cinema_ops.get_cliente_by_id(cliente_id) if cliente_id is not None else None
 				if cliente_selezionato:
 					print(f"✅ Cliente selezionato: {cliente_selezionato['Nome']} {cliente_selezionato['Cognome']}")
 					break
@@ -1180,6 +1254,110 @@ class CinemaApp:
 		except Exception as e:
 			print(f"❌ Errore: {e}")
 
+	def interpreta_posti(self, testo, posti):
+		"""Converte 'C1-C12, D3' negli ID dei posti disponibili corrispondenti"""
+		per_etichetta = {(p['Fila'], p['Numero_Posto']): p['ID_Posto'] for p in posti}
+		posto_ids = []
+		for parte in testo.upper().replace(' ', '').split(','):
+			if not parte:
+				continue
+			estremi = parte.split('-')
+			if len(estremi) > 2:
+				raise ValueError(f"Intervallo non valido: {parte}")
+			coppie = []
+			for estremo in estremi:
+				fila = estremo.rstrip('0123456789')
+				numero = estremo[len(fila):]
+				if not fila and coppie:
+					# "C1-12": la fila del secondo estremo è sottintesa
+					fila = coppie[0][0]
+				if not fila or not numero:
+					raise ValueError(f"Posto non valido: {estremo} (formato atteso es. C1)")
+				coppie.append((fila, int(numero)))
+			(fila, inizio), (fila_fine, fine) = coppie[0], coppie[-1]
+			if fila != fila_fine:
+				raise ValueError(f"Un intervallo deve restare nella stessa fila: {parte}")
+			if inizio > fine:
+				inizio, fine = fine, inizio
+			for numero in range(inizio, fine + 1):
+				posto_id = per_etichetta.get((fila, numero))
+				if posto_id is None:
+					raise ValueError(f"Posto {fila}{numero} non disponibile")
+				posto_ids.append(posto_id)
+		if not posto_ids:
+			raise ValueError("Nessun posto indicato")
+		return posto_ids
+
+	def vendi_biglietti_gruppo(self):
+		print("\n👥 VENDITA DI GRUPPO")
+		print("-" * 19)
+
+		try:
+			if not self.mostra_proiezioni_disponibili():
+				return
+			while True:
+				proiezione_id = self.valida_intero(input("\nID Proiezione: ").strip(), "ID Proiezione", 1)
+				proiezione_selezionata = self.cinema_ops.get_proiezione_by_id(proiezione_id)
+				if proiezione_selezionata:
+					print(f"✅ Proiezione selezionata: {proiezione_selezionata['Titolo']} - Sala {proiezione_selezionata['Sala']}")
+					break
+				print("❌ Proiezione non trovata! Verifica l'ID della proiezione.")
+
+			if not self.mostra_clienti_disponibili():
+				return
+			while True:
+				cliente_id = self.valida_intero(input("\nID Cliente: ").strip(), "ID Cliente", 1)
+				cliente_selezionato = self.cinema_ops.get_cliente_by_id(cliente_id) if cliente_id is not None else None
+				if cliente_selezionato:
+					print(f"✅ Cliente selezionato: {cliente_selezionato['Nome']} {cliente_selezionato['Cognome']}")
+					break
+				print("❌ Cliente non trovato! Verifica l'ID del cliente.")
+
+			posti = self.cinema_ops.get_posti_disponibili(proiezione_id)
+			if not posti:
+				print("❌ Nessun posto disponibile per questa proiezione!")
+				return
+			print(f"\n🪑 Posti disponibili: {len(posti)}")
+			print("Indica i posti (es. C1-C12, D3) oppure solo il numero di persone")
+			print("per assegnare automaticamente i migliori posti vicini.")
+			while True:
+				scelta = input("Posti: ").strip()
+				if scelta.isdigit():
+					quanti = self.valida_intero(scelta, "Numero di persone", 1, len(posti))
+					if quanti is None:
+						continue
+					blocco = self.cinema_ops.trova_posti_contigui(proiezione_id, quanti)
+					if blocco:
+						print(f"✅ Posti suggeriti: {blocco[0]['Fila']}{blocco[0]['Numero_Posto']}-{blocco[-1]['Fila']}{blocco[-1]['Numero_Posto']}")
+						break
+					print(f"❌ Nessun blocco di {quanti} posti vicini disponibile!")
+					continue
+				try:
+					posto_ids = self.interpreta_posti(scelta, posti)
+					quanti = None
+					break
+				except ValueError as e:
+					print(f"❌ {e}")
+
+			promozione_input = input("ID Promozione (opzionale): ").strip()
+			promozione_id = int(promozione_input) if promozione_input else None
+
+			if quanti:
+				# il blocco viene riscelto e bloccato al momento della vendita
+				biglietti = self.cinema_ops.vendi_posti_contigui(proiezione_id, cliente_id, quanti, promozione_id)
+			else:
+				biglietti = self.cinema_ops.create_biglietti_batch(proiezione_id, cliente_id, posto_ids, promozione_id)
+			headers = ["ID Biglietto", "Posto", "Prezzo"]
+			rows = [[b['ID_Biglietto'], f"{b['Fila']}{b['Numero_Posto']}", f"€{b['Prezzo_Applicato']}"] for b in biglietti]
+			print(f"\n✅ {len(biglietti)} biglietti venduti!")
+			print(f"{tabulate(rows, headers=headers, tablefmt='grid')}")
+			print(f"💰 Totale: €{sum(b['Prezzo_Applicato'] for b in biglietti):.2f}")
+
+		except ValueError as e:
+			print(f"❌ Errore nei dati: {e}")
+		except Exception as e:
+			print(f"❌ Errore: {e}")
+
 	def posti_disponibili(self):
 		print("\n🪑 POSTI DISPONIBILI")
 		print("-" * 20)
@@ -1189,8 +1367,7 @@ class CinemaApp:
 				return
 			while True:
 				proiezione_id = self.valida_intero(input("\nID Proiezione: ").strip(), "ID Proiezione", 1)
-				proiezioni = self.cinema_ops.get_all_proiezioni()
-				proiezione_selezionata = next((p for p in proiezioni if p['ID_Proiezione'] == proiezione_id), None)
+				proiezione_selezionata = self.cinema_ops.get_proiezione_by_id(proiezione_id)
 				if proiezione_selezionata:
 					break
 				print("❌ Proiezione non trovata! Verifica l'ID della proiezione.")
@@ -1216,27 +1393,35 @@ class CinemaApp:
 		print("-" * 21)
 
 		try:
-			# Mostra la lista dei biglietti disponibili (solo ID e stato)
-			# Potresti voler implementare una funzione mostra_biglietti_disponibili()
-			# Qui mostro solo un esempio base:
-			from tabulate import tabulate
-			biglietti = []
-			for cliente in self.cinema_ops.get_all_clienti():
-				storico = self.cinema_ops.get_storico_cliente(cliente['ID_Cliente'])
-				for b in storico:
-					biglietti.append({
-						'ID_Biglietto': b['ID_Biglietto'],
-						'Cliente': f"{cliente['Nome']} {cliente['Cognome']}",
-						'Film': b['Titolo'],
-						'Stato': b['Stato']
-					})
-			if not biglietti:
+			# Filtri facoltativi: senza filtri si scorrono tutti i biglietti dal più recente
+			filtri = {}
+			for chiave, etichetta in (('cliente_id', "ID Cliente"), ('proiezione_id', "ID Proiezione")):
+				while True:
+					valore = input(f"{etichetta} (invio = tutti): ").strip()
+					if not valore:
+						break
+					numero = self.valida_intero(valore, etichetta, 1)
+					if numero is not None:
+						filtri[chiave] = numero
+						break
+			while True:
+				valore = input("Data proiezione (YYYY-MM-DD, invio = tutte): ").strip()
+				if not valore:
+					break
+				data = self.valida_data(valore, "Data proiezione")
+				if data is not None:
+					filtri['data'] = data
+					break
+
+			if not self.sfoglia(
+				lambda cursore: self.cinema_ops.get_biglietti(cursore=cursore, **filtri),
+				["ID Biglietto", "Cliente", "Film", "Data", "Ora", "Sala", "Posto", "Stato"],
+				lambda b: [b['ID_Biglietto'], f"{b['Nome']} {b['Cognome']}", b['Titolo'], b['Data'],
+						   b['Ora_Inizio'], b['Sala'], b['Posto'], b['Stato']],
+				"\nBIGLIETTI DISPONIBILI:"
+			):
 				print("❌ Nessun biglietto da aggiornare.")
 				return
-			headers = ["ID Biglietto", "Cliente", "Film", "Stato"]
-			rows = [[b['ID_Biglietto'], b['Cliente'], b['Film'], b['Stato']] for b in biglietti]
-			print(f"\nBIGLIETTI DISPONIBILI:")
-			print(tabulate(rows, headers=headers, tablefmt='grid'))
 
 			while True:
 				biglietto_id = self.valida_intero(input("ID Biglietto: ").strip(), "ID Biglietto", 1)
@@ -1293,8 +1478,7 @@ class CinemaApp:
 				return
 			while True:
 				cliente_id = self.valida_intero(input("\nID Cliente: ").strip(), "ID Cliente", 1)
-				clienti = self.cinema_ops.get_all_clienti()
-				cliente_selezionato = next((c for c in clienti if c['ID_Cliente'] == cliente_id), None)
+				cliente_selezionato = self.cinema_ops.get_cliente_by_id(cliente_id) if cliente_id is not None else None
 				if cliente_selezionato:
 					print(f"✅ Cliente selezionato: {cliente_selezionato['Nome']} {cliente_selezionato['Cognome']}")
 					break
@@ -1304,8 +1488,7 @@ class CinemaApp:
 				return
 			while True:
 				film_id = self.valida_intero(input("\nID Film: ").strip(), "ID Film", 1)
-				film = self.cinema_ops.get_all_film()
-				film_selezionato = next((f for f in film if f['ID_Film'] == film_id), None)
+				film_selezionato = self.cinema_ops.get_film_by_id(film_id)
 				if film_selezionato:
 					print(f"✅ Film selezionato: {film_selezionato['Titolo']}")
 					break
@@ -1339,8 +1522,7 @@ class CinemaApp:
 				return
 			while True:
 				film_id = self.valida_intero(input("\nID Film: ").strip(), "ID Film", 1)
-				film = self.cinema_ops.get_all_film()
-				film_selezionato = next((f for f in film if f['ID_Film'] == film_id), None)
+				film_selezionato = self.cinema_ops.get_film_by_id(film_id)
 				if film_selezionato:
 					break
 				print("❌ Film non trovato! Verifica l'ID del film.")
@@ -1434,9 +1616,14 @@ class CinemaApp:
 			print("1. Reset database")
 			print("2. Test connessione")
 			print("3. Elimina promozione")
-			print("4. Torna al menu principale")
+			print("4. Ricostruisci incassi giornalieri")
+			print("5. Ricostruisci statistiche film")
+			print("6. Esporta dati (CSV / JSON lines)")
+			print("7. Statistiche pool connessioni")
+			print("8. Statistiche query e query lente")
+			print("9. Torna al menu principale")
 
-			choice = input("\nScegli un'opzione (1-4): ").strip()
+			choice = input("\nScegli un'opzione (1-9): ").strip()
 
 			if choice == '1':
 				self.reset_db()
@@ -1445,6 +1632,16 @@ class CinemaApp:
 			elif choice == '3':
 				self.elimina_promozione()
 			elif choice == '4':
+				self.ricostruisci_incassi()
+			elif choice == '5':
+				self.ricostruisci_statistiche_film()
+			elif choice == '6':
+				self.esporta_dati()
+			elif choice == '7':
+				self.statistiche_pool()
+			elif choice == '8':
+				self.statistiche_query()
+			elif choice == '9':
 				break
 			else:
 				print("❌ Opzione non valida!")
@@ -1458,6 +1655,13 @@ class CinemaApp:
 		if conferma == 'si':
 			try:
 				reset_database()
+				# le cache di processo non devono sopravvivere ai dati cancellati: gli ID
+				# ripartono da 1 e verrebbero associati alle righe di prima del reset
+				self.cinema_ops.film_search.invalidate()
+				self.cinema_ops.reference_cache.invalidate()
+				self.cinema_ops.pricing.invalidate()
+				self.cinema_ops.seat_map.invalidate()
+				self.cinema_ops.schedule_index.invalidate()
 				print("✅ Database resettato con successo!")
 			except Exception as e:
 				print(f"❌ Errore nel reset: {e}")
@@ -1474,6 +1678,150 @@ class CinemaApp:
 		except Exception as e:
 			print(f"❌ Errore di connessione: {e}")
 
+	def ricostruisci_incassi(self):
+		print("\n🔄 RICOSTRUISCI INCASSI")
+		print("-" * 23)
+
+		try:
+			data_inizio = data_fine = None
+			inizio_input = input("Data inizio (YYYY-MM-DD, vuoto = tutto lo storico): ").strip()
+			if inizio_input:
+				data_inizio = self.valida_data(inizio_input, "Data inizio")
+				if data_inizio is None:
+					return
+				while True:
+					data_fine = self.valida_data(input("Data fine (YYYY-MM-DD): ").strip(), "Data fine")
+					if data_fine is not None:
+						break
+				if data_inizio > data_fine:
+					print("❌ La data di inizio deve essere precedente alla data di fine!")
+					return
+
+			righe = self.cinema_ops.ricostruisci_incassi(data_inizio, data_fine)
+			print(f"✅ Incassi ricostruiti ({righe} righe)")
+		except Exception as e:
+			print(f"❌ Errore: {e}")
+
+	def ricostruisci_statistiche_film(self):
+		print("\n🔄 RICOSTRUISCI STATISTICHE FILM")
+		print("-" * 31)
+
+		try:
+			film = self.cinema_ops.ricostruisci_statistiche_film()
+			print(f"✅ Statistiche ricostruite per {film} film")
+		except Exception as e:
+			print(f"❌ Errore: {e}")
+
+	def esporta_dati(self):
+		print("\n📤 ESPORTA DATI")
+		print("-" * 15)
+
+		tabelle = {
+			'1': ('biglietti', self.cinema_ops.iter_biglietti, True),
+			'2': ('clienti', self.cinema_ops.iter_clienti, False),
+			'3': ('proiezioni', self.cinema_ops.iter_proiezioni, True)
+		}
+		for chiave, (nome, _, _) in tabelle.items():
+			print(f"{chiave}. {nome.capitalize()}")
+		scelta = input("Cosa vuoi esportare (1-3): ").strip()
+		if scelta not in tabelle:
+			print("❌ Opzione non valida!")
+			return
+		nome, iteratore, per_data = tabelle[scelta]
+
+		formato = input(f"Formato ({'/'.join(FORMATI)}, default csv): ").strip().lower() or 'csv'
+		if formato not in FORMATI:
+			print("❌ Formato non valido!")
+			return
+		percorso = input(f"File di destinazione (default {nome}.{formato}): ").strip() or f"{nome}.{formato}"
+
+		try:
+			argomenti = ()
+			if per_data:
+				inizio_input = input("Data inizio (YYYY-MM-DD, vuoto = tutto): ").strip()
+				if inizio_input:
+					data_inizio = self.valida_data(inizio_input, "Data inizio")
+					if data_inizio is None:
+						return
+					fine_input = input("Data fine (YYYY-MM-DD, vuoto = stesso giorno): ").strip()
+					data_fine = self.valida_data(fine_input, "Data fine") if fine_input else data_inizio
+					if data_fine is None:
+						return
+					if data_inizio > data_fine:
+						print("❌ La data di inizio deve essere precedente alla data di fine!")
+						return
+					argomenti = (data_inizio, data_fine)
+
+			scritte = esporta(iteratore(*argomenti), percorso, formato)
+			print(f"✅ Esportate {scritte} righe in {percorso}")
+		except Exception as e:
+			print(f"❌ Errore nell'esportazione: {e}")
+
+	def statistiche_pool(self):
+		print("\n📊 STATISTICHE POOL CONNESSIONI")
+		print("-" * 31)
+
+		stats = self.cinema_ops.db.statistiche_pool()
+		print(f"Connessioni: {stats['In_Uso']} in uso, {stats['Libere']} libere, "
+			  f"{stats['Overflow']} in overflow (pool {stats['Dimensione']} + "
+			  f"{DatabaseConfig.SQLALCHEMY_MAX_OVERFLOW} overflow, massimo in uso {stats['In_Uso_Massimo']})")
+		print(f"Checkout: {stats['Checkout']}, attesa media {stats['Attesa_Media_ms']:.2f} ms, "
+			  f"massima {stats['Attesa_Massima_ms']:.2f} ms")
+		print(f"Connessioni aperte: {stats['Connessioni_Aperte']}, apertura media "
+			  f"{stats['Connessione_Media_ms']:.2f} ms, massima {stats['Connessione_Massima_ms']:.2f} ms")
+		print(f"Connessioni invalidate: {stats['Invalidate']}")
+
+		if stats['Checkout']:
+			righe = [[f['Fascia'], f['Checkout'], f"{f['Checkout'] * 100 / stats['Checkout']:.1f}%"]
+					 for f in stats['Istogramma_Attese']]
+			print("\nAttesa per ottenere una connessione:")
+			print(tabulate(righe, headers=["Attesa", "Checkout", "Quota"], tablefmt="grid"))
+
+		if input("\nAzzerare i contatori? (si/no): ").strip().lower() == 'si':
+			self.cinema_ops.db.azzera_statistiche_pool()
+			print("✅ Contatori azzerati")
+
+	def statistiche_query(self):
+		print("\n⏱️  STATISTICHE QUERY")
+		print("-" * 20)
+
+		if not query_stats.attiva:
+			print("ℹ️  Strumentazione disattivata (QUERY_STATS_ATTIVE=true nel .env per attivarla)")
+			return
+		riepilogo = query_stats.riepilogo(limite=10)
+		if not riepilogo['Query']:
+			print("❌ Nessuna query registrata.")
+			return
+
+		def latenze(m):
+			return [m['Chiamate'], f"{m['Totale_ms']:.0f}", f"{m['Media_ms']:.2f}",
+					f"≤{m['P95_ms']:.0f}", f"{m['Massimo_ms']:.1f}", m['Righe'], m['Errori']]
+
+		colonne = ["Chiamate", "Totale ms", "Media ms", "p95 ms", "Max ms", "Righe", "Errori"]
+		print("\nMetodi più costosi:")
+		righe = [[m['Metodo'].split('.')[-1], *latenze(m), m['Query']] for m in riepilogo['Metodi']]
+		print(tabulate(righe, headers=["Metodo", *colonne, "Query"], tablefmt="grid"))
+
+		print("\nQuery più costose:")
+		righe = [[self._accorcia(q['Statement'], 60), *latenze(q)] for q in riepilogo['Query']]
+		print(tabulate(righe, headers=["Statement", *colonne], tablefmt="grid"))
+
+		if riepilogo['Lente']:
+			print(f"\nUltime query lente (oltre {AppConfig.SLOW_QUERY_SOGLIA_MS} ms, "
+				  f"dettagli ed EXPLAIN in {AppConfig.SLOW_QUERY_LOG}):")
+			righe = [[l['Quando'], f"{l['Durata_ms']:.1f}", (l['Metodo'] or '-').split('.')[-1],
+					  self._accorcia(l['Statement'], 60)] for l in riepilogo['Lente'][:10]]
+			print(tabulate(righe, headers=["Quando", "ms", "Metodo", "Statement"], tablefmt="grid"))
+
+		if input("\nAzzerare i contatori? (si/no): ").strip().lower() == 'si':
+			query_stats.azzera()
+			print("✅ Contatori azzerati")
+
+	@staticmethod
+	def _accorcia(testo: str, lunghezza: int) -> str:
+		testo = ' '.join(testo.split())
+		return testo if len(testo) <= lunghezza else testo[:lunghezza - 1] + '…'
+
 	def elimina_promozione(self):
 		print("\n🗑️  ELIMINA PROMOZIONE")
 		print("-" * 20)
@@ -1545,25 +1893,12 @@ class CinemaApp:
 	def visualizza_tutte_promozioni(self):
 		print("\n🏷️ PROMOZIONI DISPONIBILI")
 		print("-" * 22)
-		if not hasattr(self.cinema_ops, 'get_all_promozioni'):
-			print("❌ Funzione get_all_promozioni non implementata.")
-			return
-		promozioni = self.cinema_ops.get_all_promozioni()
-		if not promozioni:
+		if not self.sfoglia(
+			self.cinema_ops.get_promozioni_pagina,
+			["ID", "Nome", "Sconto", "Data Inizio", "Data Fine"],
+			lambda p: [p['ID_Promozione'], p['Nome'], f"{p['Percentuale_Sconto']}%", p['Data_Inizio'], p['Data_Fine']]
+		):
 			print("❌ Nessuna promozione presente.")
-			return
-		headers = ["ID", "Nome", "Sconto", "Data Inizio", "Data Fine"]
-		rows = []
-		for p in promozioni:
-			rows.append([
-				p['ID_Promozione'],
-				p['Nome'],
-				f"{p['Percentuale_Sconto']}%",
-				p['Data_Inizio'],
-				p['Data_Fine']
-			])
-		from tabulate import tabulate
-		print(tabulate(rows, headers=headers, tablefmt='grid'))
 
 	def aggiungi_promozione(self):
 		print("\n➕ AGGIUNGI PROMOZIONE")
@@ -0,0 +1,266 @@
+"""Migrazioni di schema versionate.
+
+create_all crea solo le tabelle mancanti: colonne e indici nuovi su tabelle esistenti
+arrivano da qui. Ogni passo ha un numero di versione crescente, viene applicato una
+sola volta e registrato in VERSIONE_SCHEMA; i passi sono idempotenti, così valgono sia
+per un database appena creato sia per uno già popolato.
+
+Uso: python migrations.py  (applica i passi mancanti e verifica i piani con EXPLAIN)
+"""
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import List
+
+from sqlalchemy import text
+
+import query_frequenti
+from config import AppConfig
+
+logger = logging.getLogger(__name__)
+
+def _indice_esiste(conn, tabella: str, nome: str) -> bool:
+	return conn.execute(text("""
+		SELECT 1 FROM information_schema.STATISTICS
+		WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :tabella AND INDEX_NAME = :nome
+		LIMIT 1
+	"""), {'tabella': tabella, 'nome': nome}).first() is not None
+
+def _aggiungi_indice(conn, tabella: str, nome: str, colonne: str) -> None:
+	if _indice_esiste(conn, tabella, nome):
+		return
+	# INPLACE/LOCK=NONE: la tabella resta leggibile e scrivibile durante la costruzione
+	conn.execute(text(f"ALTER TABLE {tabella} ADD INDEX {nome} ({colonne}), ALGORITHM=INPLACE, LOCK=NONE"))
+	logger.info(f"Creato indice {nome} su {tabella}")
+
+def _colonna_esiste(conn, tabella: str, nome: str) -> bool:
+	return conn.execute(text("""
+		SELECT 1 FROM information_schema.COLUMNS
+		WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :tabella AND COLUMN_NAME = :nome
+		LIMIT 1
+	"""), {'tabella': tabella, 'nome': nome}).first() is not None
+
+def _indici_query_frequenti(conn) -> None:
+	_aggiungi_indice(conn, 'BIGLIETTO', 'idx_biglietto_proiezione_stato', 'ID_Proiezione, Stato, ID_Posto')
+	_aggiungi_indice(conn, 'BIGLIETTO', 'idx_biglietto_cliente', 'ID_Cliente')
+	_aggiungi_indice(conn, 'BIGLIETTO', 'idx_biglietto_emissione', 'Data_Emissione')
+	_aggiungi_indice(conn, 'PROIEZIONE', 'idx_proiezione_data', 'Data, Ora_Inizio')
+	_aggiungi_indice(conn, 'FILM', 'idx_film_genere', 'Genere')
+	_aggiungi_indice(conn, 'RECENSIONE', 'idx_recensione_film', 'ID_Film, Valutazione')
+
+BLOCCO_BACKFILL = 10000  # righe aggiornate per transazione nei backfill
+
+def _proiezioni_datetime(conn) -> None:
+	if not _colonna_esiste(conn, 'PROIEZIONE', 'Inizio'):
+		conn.execute(text(
+			"ALTER TABLE PROIEZIONE ADD COLUMN Inizio DATETIME NULL, ADD COLUMN Fine DATETIME NULL, "
+			"ALGORITHM=INPLACE, LOCK=NONE"
+		))
+	# Backfill a blocchi di chiave primaria, per non tenere lock lunghi sulla tabella
+	massimo = conn.execute(text("SELECT COALESCE(MAX(ID_Proiezione), 0) FROM PROIEZIONE")).scalar()
+	for da in range(0, massimo + 1, BLOCCO_BACKFILL):
+		conn.execute(text("""
+			UPDATE PROIEZIONE
+			SET Inizio = TIMESTAMP(Data, Ora_Inizio),
+				Fine = TIMESTAMP(Data, Ora_Fine) + INTERVAL (Ora_Fine <= Ora_Inizio) DAY
+			WHERE ID_Proiezione BETWEEN :da AND :a AND Inizio IS NULL
+		"""), {'da': da, 'a': da + BLOCCO_BACKFILL - 1})
+		conn.commit()
+	_aggiungi_indice(conn, 'PROIEZIONE', 'idx_proiezione_sala_inizio', 'ID_Sala, Inizio, Fine')
+
+def ricostruisci_incassi(conn, data_inizio: date = None, data_fine: date = None) -> int:
+	"""Ricalcola INCASSO_GIORNALIERO da BIGLIETTO (tutto lo storico o solo l'intervallo,
+	estremi compresi) nella transazione di `conn`, una Connection o una Session.
+	Restituisce il numero di righe scritte."""
+	filtro_incassi, filtro_biglietti, params = "", "", {}
+	if data_inizio is not None:
+		filtro_incassi += " AND Data >= :inizio"
+		filtro_biglietti += " AND Data_Emissione >= :inizio_ts"
+		params.update(inizio=data_inizio, inizio_ts=datetime.combine(data_inizio, time()))
+	if data_fine is not None:
+		filtro_incassi += " AND Data <= :fine"
+		filtro_biglietti += " AND Data_Emissione < :fine_ts"
+		params.update(fine=data_fine, fine_ts=datetime.combine(data_fine + timedelta(days=1), time()))
+
+	conn.execute(text(f"DELETE FROM INCASSO_GIORNALIERO WHERE 1 = 1{filtro_incassi}"), params)
+	return conn.execute(text(f"""
+		INSERT INTO INCASSO_GIORNALIERO (Data, Stato, Slot, Biglietti, Incasso)
+		SELECT DATE(Data_Emissione), Stato, 0, COUNT(*), SUM(Prezzo_Applicato)
+		FROM BIGLIETTO
+		WHERE Data_Emissione IS NOT NULL{filtro_biglietti}
+		GROUP BY DATE(Data_Emissione), Stato
+	"""), params).rowcount
+
+GIORNI_BACKFILL_INCASSI = 31  # giornate di biglietti ricalcolate per transazione
+
+def _incassi_giornalieri(conn) -> None:
+	# Un database popolato prima della tabella riassuntiva ha tutto lo storico da contare:
+	# un mese per transazione, con la scansione su idx_biglietto_emissione
+	primo, ultimo = conn.execute(text(
+		"SELECT DATE(MIN(Data_Emissione)), DATE(MAX(Data_Emissione)) FROM BIGLIETTO"
+	)).one()
+	if primo is None:
+		return
+	da = primo
+	while da <= ultimo:
+		a = da + timedelta(days=GIORNI_BACKFILL_INCASSI - 1)
+		ricostruisci_incassi(conn, da, a)
+		conn.commit()
+		da = a + timedelta(days=1)
+
+def ricostruisci_statistiche_film(conn, da_film: int = None, a_film: int = None) -> int:
+	"""Ricalcola STATISTICHE_FILM (tutti i film o quelli con ID fra da_film e a_film)
+	aggregando biglietti e recensioni separatamente, nella transazione di `conn`.
+	Restituisce il numero di righe scritte."""
+	filtro, params = "", {}
+	if da_film is not None:
+		filtro = " AND {colonna} BETWEEN :da_film AND :a_film"
+		params = {'da_film': da_film, 'a_film': a_film}
+	conn.execute(text("DELETE FROM STATISTICHE_FILM WHERE 1 = 1" + filtro.format(colonna='ID_Film')), params)
+	return conn.execute(text(f"""
+		INSERT INTO STATISTICHE_FILM (ID_Film, Biglietti_Venduti, Incasso, Numero_Recensioni, Somma_Valutazioni)
+		SELECT f.ID_Film,
+			   COALESCE(b.Biglietti, 0), COALESCE(b.Incasso, 0),
+			   COALESCE(r.Recensioni, 0), COALESCE(r.Somma, 0)
+		FROM FILM f
+		LEFT JOIN (
+			SELECT p.ID_Film, COUNT(*) AS Biglietti, SUM(b.Prezzo_Applicato) AS Incasso
+			FROM BIGLIETTO b
+			JOIN PROIEZIONE p ON p.ID_Proiezione = b.ID_Proiezione
+			WHERE b.Stato != 'Annullato'{filtro.format(colonna='p.ID_Film')}
+			GROUP BY p.ID_Film
+		) b ON b.ID_Film = f.ID_Film
+		LEFT JOIN (
+			SELECT ID_Film, COUNT(*) AS Recensioni, SUM(Valutazione) AS Somma
+			FROM RECENSIONE
+			WHERE 1 = 1{filtro.format(colonna='ID_Film')}
+			GROUP BY ID_Film
+		) r ON r.ID_Film = f.ID_Film
+		WHERE 1 = 1{filtro.format(colonna='f.ID_Film')}
+	"""), params).rowcount
+
+FILM_BACKFILL_STATISTICHE = 1000  # film ricalcolati per transazione
+
+def _statistiche_film(conn) -> None:
+	# Come per gli incassi: i film esistenti prima della tabella riassuntiva partono da zero,
+	# quindi si ricalcola tutto a blocchi di ID_Film
+	massimo = conn.execute(text("SELECT COALESCE(MAX(ID_Film), 0) FROM FILM")).scalar()
+	for da in range(1, massimo + 1, FILM_BACKFILL_STATISTICHE):
+		ricostruisci_statistiche_film(conn, da, da + FILM_BACKFILL_STATISTICHE - 1)
+		conn.commit()
+
+# (versione, descrizione, passo): aggiungere in coda, mai rinumerare
+MIGRAZIONI = [
+	(1, "Indici per le query frequenti", _indici_query_frequenti),
+	(2, "Inizio/Fine datetime delle proiezioni", _proiezioni_datetime),
+	(3, "Popolamento di INCASSO_GIORNALIERO dai biglietti", _incassi_giornalieri),
+	(4, "Popolamento di STATISTICHE_FILM da biglietti e recensioni", _statistiche_film),
+]
+
+# Parametri di esempio per gli EXPLAIN: il piano dipende dalla forma della query, non dai valori
+_GIORNO = date(2024, 1, 1)
+_ORA = datetime(2024, 1, 1, 21, 0)
+
+# (descrizione, query, parametri, tabella, indici accettati): EXPLAIN deve scegliere uno di
+# quegli indici. Le query di query_frequenti sono le stesse eseguite da CinemaOperations.
+CONTROLLI_EXPLAIN = [
+	("Mappa posti", query_frequenti.MAPPA_POSTI,
+	 {'proiezione_id': 1, 'ora': _ORA},
+	 'b', ('idx_biglietto_proiezione_stato', 'unique_posto_proiezione')),
+	("Storico cliente", query_frequenti.STORICO_CLIENTE,
+	 {'cliente_id': 1},
+	 'b', ('idx_biglietto_cliente',)),
+	("Biglietti per cliente", query_frequenti.BIGLIETTI.format(filtro="WHERE b.ID_Cliente = :cliente_id"),
+	 {'cliente_id': 1, 'limite': 21},
+	 'b', ('idx_biglietto_cliente',)),
+	("Biglietti per proiezione", query_frequenti.BIGLIETTI.format(filtro="WHERE b.ID_Proiezione = :proiezione_id"),
+	 {'proiezione_id': 1, 'limite': 21},
+	 'b', ('idx_biglietto_proiezione_stato',)),
+	("Ricostruzione incassi",
+	 "SELECT DATE(Data_Emissione), Stato, COUNT(*) FROM BIGLIETTO "
+	 "WHERE Data_Emissione >= '2024-01-01' AND Data_Emissione < '2024-01-02' GROUP BY DATE(Data_Emissione), Stato",
+	 {}, 'BIGLIETTO', ('idx_biglietto_emissione',)),
+	("Sovrapposizioni sala", query_frequenti.SOVRAPPOSIZIONE_SALA,
+	 {'sala_id': 1, 'inizio_minimo': _ORA - timedelta(minutes=AppConfig.DURATA_MASSIMA_PROIEZIONE), 'inizio': _ORA,
+	  'fine': _ORA + timedelta(hours=2), 'escludi': 0},
+	 'p', ('idx_proiezione_sala_inizio',)),
+	("Proiezioni per data", query_frequenti.PROIEZIONI_PER_DATA,
+	 {'data': _GIORNO},
+	 'p', ('idx_proiezione_data',)),
+	("Film per genere",
+	 "SELECT ID_Film FROM FILM WHERE Genere = 'Commedia'",
+	 {}, 'FILM', ('idx_film_genere',)),
+	("Recensioni film",
+	 "SELECT AVG(r.Valutazione) FROM RECENSIONE r WHERE r.ID_Film = 1",
+	 {}, 'r', ('idx_recensione_film',)),
+	("Incassi giornalieri",
+	 "SELECT i.Data, SUM(i.Biglietti) FROM INCASSO_GIORNALIERO i "
+	 "WHERE i.Stato IN ('Valido', 'Utilizzato') AND i.Data BETWEEN '2024-01-01' AND '2024-01-31' GROUP BY i.Data",
+	 {}, 'i', ('PRIMARY',)),
+	("Film popolari",
+	 "SELECT s.ID_Film FROM STATISTICHE_FILM s ORDER BY s.Biglietti_Venduti DESC LIMIT 10",
+	 {}, 's', ('idx_statistiche_biglietti',)),
+	("Blocchi scaduti",
+	 "SELECT ID_Posto FROM BLOCCO_POSTO WHERE Scadenza <= '2024-01-01 00:00:00'",
+	 {}, 'BLOCCO_POSTO', ('idx_blocco_scadenza',)),
+]
+
+def versione_corrente(conn) -> int:
+	return conn.execute(text("SELECT COALESCE(MAX(Versione), 0) FROM VERSIONE_SCHEMA")).scalar()
+
+def applica_migrazioni(engine) -> List[int]:
+	"""Applica in ordine i passi non ancora registrati; restituisce le versioni applicate"""
+	applicate = []
+	with engine.connect() as conn:
+		# un solo processo alla volta esegue le migrazioni
+		if not conn.execute(text("SELECT GET_LOCK('cinema_migrazioni', 60)")).scalar():
+			raise RuntimeError("Impossibile ottenere il lock delle migrazioni")
+		try:
+			corrente = versione_corrente(conn)
+			for versione, descrizione, passo in MIGRAZIONI:
+				if versione <= corrente:
+					continue
+				logger.info(f"Migrazione {versione}: {descrizione}")
+				passo(conn)
+				conn.execute(
+					text("INSERT INTO VERSIONE_SCHEMA (Versione, Descrizione, Applicata_Il) VALUES (:v, :d, NOW())"),
+					{'v': versione, 'd': descrizione}
+				)
+				conn.commit()
+				applicate.append(versione)
+		finally:
+			conn.execute(text("SELECT RELEASE_LOCK('cinema_migrazioni')"))
+			conn.commit()
+	return applicate
+
+def verifica_piani(engine) -> List[dict]:
+	"""Esegue EXPLAIN sulle query frequenti e segnala quelle che non usano l'indice previsto.
+
+	Su tabelle quasi vuote l'ottimizzatore può preferire una scansione completa:
+	il controllo è significativo su un database popolato.
+	"""
+	esiti = []
+	with engine.connect() as conn:
+		for descrizione, query, parametri, tabella, indici in CONTROLLI_EXPLAIN:
+			piano = [dict(row._mapping) for row in conn.execute(text(f"EXPLAIN {query}"), parametri)]
+			riga = next((r for r in piano if r.get('table') == tabella), {})
+			esiti.append({
+				'Query': descrizione,
+				'Indice': riga.get('key'),
+				'Tipo': riga.get('type'),
+				'OK': riga.get('key') in indici
+			})
+	return esiti
+
+if __name__ == "__main__":
+	from tabulate import tabulate
+
+	from database import db_manager, init_database
+
+	init_database()
+	with db_manager.engine.connect() as conn:
+		print(f"Versione schema: {versione_corrente(conn)}")
+	esiti = verifica_piani(db_manager.engine)
+	print(tabulate(
+		[[e['Query'], e['Indice'], e['Tipo'], "OK" if e['OK'] else "NO"] for e in esiti],
+		headers=["Query", "Indice usato", "Accesso", "Esito"], tablefmt='grid'
+	))
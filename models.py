@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, Text, Date, Time, DateTime, DECIMAL, Enum, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, Date, Time, DateTime, DECIMAL, Enum, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
+from sqlalchemy import event
 from sqlalchemy.sql import func
-from datetime import datetime, date, time
+from datetime import datetime, date, time, timedelta
 
 Base = declarative_base()
 
@@ -55,9 +56,12 @@ class Film(Base):
 	Anno_Uscita = Column(Integer)
 	ID_Regista = Column(Integer, ForeignKey('REGISTA.ID_Regista'), nullable=False)
 
+	__table_args__ = (Index('idx_film_genere', 'Genere'),)
+
 	regista = relationship("Regista", back_populates="film")
 	proiezioni = relationship("Proiezione", back_populates="film")
 	recensioni = relationship("Recensione", back_populates="film")
+	statistiche = relationship("StatisticheFilm", back_populates="film", uselist=False, cascade="all, delete-orphan")
 
 	def __repr__(self):
 		return f"<Film(id={self.ID_Film}, titolo='{self.Titolo}', anno={self.Anno_Uscita})>"
@@ -152,18 +156,36 @@ class Proiezione(Base):
 	ID_Sala = Column(Integer, ForeignKey('SALA.ID_Sala'), nullable=False)
 	ID_Operatore = Column(Integer, ForeignKey('OPERATORE.ID_Operatore'), nullable=False)
 	ID_Tariffa = Column(Integer, ForeignKey('TARIFFA.ID_Tariffa'), nullable=False)
+	# Inizio/Fine come datetime (Fine può cadere il giorno dopo), derivati da Data e Ora_*
+	Inizio = Column(DateTime)
+	Fine = Column(DateTime)
 
-	__table_args__ = (UniqueConstraint('ID_Sala', 'Data', 'Ora_Inizio', name='unique_sala_orario'),)
+	__table_args__ = (
+		UniqueConstraint('ID_Sala', 'Data', 'Ora_Inizio', name='unique_sala_orario'),
+		Index('idx_proiezione_data', 'Data', 'Ora_Inizio'),
+		Index('idx_proiezione_sala_inizio', 'ID_Sala', 'Inizio', 'Fine'),
+	)
 
 	film = relationship("Film", back_populates="proiezioni")
 	sala = relationship("Sala", back_populates="proiezioni")
 	operatore = relationship("Operatore", back_populates="proiezioni")
 	tariffa = relationship("Tariffa", back_populates="proiezioni")
 	biglietti = relationship("Biglietto", back_populates="proiezione")
+	blocchi = relationship("BloccoPosto", back_populates="proiezione", cascade="all, delete-orphan")
 
 	def __repr__(self):
 		return f"<Proiezione(id={self.ID_Proiezione}, data={self.Data}, ora={self.Ora_Inizio})>"
 
+@event.listens_for(Proiezione, 'before_insert')
+@event.listens_for(Proiezione, 'before_update')
+def _sincronizza_intervallo(mapper, connection, proiezione):
+	if proiezione.Data is None or proiezione.Ora_Inizio is None or proiezione.Ora_Fine is None:
+		return
+	proiezione.Inizio = datetime.combine(proiezione.Data, proiezione.Ora_Inizio)
+	proiezione.Fine = datetime.combine(proiezione.Data, proiezione.Ora_Fine)
+	if proiezione.Fine <= proiezione.Inizio:
+		proiezione.Fine += timedelta(days=1)
+
 class Promozione(Base):
 	__tablename__ = 'PROMOZIONE'
 
@@ -193,7 +215,13 @@ class Biglietto(Base):
 	ID_Promozione = Column(Integer, ForeignKey('PROMOZIONE.ID_Promozione'), nullable=True)
 	ID_Posto = Column(Integer, ForeignKey('POSTO.ID_Posto'), nullable=False)
 
-	__table_args__ = (UniqueConstraint('ID_Posto', 'ID_Proiezione', name='unique_posto_proiezione'),)
+	__table_args__ = (
+		UniqueConstraint('ID_Posto', 'ID_Proiezione', name='unique_posto_proiezione'),
+		# coprente per la mappa posti e per il conteggio dei posti venduti
+		Index('idx_biglietto_proiezione_stato', 'ID_Proiezione', 'Stato', 'ID_Posto'),
+		Index('idx_biglietto_cliente', 'ID_Cliente'),
+		Index('idx_biglietto_emissione', 'Data_Emissione'),
+	)
 
 	proiezione = relationship("Proiezione", back_populates="biglietti")
 	cliente = relationship("Cliente", back_populates="biglietti")
@@ -203,6 +231,49 @@ class Biglietto(Base):
 	def __repr__(self):
 		return f"<Biglietto(id={self.ID_Biglietto}, prezzo={self.Prezzo_Applicato}, stato='{self.Stato}')>"
 
+class BloccoPosto(Base):
+	__tablename__ = 'BLOCCO_POSTO'
+
+	ID_Proiezione = Column(Integer, ForeignKey('PROIEZIONE.ID_Proiezione'), primary_key=True)
+	ID_Posto = Column(Integer, ForeignKey('POSTO.ID_Posto'), primary_key=True)
+	Token = Column(String(32), nullable=False)
+	Scadenza = Column(DateTime, nullable=False)
+
+	__table_args__ = (Index('idx_blocco_scadenza', 'Scadenza'),)
+
+	proiezione = relationship("Proiezione", back_populates="blocchi")
+
+	def __repr__(self):
+		return f"<BloccoPosto(proiezione_id={self.ID_Proiezione}, posto_id={self.ID_Posto}, scadenza={self.Scadenza})>"
+
+class IncassoGiornaliero(Base):
+	__tablename__ = 'INCASSO_GIORNALIERO'
+
+	Data = Column(Date, primary_key=True)
+	Stato = Column(Enum('Valido', 'Utilizzato', 'Annullato'), primary_key=True)
+	Slot = Column(Integer, primary_key=True, default=0)
+	Biglietti = Column(Integer, nullable=False, default=0)
+	Incasso = Column(DECIMAL(12,2), nullable=False, default=0)
+
+	def __repr__(self):
+		return f"<IncassoGiornaliero(data={self.Data}, stato='{self.Stato}', biglietti={self.Biglietti})>"
+
+class StatisticheFilm(Base):
+	__tablename__ = 'STATISTICHE_FILM'
+
+	ID_Film = Column(Integer, ForeignKey('FILM.ID_Film'), primary_key=True)
+	Biglietti_Venduti = Column(Integer, nullable=False, default=0)
+	Incasso = Column(DECIMAL(12,2), nullable=False, default=0)
+	Numero_Recensioni = Column(Integer, nullable=False, default=0)
+	Somma_Valutazioni = Column(Integer, nullable=False, default=0)
+
+	__table_args__ = (Index('idx_statistiche_biglietti', 'Biglietti_Venduti'),)
+
+	film = relationship("Film", back_populates="statistiche")
+
+	def __repr__(self):
+		return f"<StatisticheFilm(film_id={self.ID_Film}, biglietti={self.Biglietti_Venduti})>"
+
 class Recensione(Base):
 	__tablename__ = 'RECENSIONE'
 
@@ -213,7 +284,10 @@ class Recensione(Base):
 	ID_Cliente = Column(Integer, ForeignKey('CLIENTE.ID_Cliente'), nullable=False)
 	ID_Film = Column(Integer, ForeignKey('FILM.ID_Film'), nullable=False)
 
-	__table_args__ = (UniqueConstraint('ID_Cliente', 'ID_Film', name='unique_cliente_film'),)
+	__table_args__ = (
+		UniqueConstraint('ID_Cliente', 'ID_Film', name='unique_cliente_film'),
+		Index('idx_recensione_film', 'ID_Film', 'Valutazione'),
+	)
 
 	cliente = relationship("Cliente", back_populates="recensioni")
 	film = relationship("Film", back_populates="recensioni")
@@ -221,6 +295,16 @@ class Recensione(Base):
 	def __repr__(self):
 		return f"<Recensione(id={self.ID_Recensione}, valutazione={self.Valutazione}/10)>"
 
+class VersioneSchema(Base):
+	__tablename__ = 'VERSIONE_SCHEMA'
+
+	Versione = Column(Integer, primary_key=True, autoincrement=False)
+	Descrizione = Column(String(200), nullable=False)
+	Applicata_Il = Column(DateTime, default=func.current_timestamp())
+
+	def __repr__(self):
+		return f"<VersioneSchema(versione={self.Versione}, descrizione='{self.Descrizione}')>"
+
 class Supporta(Base):
 	__tablename__ = 'SUPPORTA'
 
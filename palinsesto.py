@@ -0,0 +1,135 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import AppConfig
+from schedule_index import ScheduleIndex, finestra_apertura
+
+# a parità di richieste i giorni extra vanno prima nel fine settimana (venerdì, sabato, domenica)
+_PREFERENZA_GIORNI = (4, 5, 6, 3, 2, 1, 0)
+
+def ripartisci(totale: int, giorni: List[date]) -> Dict[date, int]:
+	"""Distribuisce `totale` proiezioni sui giorni, il più uniformemente possibile"""
+	base, extra = divmod(totale, len(giorni))
+	quote = {g: base for g in giorni}
+	preferiti = sorted(giorni, key=lambda g: (_PREFERENZA_GIORNI.index(g.weekday()), g))
+	for g in preferiti[:extra]:
+		quote[g] += 1
+	return quote
+
+def _arrotonda(istante: datetime, minuti: int) -> datetime:
+	if minuti <= 1:
+		return istante
+	resto = (istante.minute % minuti) * 60 + istante.second
+	if not resto and not istante.microsecond:
+		return istante
+	return istante.replace(second=0, microsecond=0) + timedelta(minutes=minuti - istante.minute % minuti)
+
+class PianificatoreSettimanale:
+	"""Riempie le sale attive con le proiezioni richieste, in modo greedy e tutto in memoria.
+
+	Ogni film ha un numero di proiezioni da fare nel periodo, ripartite per giorno. Giorno
+	per giorno i film vengono piazzati a turno (prima i più lunghi), ciascuno nella sala
+	che lo può iniziare prima, lasciando `pausa` per la pulizia fra due proiezioni e
+	rispettando le proiezioni già presenti. L'operatore è quello in turno per tutta la
+	proiezione, non impegnato in un'altra sala nello stesso orario, con meno minuti già
+	assegnati. Le richieste che non trovano posto sono restituite con il motivo, non
+	sollevano eccezioni.
+	"""
+
+	def __init__(self, sale: Dict[int, int], durate: Dict[int, int],
+				 turni: Dict[int, List[Tuple[datetime, datetime]]], pausa: timedelta,
+				 arrotondamento: int = AppConfig.ARROTONDAMENTO_INIZIO):
+		# sale: ID_Sala -> Capienza; durate: ID_Film -> minuti; turni: ID_Operatore -> intervalli
+		self.sale = sorted(sale, key=lambda s: (-sale[s], s))
+		self.durate = durate
+		self.turni = turni
+		self.pausa = pausa
+		self.arrotondamento = arrotondamento
+		self._indice = ScheduleIndex(ttl=0)
+		self._carico = {operatore_id: 0 for operatore_id in turni}
+		self._impegni = {operatore_id: [] for operatore_id in turni}
+		self._prossimo_id = -1
+
+	def occupa(self, data_inizio: date, data_fine: date, righe: Iterable,
+			   impegni: Iterable = ()) -> None:
+		"""Proiezioni esistenti (ID_Proiezione, ID_Sala, ID_Film, Data, Ora_Inizio, Ora_Fine)
+		e, in `impegni`, i loro operatori (ID_Operatore, Inizio, Fine)"""
+		self._indice.install(data_inizio, data_fine, righe)
+		for operatore_id, inizio, fine in impegni:
+			if operatore_id in self._impegni:
+				self._impegni[operatore_id].append((inizio, fine))
+
+	def pianifica(self, giorni: List[date], richieste: Dict[int, int]) -> Tuple[List[Dict], List[Dict]]:
+		"""Restituisce (proiezioni proposte, richieste non piazzate)"""
+		proposte, non_piazzate = [], []
+		quote = {film_id: ripartisci(numero, giorni) for film_id, numero in richieste.items()}
+		# i film più lunghi per primi: i buchi rimasti alla fine li riempiono i più corti
+		ordine = sorted(richieste, key=lambda f: (-self.durate[f], f))
+
+		for giorno in giorni:
+			apertura, chiusura = finestra_apertura(giorno)
+			rimaste = {film_id: quote[film_id][giorno] for film_id in ordine}
+			while any(rimaste.values()):
+				for film_id in ordine:
+					if not rimaste[film_id]:
+						continue
+					rimaste[film_id] -= 1
+					esito = self._piazza(film_id, apertura, chiusura)
+					if isinstance(esito, str):
+						non_piazzate.append({'ID_Film': film_id, 'Data': giorno, 'Motivo': esito})
+					else:
+						proposte.append(esito)
+		return proposte, non_piazzate
+
+	def _piazza(self, film_id: int, apertura: datetime, chiusura: datetime):
+		durata = timedelta(minutes=self.durate[film_id])
+		candidati = []
+		for sala_id in self.sale:
+			inizio = self._primo_inizio(sala_id, apertura, durata, chiusura)
+			if inizio is not None:
+				candidati.append((inizio, sala_id))
+		if not candidati:
+			return "Nessuna sala libera"
+		# a parità di orario vince la sala più capiente (ordine di self.sale)
+		candidati.sort(key=lambda c: c[0])
+		for inizio, sala_id in candidati:
+			fine = inizio + durata
+			operatore_id = self._operatore(inizio, fine)
+			if operatore_id is None:
+				continue
+			self._indice.aggiungi(self._prossimo_id, sala_id, film_id, inizio, fine)
+			self._prossimo_id -= 1
+			self._carico[operatore_id] += self.durate[film_id]
+			self._impegni[operatore_id].append((inizio, fine))
+			return {
+				'Data': inizio.date(),
+				'Ora_Inizio': inizio.time(),
+				'Ora_Fine': fine.time(),
+				'Inizio': inizio,
+				'Fine': fine,
+				'ID_Film': film_id,
+				'ID_Sala': sala_id,
+				'ID_Operatore': operatore_id
+			}
+		return "Nessun operatore in turno"
+
+	def _primo_inizio(self, sala_id: int, dopo: datetime, durata: timedelta,
+					  entro: datetime) -> Optional[datetime]:
+		while True:
+			inizio = self._indice.primo_libero(sala_id, dopo, durata, entro, self.pausa)
+			if inizio is None:
+				return None
+			arrotondato = _arrotonda(inizio, self.arrotondamento)
+			if arrotondato + durata > entro:
+				return None
+			if arrotondato == inizio or self._indice.libero(sala_id, arrotondato, arrotondato + durata, self.pausa):
+				return arrotondato
+			dopo = arrotondato
+
+	def _operatore(self, inizio: datetime, fine: datetime) -> Optional[int]:
+		in_turno = [operatore_id for operatore_id, turni in self.turni.items()
+					if any(da <= inizio and fine <= a for da, a in turni)
+					and not any(da < fine and inizio < a for da, a in self._impegni[operatore_id])]
+		if not in_turno:
+			return None
+		return min(in_turno, key=lambda o: (self._carico[o], o))
@@ -0,0 +1,126 @@
+import threading
+import time as _time
+from typing import Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+# limiti superiori (ms) delle fasce dell'istogramma delle attese; l'ultima fascia è "oltre"
+FASCE_ATTESA_MS = (1, 5, 20, 100, 500, 1000)
+
+class PoolStats:
+	"""Contatori del pool di connessioni, alimentati dagli eventi di SQLAlchemy.
+
+	Registra quante connessioni vengono prese dal pool, quante ne vengono aperte (e
+	quanto ci mette MySQL ad aprirle), quante vengono scartate da pre-ping o errori, e
+	per ogni checkout quanto si è aspettato: con il pool pieno la richiesta resta in
+	coda fino a SQLALCHEMY_POOL_TIMEOUT secondi. Le attese sono raccolte in fasce fisse
+	(FASCE_ATTESA_MS), così la memoria non cresce con il traffico. Lo stato istantaneo
+	(connessioni in uso, libere, in overflow) viene letto dal pool al momento della
+	richiesta. Servono per dimensionare SQLALCHEMY_POOL_SIZE e MAX_OVERFLOW sul carico
+	di punta.
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self.azzera()
+
+	def azzera(self) -> None:
+		with self._lock:
+			self._checkout = 0
+			self._in_uso_massimo = 0
+			self._connessioni = 0
+			self._invalidate = 0
+			self._attese = [0] * (len(FASCE_ATTESA_MS) + 1)
+			self._attesa_totale = 0.0
+			self._attesa_massima = 0.0
+			self._connessione_totale = 0.0
+			self._connessione_massima = 0.0
+
+	def collega(self, engine) -> None:
+		"""Aggancia i listener all'engine; checkout e attese arrivano solo da un QueuePoolMisurato"""
+		event.listen(engine, 'do_connect', self._inizio_connessione)
+		event.listen(engine.pool, 'connect', self._connessione_aperta)
+		event.listen(engine.pool, 'invalidate', self._connessione_invalidata)
+		engine.pool._statistiche = self
+
+	def registra_checkout(self, secondi: float, in_uso: int) -> None:
+		millisecondi = secondi * 1000
+		fascia = next((i for i, limite in enumerate(FASCE_ATTESA_MS) if millisecondi < limite),
+					  len(FASCE_ATTESA_MS))
+		with self._lock:
+			self._checkout += 1
+			self._in_uso_massimo = max(self._in_uso_massimo, in_uso)
+			self._attese[fascia] += 1
+			self._attesa_totale += secondi
+			self._attesa_massima = max(self._attesa_massima, secondi)
+
+	def statistiche(self, pool) -> Dict:
+		with self._lock:
+			attese = sum(self._attese)
+			dati = {
+				'Dimensione': pool.size(),
+				'In_Uso': pool.checkedout(),
+				'Libere': pool.checkedin(),
+				'Overflow': max(pool.overflow(), 0),
+				'In_Uso_Massimo': self._in_uso_massimo,
+				'Checkout': self._checkout,
+				'Attesa_Media_ms': self._attesa_totale * 1000 / attese if attese else 0.0,
+				'Attesa_Massima_ms': self._attesa_massima * 1000,
+				'Connessioni_Aperte': self._connessioni,
+				'Connessione_Media_ms': (self._connessione_totale * 1000 / self._connessioni
+										 if self._connessioni else 0.0),
+				'Connessione_Massima_ms': self._connessione_massima * 1000,
+				'Invalidate': self._invalidate,
+				'Istogramma_Attese': self._istogramma(),
+			}
+		return dati
+
+	def _istogramma(self) -> List[Dict]:
+		fasce = []
+		inferiore = 0
+		for limite, conteggio in zip(FASCE_ATTESA_MS + (None,), self._attese):
+			fascia = f"{inferiore}-{limite} ms" if limite is not None else f">= {inferiore} ms"
+			fasce.append({'Fascia': fascia, 'Checkout': conteggio})
+			inferiore = limite
+		return fasce
+
+	# ========== LISTENER ==========
+
+	def _inizio_connessione(self, dialect, connection_record, cargs, cparams):
+		connection_record.info['_inizio_connessione'] = _time.perf_counter()
+
+	def _connessione_aperta(self, dbapi_connection, connection_record):
+		inizio = connection_record.info.pop('_inizio_connessione', None)
+		with self._lock:
+			self._connessioni += 1
+			if inizio is not None:
+				durata = _time.perf_counter() - inizio
+				self._connessione_totale += durata
+				self._connessione_massima = max(self._connessione_massima, durata)
+
+	def _connessione_invalidata(self, dbapi_connection, connection_record, exception):
+		with self._lock:
+			self._invalidate += 1
+
+class QueuePoolMisurato(QueuePool):
+	"""QueuePool che misura quanto aspetta ogni checkout, inclusa l'eventuale apertura
+	di una connessione nuova; i tempi vanno al PoolStats collegato"""
+
+	_statistiche: PoolStats = None
+
+	def _do_get(self):
+		inizio = _time.perf_counter()
+		connessione = super()._do_get()
+		if self._statistiche is not None:
+			self._statistiche.registra_checkout(_time.perf_counter() - inizio, self.checkedout())
+		return connessione
+
+	def recreate(self):
+		# dispose() ricrea il pool: le statistiche restano collegate a quello nuovo
+		pool = super().recreate()
+		pool._statistiche = self._statistiche
+		return pool
+
+# Istanza globale: statistiche del pool di db_manager
+pool_stats = PoolStats()
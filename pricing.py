@@ -0,0 +1,155 @@
+import threading
+import time as _time
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable
+
+from sqlalchemy import text, bindparam
+
+from config import AppConfig
+from database import db_manager
+
+GIORNI = ('Lunedi', 'Martedi', 'Mercoledi', 'Giovedi', 'Venerdi', 'Sabato', 'Domenica')
+FASCE = ('Mattina', 'Pomeriggio', 'Sera', 'Notte')
+_CENTESIMO = Decimal('0.01')
+
+def fascia_oraria(ora: time) -> str:
+	"""Fascia oraria di un orario di inizio secondo AppConfig.FASCE_ORARIE"""
+	fascia = AppConfig.FASCE_ORARIE[-1][0]
+	for nome, inizio in AppConfig.FASCE_ORARIE:
+		if ora.hour >= inizio:
+			fascia = nome
+	return fascia
+
+class PricingEngine:
+	"""Listino prezzi compilato in memoria.
+
+	Le tariffe con lo stesso Nome_Tariffa formano una famiglia: per una proiezione vale la
+	variante più specifica che corrisponde al giorno e alla fascia oraria (entrambi,
+	poi solo il giorno, poi solo la fascia), altrimenti il prezzo della tariffa assegnata.
+	Tutte le combinazioni (giorno, fascia, tariffa, promozione attiva) sono precalcolate,
+	quindi un preventivo è una lettura da dizionario. Il listino va invalidato quando
+	cambiano TARIFFA o PROMOZIONE e scade comunque dopo AppConfig.PRICING_TTL secondi
+	o a mezzanotte, quando cambiano le promozioni attive.
+	"""
+
+	def __init__(self, db, ttl: float = AppConfig.PRICING_TTL):
+		self.db = db
+		self.ttl = ttl
+		self._lock = threading.Lock()
+		self._listino: Dict[tuple, float] = {}
+		self._scade_il = 0.0
+		# ID_Proiezione -> (giorno, fascia, ID_Tariffa), svuotata a ogni compilazione
+		self._proiezioni: Dict[int, tuple] = {}
+
+	def quote(self, proiezione_id: int, promozione_id: int = None) -> float:
+		if _time.monotonic() >= self._scade_il:
+			self._compila()
+		chiave = self._proiezioni.get(proiezione_id)
+		if chiave is None:
+			self._carica_proiezioni((proiezione_id,))
+			chiave = self._proiezioni.get(proiezione_id)
+			if chiave is None:
+				raise ValueError("Proiezione non trovata")
+		return self._prezzo(chiave, promozione_id)
+
+	def quote_many(self, proiezione_ids: Iterable[int], promozione_id: int = None) -> Dict[int, float]:
+		"""Prezzi di molte proiezioni (es. la programmazione di un giorno) con al più una query"""
+		proiezione_ids = list(proiezione_ids)
+		if _time.monotonic() >= self._scade_il:
+			self._compila()
+		mancanti = [pid for pid in proiezione_ids if pid not in self._proiezioni]
+		if mancanti:
+			self._carica_proiezioni(mancanti)
+		# chiavi lette prima dei prezzi: _prezzo può ricompilare e svuotare la mappa
+		chiavi = {pid: self._proiezioni.get(pid) for pid in proiezione_ids}
+		return {pid: self._prezzo(chiave, promozione_id) for pid, chiave in chiavi.items() if chiave is not None}
+
+	def _prezzo(self, chiave: tuple, promozione_id: int = None) -> float:
+		prezzo = self._listino.get(chiave + (promozione_id,))
+		if prezzo is not None:
+			return prezzo
+		if chiave + (None,) not in self._listino:
+			# tariffa creata da un altro processo dopo l'ultima compilazione
+			self._compila()
+			if chiave + (None,) not in self._listino:
+				raise ValueError("Tariffa non trovata")
+		# promozione inesistente o non attiva oggi: prezzo pieno
+		return self._listino.get(chiave + (promozione_id,), self._listino[chiave + (None,)])
+
+	def pronto(self, proiezione_id: int) -> bool:
+		"""True se quote() per la proiezione risponde senza leggere dal database"""
+		return _time.monotonic() < self._scade_il and proiezione_id in self._proiezioni
+
+	def invalidate(self) -> None:
+		with self._lock:
+			self._scade_il = 0.0
+			self._proiezioni = {}
+
+	def dimentica_proiezione(self, proiezione_id: int) -> None:
+		self._proiezioni.pop(proiezione_id, None)
+
+	def _compila(self) -> None:
+		oggi = date.today()
+		with self.db.get_session() as session:
+			tariffe = session.execute(text(
+				"SELECT ID_Tariffa, Nome_Tariffa, Prezzo_Base, Fascia_Oraria, Giorno_Settimana FROM TARIFFA"
+			)).fetchall()
+			promozioni = session.execute(
+				text("SELECT ID_Promozione, Percentuale_Sconto FROM PROMOZIONE "
+					 "WHERE Data_Inizio <= :oggi AND Data_Fine >= :oggi"),
+				{'oggi': oggi}
+			).fetchall()
+
+		famiglie = {}
+		for t in tariffe:
+			famiglie.setdefault(t.Nome_Tariffa, []).append(t)
+		sconti = [(None, Decimal(0))] + [(p.ID_Promozione, Decimal(p.Percentuale_Sconto)) for p in promozioni]
+
+		listino = {}
+		for t in tariffe:
+			for giorno in GIORNI:
+				for fascia in FASCE:
+					base = self._variante(famiglie[t.Nome_Tariffa], giorno, fascia, t)
+					for promozione_id, sconto in sconti:
+						prezzo = (base * (1 - sconto / 100)).quantize(_CENTESIMO, ROUND_HALF_UP)
+						listino[(giorno, fascia, t.ID_Tariffa, promozione_id)] = float(prezzo)
+
+		mezzanotte = datetime.combine(oggi + timedelta(days=1), time())
+		durata = min(self.ttl, (mezzanotte - datetime.now()).total_seconds())
+		with self._lock:
+			self._listino = listino
+			self._scade_il = _time.monotonic() + max(durata, 0)
+			# le proiezioni si rileggono a ogni compilazione: la mappa non cresce senza limite
+			# e un ID riusato dopo un reset non conserva giorno, fascia e tariffa della vecchia riga
+			self._proiezioni = {}
+
+	@staticmethod
+	def _variante(famiglia, giorno: str, fascia: str, assegnata) -> Decimal:
+		migliore, punteggio = assegnata, None
+		for t in famiglia:
+			if t.Giorno_Settimana not in (None, giorno) or t.Fascia_Oraria not in (None, fascia):
+				continue
+			# il giorno pesa più della fascia; a parità vince la tariffa assegnata
+			valore = ((2 if t.Giorno_Settimana else 0) + (1 if t.Fascia_Oraria else 0),
+					  t.ID_Tariffa == assegnata.ID_Tariffa)
+			if punteggio is None or valore > punteggio:
+				migliore, punteggio = t, valore
+		return Decimal(migliore.Prezzo_Base)
+
+	def _carica_proiezioni(self, proiezione_ids) -> None:
+		query = text(
+			"SELECT ID_Proiezione, Data, Ora_Inizio, ID_Tariffa FROM PROIEZIONE "
+			"WHERE ID_Proiezione IN :ids"
+		).bindparams(bindparam('ids', expanding=True))
+		with self.db.get_session() as session:
+			righe = session.execute(query, {'ids': list(proiezione_ids)}).fetchall()
+		for r in righe:
+			ora = r.Ora_Inizio
+			if isinstance(ora, timedelta):
+				# PyMySQL restituisce le colonne TIME come timedelta
+				ora = (datetime.min + ora).time()
+			self._proiezioni[r.ID_Proiezione] = (GIORNI[r.Data.weekday()], fascia_oraria(ora), r.ID_Tariffa)
+
+# Istanza globale condivisa da tutte le CinemaOperations del processo
+pricing = PricingEngine(db_manager)
@@ -0,0 +1,83 @@
+"""Testo SQL delle query più frequenti di CinemaOperations.
+
+Sta in un modulo a parte perché migrations.verifica_piani esegue EXPLAIN proprio su
+queste istruzioni: se una query cambia, il controllo del piano cambia con lei.
+I parametri sono quelli dei metodi che le eseguono.
+"""
+
+# _storico_cliente: idx_biglietto_cliente
+STORICO_CLIENTE = """
+SELECT b.ID_Biglietto, f.Titolo, p.Data, p.Ora_Inizio, s.Numero AS Sala,
+	   CONCAT(po.Fila, po.Numero_Posto) AS Posto,
+	   b.Prezzo_Applicato, b.Stato,
+	   pr.Nome AS Promozione
+FROM BIGLIETTO b
+JOIN PROIEZIONE p ON b.ID_Proiezione = p.ID_Proiezione
+JOIN FILM f ON p.ID_Film = f.ID_Film
+JOIN SALA s ON p.ID_Sala = s.ID_Sala
+JOIN POSTO po ON b.ID_Posto = po.ID_Posto
+LEFT JOIN PROMOZIONE pr ON b.ID_Promozione = pr.ID_Promozione
+WHERE b.ID_Cliente = :cliente_id
+ORDER BY p.Data DESC, p.Ora_Inizio DESC
+"""
+
+# _righe_mappa_posti: una sola query, tutti i posti della sala con il flag di occupazione
+# per la proiezione e la scadenza dell'eventuale blocco. Occupa il posto qualunque biglietto,
+# anche annullato o utilizzato: unique_posto_proiezione non ne ammette un secondo
+MAPPA_POSTI = """
+SELECT p.ID_Sala, po.ID_Posto, po.Fila, po.Numero_Posto, po.Stato_Posto,
+	   b.ID_Biglietto IS NOT NULL AS Occupato,
+	   h.Scadenza AS Scadenza_Blocco
+FROM PROIEZIONE p
+JOIN POSTO po ON po.ID_Sala = p.ID_Sala
+LEFT JOIN BIGLIETTO b ON b.ID_Proiezione = p.ID_Proiezione
+	AND b.ID_Posto = po.ID_Posto
+LEFT JOIN BLOCCO_POSTO h ON h.ID_Proiezione = p.ID_Proiezione
+	AND h.ID_Posto = po.ID_Posto AND h.Scadenza > :ora
+WHERE p.ID_Proiezione = :proiezione_id
+ORDER BY po.Fila, po.Numero_Posto
+"""
+
+# _proiezioni_by_data: idx_proiezione_data; come nella mappa posti, ogni biglietto toglie un posto
+PROIEZIONI_PER_DATA = """
+SELECT p.ID_Proiezione, f.Titolo, s.Numero AS Sala,
+	   p.Ora_Inizio, p.Ora_Fine, t.Prezzo_Base,
+	   (s.Capienza - COUNT(b.ID_Biglietto)) AS Posti_Disponibili
+FROM PROIEZIONE p
+JOIN FILM f ON p.ID_Film = f.ID_Film
+JOIN SALA s ON p.ID_Sala = s.ID_Sala
+JOIN TARIFFA t ON p.ID_Tariffa = t.ID_Tariffa
+LEFT JOIN BIGLIETTO b ON p.ID_Proiezione = b.ID_Proiezione
+WHERE p.Data = :data
+GROUP BY p.ID_Proiezione
+HAVING Posti_Disponibili > 0
+ORDER BY p.Ora_Inizio
+"""
+
+# _check_sala_overlap: una sola ricerca per intervallo su idx_proiezione_sala_inizio;
+# il limite inferiore su Inizio (:inizio meno DURATA_MASSIMA_PROIEZIONE) chiude il range.
+# :escludi è la proiezione da ignorare, 0 se nessuna (gli ID partono da 1)
+SOVRAPPOSIZIONE_SALA = """
+SELECT p.ID_Proiezione
+FROM PROIEZIONE p
+WHERE p.ID_Sala = :sala_id AND p.Inizio > :inizio_minimo AND p.Inizio < :fine
+	AND p.Fine > :inizio AND p.ID_Proiezione <> :escludi
+LIMIT 1
+"""
+
+# get_biglietti: {filtro} è la clausola WHERE costruita dai filtri richiesti
+BIGLIETTI = """
+SELECT b.ID_Biglietto, b.Stato, b.Prezzo_Applicato, b.Data_Emissione,
+	   b.ID_Cliente, c.Nome, c.Cognome,
+	   b.ID_Proiezione, f.Titolo, p.Data, p.Ora_Inizio, s.Numero AS Sala,
+	   CONCAT(po.Fila, po.Numero_Posto) AS Posto
+FROM BIGLIETTO b
+JOIN CLIENTE c ON b.ID_Cliente = c.ID_Cliente
+JOIN PROIEZIONE p ON b.ID_Proiezione = p.ID_Proiezione
+JOIN FILM f ON p.ID_Film = f.ID_Film
+JOIN SALA s ON p.ID_Sala = s.ID_Sala
+JOIN POSTO po ON b.ID_Posto = po.ID_Posto
+{filtro}
+ORDER BY b.ID_Biglietto DESC
+LIMIT :limite
+"""
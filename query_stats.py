@@ -0,0 +1,303 @@
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import queue
+import re
+import threading
+import time as _time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+from config import AppConfig
+
+logger = logging.getLogger(__name__)
+
+# limiti superiori (ms) delle fasce degli istogrammi di latenza; l'ultima fascia è "oltre"
+FASCE_LATENZA_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+# solo questi statement hanno un EXPLAIN utile e non modificano nulla quando vengono spiegati
+_SPIEGABILI = ('SELECT', 'UPDATE', 'DELETE')
+_ALTRE_QUERY = "(altre query)"
+
+# liste IN espanse e INSERT a più righe: stesso statement, numero di parametri diverso
+_SEGNAPOSTO = r'(?:%(?:\(\w+\))?s|\?)'
+_LISTA_PARAMETRI = re.compile(rf'\((?:\s*{_SEGNAPOSTO}\s*,)+\s*{_SEGNAPOSTO}\s*\)')
+_RIGHE_VALUES = re.compile(r'(VALUES\s*\([^()]*\))(?:\s*,\s*\([^()]*\))+', re.IGNORECASE)
+_SPAZI = re.compile(r'\s+')
+
+# chiamata di CinemaOperations in corso nel thread (o task) corrente
+_chiamata = contextvars.ContextVar('chiamata_cinema_operations', default=None)
+
+@functools.lru_cache(maxsize=2048)
+def _normalizza(statement: str) -> str:
+	statement = _SPAZI.sub(' ', statement).strip()
+	statement = _LISTA_PARAMETRI.sub('(...)', statement)
+	return _RIGHE_VALUES.sub(r'\1, ...', statement)
+
+class _Misure:
+
+	__slots__ = ('chiamate', 'errori', 'totale', 'massimo', 'righe', 'query', 'fasce')
+
+	def __init__(self):
+		self.chiamate = 0
+		self.errori = 0
+		self.totale = 0.0
+		self.massimo = 0.0
+		self.righe = 0
+		self.query = 0
+		self.fasce = [0] * (len(FASCE_LATENZA_MS) + 1)
+
+	def registra(self, secondi: float, righe: int, query: int = 1) -> None:
+		millisecondi = secondi * 1000
+		self.fasce[next((i for i, limite in enumerate(FASCE_LATENZA_MS) if millisecondi < limite),
+						len(FASCE_LATENZA_MS))] += 1
+		self.chiamate += 1
+		self.totale += secondi
+		self.massimo = max(self.massimo, secondi)
+		self.righe += righe
+		self.query += query
+
+	def percentile(self, quota: float) -> float:
+		"""Limite superiore (ms) della fascia che contiene il percentile; nell'ultima, il massimo"""
+		soglia = quota * self.chiamate
+		cumulati = 0
+		for limite, conteggio in zip(FASCE_LATENZA_MS, self.fasce):
+			cumulati += conteggio
+			if conteggio and cumulati >= soglia:
+				return float(limite)
+		return self.massimo * 1000
+
+	def dati(self) -> Dict:
+		return {
+			'Chiamate': self.chiamate,
+			'Errori': self.errori,
+			'Totale_ms': self.totale * 1000,
+			'Media_ms': self.totale * 1000 / self.chiamate if self.chiamate else 0.0,
+			'P50_ms': self.percentile(0.50),
+			'P95_ms': self.percentile(0.95),
+			'P99_ms': self.percentile(0.99),
+			'Massimo_ms': self.massimo * 1000,
+			'Righe': self.righe,
+			'Query': self.query,
+		}
+
+class _Chiamata:
+
+	__slots__ = ('metodo', 'query', 'righe')
+
+	def __init__(self, metodo: str):
+		self.metodo = metodo
+		self.query = 0
+		self.righe = 0
+
+class QueryStats:
+	"""Latenze delle query e dei metodi di CinemaOperations, con registro delle query lente.
+
+	I listener before/after_cursor_execute dell'engine misurano ogni statement:
+	chiamate, righe e istogramma di latenza a fasce fisse (FASCE_LATENZA_MS), per
+	statement normalizzato (le liste IN espanse e le INSERT a più righe contano come
+	uno). Le classi decorate con misura_metodi registrano lo stesso per ogni metodo
+	pubblico, con il numero di query eseguite; le query lanciate dentro un metodo gli
+	vengono attribuite. Gli statement oltre AppConfig.SLOW_QUERY_SOGLIA_MS vengono scritti
+	in AppConfig.SLOW_QUERY_LOG (JSON lines) con parametri, metodo ed EXPLAIN, e gli
+	ultimi restano in memoria per il menu amministrazione. EXPLAIN e scrittura li fa un
+	thread a parte su un'altra connessione del pool, fuori dalla transazione del chiamante.
+	Disattivata (attiva = False) ogni listener esce alla prima riga.
+	"""
+
+	def __init__(self, attiva: bool = AppConfig.QUERY_STATS_ATTIVE,
+				 soglia_ms: float = AppConfig.SLOW_QUERY_SOGLIA_MS,
+				 percorso: Optional[str] = AppConfig.SLOW_QUERY_LOG):
+		self.attiva = attiva
+		self.soglia = soglia_ms / 1000
+		self.percorso = percorso
+		self._lock = threading.Lock()
+		self._lock_registro = threading.Lock()
+		# query lente in attesa di EXPLAIN e registrazione; piena, si registra senza piano
+		self._coda = queue.Queue(maxsize=AppConfig.SLOW_QUERY_MEMORIA)
+		self._registratore = None
+		self.azzera()
+
+	def azzera(self) -> None:
+		with self._lock:
+			self._query: Dict[str, _Misure] = {}
+			self._metodi: Dict[str, _Misure] = {}
+			self._lente = deque(maxlen=AppConfig.SLOW_QUERY_MEMORIA)
+
+	def collega(self, engine) -> None:
+		"""Aggancia i listener a un engine sincrono (per AsyncEngine: engine.sync_engine)"""
+		event.listen(engine, 'before_cursor_execute', self._prima_della_query)
+		event.listen(engine, 'after_cursor_execute', self._dopo_la_query)
+		event.listen(engine, 'handle_error', self._errore_query)
+
+	def riepilogo(self, limite: int = 20, ordina: str = 'Totale_ms') -> Dict:
+		"""Statement e metodi più costosi (per ordina), più le ultime query lente"""
+		with self._lock:
+			query = [{'Statement': s, **m.dati()} for s, m in self._query.items()]
+			metodi = [{'Metodo': n, **m.dati()} for n, m in self._metodi.items()]
+			lente = list(self._lente)
+		query.sort(key=lambda r: r[ordina], reverse=True)
+		metodi.sort(key=lambda r: r[ordina], reverse=True)
+		return {'Query': query[:limite], 'Metodi': metodi[:limite], 'Lente': lente[::-1]}
+
+	def registra_metodo(self, metodo: str, secondi: float, query: int, righe: int, errore: bool) -> None:
+		with self._lock:
+			misure = self._metodi.get(metodo)
+			if misure is None:
+				misure = self._metodi[metodo] = _Misure()
+			misure.registra(secondi, righe, query)
+			misure.errori += errore
+
+	# ========== LISTENER ==========
+
+	def _prima_della_query(self, conn, cursor, statement, parameters, context, executemany):
+		if self.attiva and context is not None:
+			context._query_inizio = _time.perf_counter()
+
+	def _dopo_la_query(self, conn, cursor, statement, parameters, context, executemany):
+		inizio = getattr(context, '_query_inizio', None)
+		if inizio is None:
+			return
+		durata = _time.perf_counter() - inizio
+		context._query_inizio = None
+		streaming = context.execution_options.get('stream_results', False)
+		righe = cursor.rowcount if not streaming and 0 <= cursor.rowcount < 2 ** 63 else 0
+		chiamata = _chiamata.get()
+		if chiamata is not None:
+			chiamata.query += 1
+			chiamata.righe += righe
+
+		with self._lock:
+			misure = self._misure_query(statement)
+			misure.registra(durata, righe)
+		if durata >= self.soglia:
+			self._query_lenta(conn, statement, parameters, executemany, durata, righe,
+							  chiamata.metodo if chiamata is not None else None)
+
+	def _errore_query(self, contesto_errore):
+		if not self.attiva or contesto_errore.statement is None:
+			return
+		with self._lock:
+			self._misure_query(contesto_errore.statement).errori += 1
+
+	def _misure_query(self, statement: str) -> _Misure:
+		chiave = _normalizza(statement)
+		misure = self._query.get(chiave)
+		if misure is None:
+			if len(self._query) >= AppConfig.QUERY_STATS_MAX_STATEMENT:
+				chiave = _ALTRE_QUERY
+				misure = self._query.get(chiave)
+			if misure is None:
+				misure = self._query[chiave] = _Misure()
+		return misure
+
+	def _query_lenta(self, conn, statement, parameters, executemany, durata, righe, metodo):
+		voce = {
+			'Quando': datetime.now().isoformat(timespec='seconds'),
+			'Durata_ms': round(durata * 1000, 2),
+			'Metodo': metodo,
+			'Righe': righe,
+			'Statement': statement,
+			'Parametri': f"{len(parameters)} righe" if executemany else parameters,
+			'Explain': None,
+		}
+		# le connessioni dei driver async si usano solo dal loro event loop
+		spiegabile = (not executemany and not conn.dialect.is_async
+					  and statement.lstrip().upper().startswith(_SPIEGABILI))
+		self._avvia_registratore()
+		try:
+			self._coda.put_nowait((voce, conn.engine if spiegabile else None, parameters))
+		except queue.Full:
+			self._registra(voce)
+
+	def _avvia_registratore(self) -> None:
+		if self._registratore is not None:
+			return
+		with self._lock:
+			if self._registratore is None:
+				self._registratore = threading.Thread(target=self._registra_lente, name="query-lente", daemon=True)
+				self._registratore.start()
+
+	def _registra_lente(self) -> None:
+		while True:
+			voce, engine, parameters = self._coda.get()
+			if engine is not None:
+				voce['Explain'] = self._explain(engine, voce['Statement'], parameters)
+			self._registra(voce)
+
+	def _registra(self, voce: Dict) -> None:
+		with self._lock:
+			self._lente.append(voce)
+		if self.percorso:
+			try:
+				with self._lock_registro, open(self.percorso, 'a', encoding='utf-8') as registro:
+					registro.write(json.dumps(voce, default=str, ensure_ascii=False))
+					registro.write('\n')
+			except OSError as e:
+				logger.error(f"Registro delle query lente non scrivibile: {e}")
+
+	@staticmethod
+	def _explain(engine, statement, parameters) -> List[Dict]:
+		# connessione a parte presa dal pool: la transazione del chiamante non vede query
+		# in più e i suoi lock non si allungano. Il cursore grezzo non passa dai listener,
+		# così l'EXPLAIN non viene a sua volta misurato
+		try:
+			connessione = engine.raw_connection()
+			try:
+				cursore = connessione.cursor()
+				try:
+					cursore.execute(f"EXPLAIN {statement}", parameters)
+					colonne = [c[0] for c in cursore.description]
+					return [dict(zip(colonne, riga)) for riga in cursore.fetchall()]
+				finally:
+					cursore.close()
+			finally:
+				connessione.close()
+		except Exception as e:
+			return [{'Errore': str(e)}]
+
+def non_misurato(funzione):
+	"""Esclude un metodo da misura_metodi: serve per quelli che restituiscono un iteratore
+	(iter_*), il cui lavoro avviene dopo il ritorno, mentre il chiamante lo consuma"""
+	funzione._non_misurato = True
+	return funzione
+
+def misura_metodi(cls):
+	"""Decoratore di classe: ogni metodo pubblico registra latenza, query e righe in query_stats.
+
+	Le chiamate annidate (un metodo pubblico che ne usa un altro) contano solo come la
+	più esterna. Sono esclusi i generatori e i metodi marcati con non_misurato.
+	"""
+	for nome, funzione in list(vars(cls).items()):
+		if (nome.startswith('_') or not inspect.isfunction(funzione) or inspect.isgeneratorfunction(funzione)
+				or getattr(funzione, '_non_misurato', False)):
+			continue
+		setattr(cls, nome, _metodo_misurato(f"{cls.__name__}.{nome}", funzione))
+	return cls
+
+def _metodo_misurato(metodo: str, funzione):
+	@functools.wraps(funzione)
+	def misurato(*args, **kwargs):
+		if not query_stats.attiva or _chiamata.get() is not None:
+			return funzione(*args, **kwargs)
+		chiamata = _Chiamata(metodo)
+		token = _chiamata.set(chiamata)
+		errore = False
+		inizio = _time.perf_counter()
+		try:
+			return funzione(*args, **kwargs)
+		except Exception:
+			errore = True
+			raise
+		finally:
+			durata = _time.perf_counter() - inizio
+			_chiamata.reset(token)
+			query_stats.registra_metodo(metodo, durata, chiamata.query, chiamata.righe, errore)
+	return misurato
+
+# Istanza globale: statistiche delle query di tutti gli engine collegati
+query_stats = QueryStats()
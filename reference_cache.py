@@ -0,0 +1,114 @@
+import threading
+import time as _time
+from typing import Dict, List, Optional, Tuple
+
+from config import AppConfig
+
+class _Tabella:
+
+	__slots__ = ('righe', 'caricato_il')
+
+	def __init__(self, righe: Optional[Dict[int, Dict]]):
+		# None: la tabella supera la dimensione massima e non viene tenuta in memoria
+		self.righe = righe
+		self.caricato_il = _time.monotonic()
+
+class ReferenceCache:
+	"""Tabelle di riferimento (tariffe, sale, operatori, tecnologie) tenute in memoria.
+
+	Ogni tabella è un dizionario chiave primaria -> riga, caricato per intero alla prima
+	lettura: elenchi e ricerche per ID non vanno più sul database finché la tabella non
+	scade (AppConfig.REFERENCE_CACHE_TTL) o viene invalidata dai metodi create/delete di
+	CinemaOperations. Una tabella con più di AppConfig.REFERENCE_CACHE_MAX_RIGHE righe
+	non viene tenuta: per il TTL le letture vanno direttamente sul database.
+	Colpi e mancati sono contati per tabella.
+	"""
+
+	def __init__(self, ttl: float = AppConfig.REFERENCE_CACHE_TTL,
+				 massimo: int = AppConfig.REFERENCE_CACHE_MAX_RIGHE):
+		self.ttl = ttl
+		self.massimo = massimo
+		self._lock = threading.Lock()
+		self._tabelle: Dict[str, _Tabella] = {}
+		self._colpi: Dict[str, int] = {}
+		self._mancati: Dict[str, int] = {}
+
+	def righe(self, tabella: str) -> Optional[List[Dict]]:
+		"""Copia delle righe in ordine di chiave; None se la tabella va letta dal database"""
+		with self._lock:
+			voce = self._valida(tabella)
+			if voce is None or voce.righe is None:
+				self._conta(self._mancati, tabella)
+				return None
+			self._conta(self._colpi, tabella)
+			return [dict(riga) for riga in voce.righe.values()]
+
+	def riga(self, tabella: str, chiave: int) -> Tuple[bool, Optional[Dict]]:
+		"""(valida, riga): con valida False la risposta va cercata sul database"""
+		with self._lock:
+			voce = self._valida(tabella)
+			if voce is None or voce.righe is None:
+				self._conta(self._mancati, tabella)
+				return False, None
+			self._conta(self._colpi, tabella)
+			riga = voce.righe.get(chiave)
+			return True, dict(riga) if riga is not None else None
+
+	def cerca(self, tabella: str, chiavi) -> Optional[Dict[int, Dict]]:
+		"""Copie delle righe con quelle chiavi (le inesistenti sono omesse); None se la
+		tabella va letta dal database"""
+		with self._lock:
+			voce = self._valida(tabella)
+			if voce is None or voce.righe is None:
+				self._conta(self._mancati, tabella)
+				return None
+			self._conta(self._colpi, tabella)
+			return {chiave: dict(voce.righe[chiave]) for chiave in chiavi if chiave in voce.righe}
+
+	def caricabile(self, tabella: str) -> bool:
+		"""False se la tabella è risultata troppo grande e il TTL non è ancora scaduto"""
+		with self._lock:
+			voce = self._valida(tabella)
+			return voce is None or voce.righe is not None
+
+	def install(self, tabella: str, righe: Dict[int, Dict]) -> bool:
+		"""Memorizza la tabella (chiave -> riga); False se supera la dimensione massima"""
+		entra = len(righe) <= self.massimo
+		with self._lock:
+			self._tabelle[tabella] = _Tabella(dict(sorted(righe.items())) if entra else None)
+		return entra
+
+	def invalidate(self, tabella: str = None) -> None:
+		with self._lock:
+			if tabella is None:
+				self._tabelle.clear()
+			else:
+				self._tabelle.pop(tabella, None)
+
+	def statistiche(self) -> Dict[str, Dict]:
+		"""Per tabella: colpi, mancati e righe in memoria (None se non caricata o troppo grande)"""
+		with self._lock:
+			nomi = sorted(set(self._colpi) | set(self._mancati) | set(self._tabelle))
+			return {
+				nome: {
+					'Colpi': self._colpi.get(nome, 0),
+					'Mancati': self._mancati.get(nome, 0),
+					'Righe': len(self._tabelle[nome].righe)
+						if nome in self._tabelle and self._tabelle[nome].righe is not None else None
+				}
+				for nome in nomi
+			}
+
+	def _valida(self, tabella: str) -> Optional[_Tabella]:
+		voce = self._tabelle.get(tabella)
+		if voce is not None and self.ttl and _time.monotonic() - voce.caricato_il > self.ttl:
+			del self._tabelle[tabella]
+			return None
+		return voce
+
+	@staticmethod
+	def _conta(contatori: Dict[str, int], tabella: str) -> None:
+		contatori[tabella] = contatori.get(tabella, 0) + 1
+
+# Istanza globale condivisa da tutte le CinemaOperations del processo
+reference_cache = ReferenceCache()
@@ -0,0 +1,158 @@
+import threading
+import time as _time
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from config import AppConfig
+
+_ZERO = timedelta(0)
+
+def intervallo_proiezione(data: date, ora_inizio: time, ora_fine: time) -> Tuple[datetime, datetime]:
+	"""Inizio e fine come datetime; una fine non successiva all'inizio è il giorno dopo"""
+	inizio = datetime.combine(data, ora_inizio)
+	fine = datetime.combine(data, ora_fine)
+	if fine <= inizio:
+		fine += timedelta(days=1)
+	return inizio, fine
+
+def finestra_apertura(data: date) -> Tuple[datetime, datetime]:
+	"""Orario di apertura del cinema per una giornata (la chiusura può cadere dopo mezzanotte)"""
+	return intervallo_proiezione(data, AppConfig.APERTURA_CINEMA, AppConfig.CHIUSURA_CINEMA)
+
+class _Intervallo:
+
+	__slots__ = ('inizio', 'fine', 'proiezione_id', 'film_id')
+
+	def __init__(self, inizio: datetime, fine: datetime, proiezione_id: int, film_id: int):
+		self.inizio = inizio
+		self.fine = fine
+		self.proiezione_id = proiezione_id
+		self.film_id = film_id
+
+class ScheduleIndex:
+	"""Proiezioni per sala in memoria, ordinate per inizio, con ricerche per bisezione.
+
+	Nella stessa sala le proiezioni non si sovrappongono, quindi anche le fine sono
+	ordinate: un controllo di sovrapposizione guarda solo l'intervallo che precede la fine
+	richiesta. Le giornate vengono caricate a finestre e scadono dopo
+	AppConfig.SCHEDULE_INDEX_TTL secondi; il controllo sul database resta al momento
+	dell'inserimento, per le proiezioni create da altri processi.
+	"""
+
+	def __init__(self, ttl: float = AppConfig.SCHEDULE_INDEX_TTL):
+		self.ttl = ttl
+		self._lock = threading.RLock()
+		# ID_Sala -> (inizi ordinati, intervalli nello stesso ordine)
+		self._sale: Dict[int, Tuple[List[datetime], List[_Intervallo]]] = {}
+		self._sala_di: Dict[int, int] = {}
+		# giornata -> istante di caricamento
+		self._giorni: Dict[date, float] = {}
+
+	def giorni_mancanti(self, data_inizio: date, data_fine: date) -> List[date]:
+		"""Giornate dell'intervallo non caricate o scadute"""
+		ora = _time.monotonic()
+		mancanti = []
+		giorno = data_inizio
+		while giorno <= data_fine:
+			caricato = self._giorni.get(giorno)
+			if caricato is None or (self.ttl and ora - caricato > self.ttl):
+				mancanti.append(giorno)
+			giorno += timedelta(days=1)
+		return mancanti
+
+	def install(self, data_inizio: date, data_fine: date, righe) -> None:
+		"""Sostituisce le giornate indicate con le righe (ID_Proiezione, ID_Sala, ID_Film, Data, Ora_Inizio, Ora_Fine)"""
+		with self._lock:
+			for sala_id, (_, intervalli) in list(self._sale.items()):
+				tenuti = [iv for iv in intervalli if not data_inizio <= iv.inizio.date() <= data_fine]
+				if len(tenuti) != len(intervalli):
+					for iv in intervalli:
+						if data_inizio <= iv.inizio.date() <= data_fine:
+							self._sala_di.pop(iv.proiezione_id, None)
+					self._sale[sala_id] = ([iv.inizio for iv in tenuti], tenuti)
+			for proiezione_id, sala_id, film_id, data, ora_inizio, ora_fine in righe:
+				inizio, fine = intervallo_proiezione(data, ora_inizio, ora_fine)
+				self._inserisci(sala_id, _Intervallo(inizio, fine, proiezione_id, film_id))
+			ora = _time.monotonic()
+			giorno = data_inizio
+			while giorno <= data_fine:
+				self._giorni[giorno] = ora
+				giorno += timedelta(days=1)
+
+	def aggiungi(self, proiezione_id: int, sala_id: int, film_id: int, inizio: datetime, fine: datetime) -> None:
+		with self._lock:
+			if inizio.date() in self._giorni:
+				self._inserisci(sala_id, _Intervallo(inizio, fine, proiezione_id, film_id))
+
+	def rimuovi(self, proiezione_id: int) -> None:
+		with self._lock:
+			sala_id = self._sala_di.pop(proiezione_id, None)
+			if sala_id is None:
+				return
+			inizi, intervalli = self._sale[sala_id]
+			for i, iv in enumerate(intervalli):
+				if iv.proiezione_id == proiezione_id:
+					del inizi[i]
+					del intervalli[i]
+					break
+
+	def invalidate(self) -> None:
+		with self._lock:
+			self._sale.clear()
+			self._sala_di.clear()
+			self._giorni.clear()
+
+	def libero(self, sala_id: int, inizio: datetime, fine: datetime, pausa: timedelta = _ZERO,
+			   escludi: int = None) -> bool:
+		"""True se [inizio, fine) non tocca altre proiezioni della sala, pausa compresa"""
+		return not any(iv.proiezione_id != escludi
+					   for iv in self.occupazioni(sala_id, inizio - pausa, fine + pausa))
+
+	def occupazioni(self, sala_id: int, da: datetime, a: datetime) -> List[_Intervallo]:
+		"""Proiezioni della sala che si sovrappongono a [da, a), in ordine di inizio"""
+		inizi, intervalli = self._sale.get(sala_id, ((), ()))
+		fine_idx = bisect_left(inizi, a)
+		i = fine_idx
+		# le fine sono ordinate come gli inizi: si risale finché finiscono dopo `da`
+		while i > 0 and intervalli[i - 1].fine > da:
+			i -= 1
+		return list(intervalli[i:fine_idx])
+
+	def buchi(self, sala_id: int, da: datetime, a: datetime, durata: timedelta,
+			  pausa: timedelta = _ZERO) -> List[Tuple[datetime, datetime]]:
+		"""Intervalli liberi di almeno `durata` dentro [da, a), lasciando `pausa` attorno alle proiezioni"""
+		risultato = []
+		cursore = da
+		for iv in self.occupazioni(sala_id, da - pausa, a + pausa):
+			if iv.inizio - pausa - cursore >= durata:
+				risultato.append((cursore, iv.inizio - pausa))
+			cursore = max(cursore, iv.fine + pausa)
+		if a - cursore >= durata:
+			risultato.append((cursore, a))
+		return risultato
+
+	def primo_libero(self, sala_id: int, dopo: datetime, durata: timedelta, entro: datetime,
+					 pausa: timedelta = _ZERO) -> Optional[datetime]:
+		"""Primo inizio >= `dopo` in cui `durata` sta nella sala prima di `entro`"""
+		inizi, intervalli = self._sale.get(sala_id, ((), ()))
+		candidato = dopo
+		i = bisect_right(inizi, dopo)
+		if i > 0:
+			candidato = max(candidato, intervalli[i - 1].fine + pausa)
+		while i < len(intervalli) and intervalli[i].inizio - pausa < candidato + durata:
+			candidato = max(candidato, intervalli[i].fine + pausa)
+			i += 1
+		return candidato if candidato + durata <= entro else None
+
+	def _inserisci(self, sala_id: int, intervallo: _Intervallo) -> None:
+		if intervallo.proiezione_id in self._sala_di:
+			return
+		inizi, intervalli = self._sale.setdefault(sala_id, ([], []))
+		i = bisect_right(inizi, intervallo.inizio)
+		inizi.insert(i, intervallo.inizio)
+		intervalli.insert(i, intervallo)
+		self._sala_di[intervallo.proiezione_id] = sala_id
+
+# Istanza globale condivisa da tutte le CinemaOperations del processo
+schedule_index = ScheduleIndex()
@@ -0,0 +1,251 @@
+import threading
+import time as _time
+from typing import Dict, List, Optional
+
+from config import AppConfig
+
+class _LayoutSala:
+	"""Posti di una sala in ordine (Fila, Numero_Posto); l'ordinale è l'indice del bit"""
+
+	__slots__ = ('posti', 'indice', 'non_disponibili', 'adiacenti', 'file', 'riga', 'colonna', 'larghezza')
+
+	def __init__(self, posti, non_disponibili: int):
+		self.posti = posti
+		self.indice = {posto[0]: i for i, posto in enumerate(posti)}
+		# bit a 1 per i posti con Stato_Posto diverso da 'Disponibile'
+		self.non_disponibili = non_disponibili
+
+		# Geometria per l'allocatore: file dalla prima all'ultima (A..Z, poi AA..),
+		# e per ogni ordinale la fila e la posizione nella fila
+		self.file = sorted({fila for _, fila, _ in posti}, key=lambda f: (len(f), f))
+		rango = {fila: r for r, fila in enumerate(self.file)}
+		self.larghezza = [0] * len(self.file)
+		self.riga = []
+		self.colonna = []
+		# bit i a 1 se il posto i+1 è attaccato al posto i nella stessa fila
+		self.adiacenti = 0
+		for i, (_, fila, numero) in enumerate(posti):
+			r = rango[fila]
+			self.riga.append(r)
+			self.colonna.append(self.larghezza[r])
+			self.larghezza[r] += 1
+			if i + 1 < len(posti) and posti[i + 1][1] == fila and posti[i + 1][2] == numero + 1:
+				self.adiacenti |= 1 << i
+
+class _StatoProiezione:
+
+	__slots__ = ('sala_id', 'layout', 'occupati', 'bloccati', 'caricato_il')
+
+	def __init__(self, sala_id: int, layout: _LayoutSala, occupati: bytearray, bloccati: Dict[int, float]):
+		self.sala_id = sala_id
+		# il layout con cui sono stati calcolati gli ordinali: un install successivo della
+		# stessa sala non deve accoppiare questo bitset con ordinali diversi
+		self.layout = layout
+		self.occupati = occupati
+		# ordinale -> scadenza (epoch) dei posti bloccati durante un pagamento
+		self.bloccati = bloccati
+		self.caricato_il = _time.monotonic()
+
+def _popcount(bits: int) -> int:
+	return bin(bits).count('1')
+
+def punteggio_centrale(riga: int, file: int, colonna: int, larghezza: int, quanti: int) -> float:
+	"""Punteggio di default dei blocchi (più basso = migliore): file centrali, poi centro della fila"""
+	return abs(riga - (file - 1) / 2) * 2 + abs(colonna - (larghezza - quanti) / 2)
+
+class SeatMapCache:
+	"""Occupazione dei posti per proiezione, tenuta in memoria come bitset.
+
+	Ogni proiezione ha un bytearray con un bit per posto della sala (1 = venduto);
+	disponibilità e conteggio diventano scansioni in memoria. I posti bloccati (BLOCCO_POSTO)
+	sono tenuti a parte con la loro scadenza e smettono di contare appena scadono.
+	La mappa è per processo: scade dopo AppConfig.SEAT_MAP_TTL secondi e il vincolo
+	unique_posto_proiezione resta l'unica garanzia contro la doppia vendita.
+	"""
+
+	def __init__(self, ttl: float = AppConfig.SEAT_MAP_TTL):
+		self.ttl = ttl
+		self._lock = threading.Lock()
+		self._sale: Dict[int, _LayoutSala] = {}
+		self._proiezioni: Dict[int, _StatoProiezione] = {}
+
+	def get(self, proiezione_id: int) -> Optional[_StatoProiezione]:
+		with self._lock:
+			return self._valido(proiezione_id)
+
+	def install(self, proiezione_id: int, righe) -> None:
+		"""Costruisce la mappa dalle righe
+		(ID_Sala, ID_Posto, Fila, Numero_Posto, Stato_Posto, Occupato, Scadenza_Blocco)"""
+		if not righe:
+			return
+		sala_id = righe[0][0]
+		posti = []
+		non_disponibili = 0
+		occupati = bytearray((len(righe) + 7) // 8)
+		bloccati = {}
+		for i, (_, posto_id, fila, numero, stato_posto, occupato, scadenza) in enumerate(righe):
+			posti.append((posto_id, fila, numero))
+			if stato_posto != 'Disponibile':
+				non_disponibili |= 1 << i
+			if occupato:
+				occupati[i >> 3] |= 1 << (i & 7)
+			if scadenza is not None:
+				bloccati[i] = scadenza.timestamp()
+
+		posti = tuple(posti)
+		with self._lock:
+			layout = self._sale.get(sala_id)
+			if layout is None or layout.posti != posti or layout.non_disponibili != non_disponibili:
+				# la sala è cambiata: gli ordinali delle altre proiezioni non sono più validi
+				for pid in [pid for pid, st in self._proiezioni.items() if st.sala_id == sala_id]:
+					del self._proiezioni[pid]
+				layout = self._sale[sala_id] = _LayoutSala(posti, non_disponibili)
+			self._proiezioni[proiezione_id] = _StatoProiezione(sala_id, layout, occupati, bloccati)
+
+	def posti_liberi(self, proiezione_id: int) -> Optional[List[Dict]]:
+		istantanea = self._istantanea(proiezione_id)
+		if istantanea is None:
+			return None
+		layout, liberi = istantanea
+		posti = layout.posti
+		liberi = liberi.to_bytes((len(posti) + 7) // 8, 'little')
+		risultato = []
+		for byte_idx, byte in enumerate(liberi):
+			if not byte:
+				continue
+			base = byte_idx << 3
+			for bit in range(8):
+				if byte >> bit & 1:
+					posto_id, fila, numero = posti[base + bit]
+					risultato.append({'ID_Posto': posto_id, 'Numero_Posto': numero, 'Fila': fila})
+		return risultato
+
+	def conta_liberi(self, proiezione_id: int) -> Optional[int]:
+		istantanea = self._istantanea(proiezione_id)
+		if istantanea is None:
+			return None
+		return _popcount(istantanea[1])
+
+	def miglior_blocco(self, proiezione_id: int, quanti: int, punteggio=None,
+					   escludi=()) -> Optional[List[Dict]]:
+		"""Il blocco di `quanti` posti liberi e attaccati nella stessa fila con il punteggio più basso.
+
+		`punteggio(riga, file, colonna, larghezza, quanti)` valuta il blocco che inizia alla
+		colonna indicata (default: punteggio_centrale). Restituisce [] se nessun blocco è libero.
+		"""
+		istantanea = self._istantanea(proiezione_id)
+		if istantanea is None:
+			return None
+		layout, liberi = istantanea
+		for posto_id in escludi:
+			i = layout.indice.get(posto_id)
+			if i is not None:
+				liberi &= ~(1 << i)
+
+		# bit i a 1 se i posti i..i+quanti-1 sono tutti liberi e attaccati
+		inizi = liberi
+		for k in range(1, quanti):
+			inizi &= (liberi >> k) & (layout.adiacenti >> (k - 1))
+
+		punteggio = punteggio or punteggio_centrale
+		migliore = None
+		while inizi:
+			basso = inizi & -inizi
+			inizi ^= basso
+			i = basso.bit_length() - 1
+			r = layout.riga[i]
+			valore = punteggio(r, len(layout.file), layout.colonna[i], layout.larghezza[r], quanti)
+			if migliore is None or valore < migliore[0]:
+				migliore = (valore, i)
+		if migliore is None:
+			return []
+		return [
+			{'ID_Posto': posto_id, 'Numero_Posto': numero, 'Fila': fila}
+			for posto_id, fila, numero in layout.posti[migliore[1]:migliore[1] + quanti]
+		]
+
+	def segna_occupato(self, proiezione_id: int, posto_id: int) -> None:
+		self._imposta(proiezione_id, posto_id, True)
+
+	def segna_libero(self, proiezione_id: int, posto_id: int) -> None:
+		self._imposta(proiezione_id, posto_id, False)
+
+	def segna_bloccato(self, proiezione_id: int, posto_id: int, scadenza: float) -> None:
+		with self._lock:
+			stato, i = self._ordinale(proiezione_id, posto_id)
+			if stato is not None:
+				stato.bloccati[i] = scadenza
+
+	def segna_sbloccato(self, proiezione_id: int, posto_id: int) -> None:
+		with self._lock:
+			stato, i = self._ordinale(proiezione_id, posto_id)
+			if stato is not None:
+				stato.bloccati.pop(i, None)
+
+	def invalidate(self, proiezione_id: int = None) -> None:
+		with self._lock:
+			if proiezione_id is None:
+				self._proiezioni.clear()
+				self._sale.clear()
+			else:
+				self._proiezioni.pop(proiezione_id, None)
+
+	def _valido(self, proiezione_id: int) -> Optional[_StatoProiezione]:
+		"""Stato non scaduto della proiezione; da chiamare con il lock preso"""
+		stato = self._proiezioni.get(proiezione_id)
+		if stato is None:
+			return None
+		if self.ttl and _time.monotonic() - stato.caricato_il > self.ttl:
+			del self._proiezioni[proiezione_id]
+			return None
+		return stato
+
+	def _istantanea(self, proiezione_id: int):
+		"""(layout, bit dei posti liberi) letti insieme sotto il lock; None se va ricaricata.
+		Il layout non cambia dopo la creazione, quindi può essere usato fuori dal lock."""
+		with self._lock:
+			stato = self._valido(proiezione_id)
+			if stato is None:
+				return None
+			return stato.layout, self._bits_liberi(stato)
+
+	@staticmethod
+	def _bits_liberi(stato: _StatoProiezione) -> int:
+		"""Da chiamare con il lock preso: scarta i blocchi scaduti"""
+		layout = stato.layout
+		tutti = (1 << len(layout.posti)) - 1
+		occupati = int.from_bytes(stato.occupati, 'little')
+		if stato.bloccati:
+			ora = _time.time()
+			for i, scadenza in list(stato.bloccati.items()):
+				if scadenza > ora:
+					occupati |= 1 << i
+				else:
+					stato.bloccati.pop(i, None)
+		return tutti & ~(occupati | layout.non_disponibili)
+
+	def _ordinale(self, proiezione_id: int, posto_id: int):
+		"""(stato, ordinale) del posto; da chiamare con il lock preso"""
+		stato = self._proiezioni.get(proiezione_id)
+		if stato is None:
+			return None, None
+		i = stato.layout.indice.get(posto_id)
+		if i is None:
+			# posto non appartenente alla sala in cache: meglio ricaricare
+			self._proiezioni.pop(proiezione_id, None)
+			return None, None
+		return stato, i
+
+	def _imposta(self, proiezione_id: int, posto_id: int, occupato: bool) -> None:
+		with self._lock:
+			stato, i = self._ordinale(proiezione_id, posto_id)
+			if stato is None:
+				return
+			if occupato:
+				stato.occupati[i >> 3] |= 1 << (i & 7)
+				stato.bloccati.pop(i, None)
+			else:
+				stato.occupati[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+
+# Istanza globale condivisa da tutte le CinemaOperations del processo
+seat_map = SeatMapCache()
@@ -17,10 +17,8 @@ def seed():
 	sala2_id = ops.create_sala(2, 80, "Attiva")
 
 	# === POSTI (solo alcuni per esempio) ===
-	for fila in ['A', 'B']:
-		for num in range(1, 6):
-			ops.create_posto(sala1_id, fila, num)
-			ops.create_posto(sala2_id, fila, num)
+	ops.create_posti_layout(sala1_id, ['A', 'B'], 5)
+	ops.create_posti_layout(sala2_id, ['A', 'B'], 5)
 
 	# === TECNOLOGIE ===
 	tech1_id = ops.create_tecnologia("2D", "Proiezione standard")
@@ -0,0 +1,84 @@
+from config import AppConfig
+from film_search import FilmSearchIndex, normalizza
+
+# (ID_Film, Titolo, Durata, Genere, Classificazione, Anno_Uscita, ID_Regista, Nome_Regista, Cognome_Regista)
+FILM = [
+	(1, "Notte stellata", 110, "Dramma", "T", 2001, 1, "Mario", "Rossi"),
+	(2, "La lunga notte", 95, "Thriller", "VM14", 2010, 2, "Anna", "Verdi"),
+	(3, "Il ritorno", 120, "Dramma", "T", 2015, 3, "Luca", "Notte"),
+	(4, "Mare aperto", 100, "Avventura", "T", 2018, 1, "Mario", "Rossi"),
+	(5, "Marea nera", 105, "Avventura", "T", 2019, 2, "Anna", "Verdi"),
+	(6, "Città aperta", 100, "Dramma", "T", 1945, 4, "Roberto", "Rossellini"),
+]
+
+def _indice(righe=FILM) -> FilmSearchIndex:
+	indice = FilmSearchIndex(ttl=0)
+	indice.install(righe)
+	return indice
+
+def _ids(risultati):
+	return [f['ID_Film'] for f in risultati]
+
+def test_normalizza_toglie_accenti_e_punteggiatura():
+	assert normalizza("  Città, APERTA! ") == "citta aperta"
+	assert normalizza(None) == ""
+
+def test_non_caricato_restituisce_none():
+	indice = FilmSearchIndex(ttl=0)
+	assert indice.cerca("notte") is None
+	indice.aggiungi(FILM[0])
+	assert indice.cerca("notte") is None
+
+def test_titolo_prima_del_regista_e_inizio_titolo_prima():
+	# titolo che inizia con la parola, poi titolo che la contiene, poi il regista
+	assert _ids(_indice().cerca("notte")) == [1, 2, 3]
+
+def test_corrispondenza_esatta_prima_del_prefisso():
+	assert _ids(_indice().cerca("mare")) == [4, 5]
+	# solo prefissi: a parità di punteggio vince il titolo più corto, il regista viene dopo
+	assert _ids(_indice().cerca("mar")) == [5, 4, 1]
+
+def test_limite():
+	assert _ids(_indice().cerca("notte", limite=2)) == [1, 2]
+	assert _indice().cerca("notte", limite=0) == []
+
+def test_piu_parole_devono_corrispondere_tutte():
+	indice = _indice()
+	assert _ids(indice.cerca("notte rossi")) == [1]
+	assert _ids(indice.cerca("rossi notte")) == [1]
+	assert _ids(indice.cerca("aperta dramma")) == [6]
+	assert indice.cerca("notte avventura") == []
+
+def test_accenti_e_maiuscole():
+	indice = _indice()
+	assert _ids(indice.cerca("citta")) == [6]
+	assert _ids(indice.cerca("CITTÀ")) == [6]
+	assert _ids(indice.cerca("Città")) == [6]
+
+def test_prefisso_minimo():
+	indice = _indice()
+	corta = "n" * (AppConfig.RICERCA_MIN_PREFISSO - 1)
+	assert indice.cerca(corta) == []
+	assert _ids(indice.cerca("notte"[:AppConfig.RICERCA_MIN_PREFISSO])) == [1, 2, 3]
+	# accanto a una parola più lunga, quella corta vale come prefisso
+	assert _ids(indice.cerca("notte s")) == [1]
+
+def test_aggiungi_e_rimuovi():
+	indice = _indice()
+	indice.aggiungi((7, "Notte di luna", 90, "Commedia", "T", 2020, 2, "Anna", "Verdi"))
+	assert 7 in _ids(indice.cerca("luna"))
+	# stesso punteggio di "Notte stellata", titolo più corto
+	assert _ids(indice.cerca("notte"))[:2] == [7, 1]
+
+	indice.rimuovi(1)
+	assert _ids(indice.cerca("notte")) == [7, 2, 3]
+	assert _ids(indice.cerca("stellata")) == []
+	# la parola "stellata" non ha più film: niente liste vuote nel vocabolario
+	assert _ids(indice.cerca("st")) == []
+
+def test_aggiungi_sostituisce_il_film():
+	indice = _indice()
+	indice.aggiungi((3, "Il viaggio", 120, "Dramma", "T", 2015, 3, "Luca", "Bianchi"))
+	assert _ids(indice.cerca("ritorno")) == []
+	assert _ids(indice.cerca("viaggio")) == [3]
+	assert _ids(indice.cerca("notte")) == [1, 2]
@@ -0,0 +1,29 @@
+from datetime import date, timedelta
+
+from palinsesto import PianificatoreSettimanale
+from schedule_index import finestra_apertura
+
+GIORNO = date(2024, 3, 1)
+APERTURA, CHIUSURA = finestra_apertura(GIORNO)
+
+def _pianificatore(operatori, sale, impegni=()) -> PianificatoreSettimanale:
+	turni = {o: [(APERTURA, CHIUSURA)] for o in operatori}
+	pianificatore = PianificatoreSettimanale(sale, {100: 120}, turni, timedelta(0), arrotondamento=1)
+	pianificatore.occupa(GIORNO, GIORNO + timedelta(days=1), [], impegni)
+	return pianificatore
+
+def test_operatore_non_in_due_sale_insieme():
+	pianificatore = _pianificatore([7], {1: 100, 2: 80})
+	proposte, non_piazzate = pianificatore.pianifica([GIORNO], {100: 2})
+	# un solo operatore: la sala 2 è libera all'apertura, ma lui è nella sala 1 fino alle due ore dopo
+	assert [(p['ID_Sala'], p['Inizio']) for p in proposte] == [
+		(1, APERTURA), (1, APERTURA + timedelta(minutes=120))
+	]
+	assert non_piazzate == []
+
+def test_impegni_esistenti():
+	# a parità di carico toccherebbe al 7, che però è già in un'altra sala all'apertura
+	impegni = [(7, APERTURA - timedelta(minutes=30), APERTURA + timedelta(minutes=30))]
+	pianificatore = _pianificatore([7, 8], {2: 80}, impegni)
+	proposte, _ = pianificatore.pianifica([GIORNO], {100: 1})
+	assert (proposte[0]['Inizio'], proposte[0]['ID_Operatore']) == (APERTURA, 8)
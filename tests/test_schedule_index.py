@@ -0,0 +1,86 @@
+from datetime import date, datetime, time, timedelta
+
+from schedule_index import ScheduleIndex, intervallo_proiezione
+
+GIORNO = date(2024, 3, 1)
+PAUSA = timedelta(minutes=15)
+
+def _ora(ore: int, minuti: int = 0, giorni: int = 0) -> datetime:
+	return datetime.combine(GIORNO + timedelta(days=giorni), time(ore, minuti))
+
+def _indice() -> ScheduleIndex:
+	"""Sala 1: 14:00-16:00 e 18:00-20:30; sala 2: 22:30-00:30 (finisce il giorno dopo)"""
+	indice = ScheduleIndex(ttl=0)
+	indice.install(GIORNO, GIORNO, [
+		(10, 1, 100, GIORNO, time(18, 0), time(20, 30)),
+		(11, 1, 101, GIORNO, time(14, 0), time(16, 0)),
+		(12, 2, 100, GIORNO, time(22, 30), time(0, 30)),
+	])
+	return indice
+
+def _ids(intervalli):
+	return [iv.proiezione_id for iv in intervalli]
+
+def test_intervallo_oltre_mezzanotte():
+	assert intervallo_proiezione(GIORNO, time(22, 30), time(0, 30)) == (_ora(22, 30), _ora(0, 30, giorni=1))
+	assert intervallo_proiezione(GIORNO, time(14), time(16)) == (_ora(14), _ora(16))
+
+def test_occupazioni_in_ordine_di_inizio():
+	indice = _indice()
+	assert _ids(indice.occupazioni(1, _ora(0), _ora(23, 59))) == [11, 10]
+	assert _ids(indice.occupazioni(1, _ora(15), _ora(18, 1))) == [11, 10]
+	# estremi aperti a destra: chi finisce alle 16 non tocca chi inizia alle 16
+	assert _ids(indice.occupazioni(1, _ora(16), _ora(18))) == []
+	assert _ids(indice.occupazioni(3, _ora(0), _ora(23))) == []
+
+def test_libero_con_pausa_ed_escludi():
+	indice = _indice()
+	assert indice.libero(1, _ora(16), _ora(18))
+	assert not indice.libero(1, _ora(16), _ora(18), PAUSA)
+	assert indice.libero(1, _ora(16, 15), _ora(17, 45), PAUSA)
+	assert not indice.libero(1, _ora(19), _ora(21))
+	# spostare una proiezione non la fa sovrapporre a se stessa
+	assert indice.libero(1, _ora(18, 30), _ora(21), escludi=10)
+	# la proiezione di mezzanotte occupa anche il giorno dopo
+	assert not indice.libero(2, _ora(0, 0, giorni=1), _ora(1, 0, giorni=1))
+
+def test_buchi():
+	indice = _indice()
+	assert indice.buchi(1, _ora(12), _ora(23), timedelta(hours=1)) == [
+		(_ora(12), _ora(14)), (_ora(16), _ora(18)), (_ora(20, 30), _ora(23))
+	]
+	assert indice.buchi(1, _ora(12), _ora(23), timedelta(hours=2), PAUSA) == [
+		(_ora(20, 45), _ora(23))
+	]
+
+def test_primo_libero():
+	indice = _indice()
+	due_ore = timedelta(hours=2)
+	assert indice.primo_libero(1, _ora(10), due_ore, _ora(23)) == _ora(10)
+	assert indice.primo_libero(1, _ora(13), due_ore, _ora(23)) == _ora(16)
+	assert indice.primo_libero(1, _ora(13), due_ore, _ora(23), PAUSA) == _ora(20, 45)
+	# con la pausa il primo buco utile è dopo le 20:30, e non finisce entro le 22
+	assert indice.primo_libero(1, _ora(15), due_ore, _ora(22), PAUSA) is None
+
+def test_aggiungi_e_rimuovi():
+	indice = _indice()
+	indice.aggiungi(13, 1, 102, _ora(16, 30), _ora(17, 30))
+	assert _ids(indice.occupazioni(1, _ora(0), _ora(23, 59))) == [11, 13, 10]
+	assert not indice.libero(1, _ora(17), _ora(17, 15))
+	indice.rimuovi(13)
+	assert indice.libero(1, _ora(17), _ora(17, 15))
+	indice.rimuovi(13)
+	# giornata non caricata: l'aggiunta viene ignorata, la si leggerà dal database
+	indice.aggiungi(14, 1, 102, _ora(10, giorni=5), _ora(12, giorni=5))
+	assert _ids(indice.occupazioni(1, _ora(0, giorni=5), _ora(23, giorni=5))) == []
+
+def test_giorni_mancanti_e_ricarica():
+	indice = _indice()
+	domani = GIORNO + timedelta(days=1)
+	assert indice.giorni_mancanti(GIORNO, domani) == [domani]
+	# ricaricare la giornata sostituisce le sue proiezioni, le altre restano
+	indice.install(GIORNO, GIORNO, [(11, 1, 101, GIORNO, time(14, 0), time(16, 0))])
+	assert _ids(indice.occupazioni(1, _ora(0), _ora(23, 59))) == [11]
+	assert _ids(indice.occupazioni(2, _ora(0), _ora(23, 59))) == []
+	indice.invalidate()
+	assert indice.giorni_mancanti(GIORNO, GIORNO) == [GIORNO]
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+from seat_map import SeatMapCache
+
+FILE = "ABCDE"
+POSTI_PER_FILA = 10
+
+def _righe(occupati=(), non_disponibili=(), bloccati=None, mancanti=()):
+	"""Righe di _righe_mappa_posti per la sala 1: ID_Posto = 100 * (fila + 1) + numero"""
+	bloccati = bloccati or {}
+	righe = []
+	for r, fila in enumerate(FILE):
+		for numero in range(1, POSTI_PER_FILA + 1):
+			posto_id = 100 * (r + 1) + numero
+			if posto_id in mancanti:
+				continue
+			righe.append((1, posto_id, fila, numero,
+						  'Non disponibile' if posto_id in non_disponibili else 'Disponibile',
+						  posto_id in occupati, bloccati.get(posto_id)))
+	return righe
+
+def _mappa(**kwargs) -> SeatMapCache:
+	mappa = SeatMapCache(ttl=0)
+	mappa.install(7, _righe(**kwargs))
+	return mappa
+
+def _ids(blocco):
+	return [p['ID_Posto'] for p in blocco]
+
+def test_proiezione_non_caricata():
+	assert SeatMapCache(ttl=0).miglior_blocco(7, 2) is None
+
+def test_sala_vuota_blocco_centrale():
+	mappa = _mappa()
+	# fila centrale (C), centrato nella fila
+	assert _ids(mappa.miglior_blocco(7, 2)) == [305, 306]
+	assert _ids(mappa.miglior_blocco(7, 4)) == [304, 305, 306, 307]
+	blocco = mappa.miglior_blocco(7, 1)
+	assert blocco[0] == {'ID_Posto': 305, 'Numero_Posto': 5, 'Fila': 'C'}
+
+def test_posti_occupati_spezzano_il_blocco():
+	mappa = _mappa(occupati=(303, 306))
+	# in C restano 304-305 (2 posti) e 307-310: un blocco da 3 sta solo a destra o in altre file
+	blocco = _ids(mappa.miglior_blocco(7, 3))
+	assert not {303, 306} & set(blocco)
+	assert blocco in ([307, 308, 309], [204, 205, 206], [404, 405, 406])
+	assert _ids(mappa.miglior_blocco(7, 2)) == [304, 305]
+
+def test_blocco_non_attraversa_le_file():
+	tutti = {100 * (r + 1) + n for r in range(len(FILE)) for n in range(1, POSTI_PER_FILA + 1)}
+	# liberi solo gli ultimi due posti della fila A e i primi due della B
+	mappa = _mappa(occupati=tutti - {109, 110, 201, 202})
+	assert mappa.miglior_blocco(7, 3) == []
+	assert _ids(mappa.miglior_blocco(7, 2)) == [201, 202]
+
+def test_blocco_piu_lungo_della_fila():
+	assert _mappa().miglior_blocco(7, POSTI_PER_FILA + 1) == []
+	assert len(_mappa().miglior_blocco(7, POSTI_PER_FILA)) == POSTI_PER_FILA
+
+def test_posti_non_disponibili_e_buchi_di_numerazione():
+	mappa = _mappa(non_disponibili=(305,))
+	assert 305 not in _ids(mappa.miglior_blocco(7, 2))
+	# senza il posto 5 la fila ha due tratti, 1-4 e 6-10: il 4 e il 6 non sono attaccati
+	mappa = _mappa(mancanti=(105, 205, 305, 405, 505))
+	for quanti in (2, 4, 5):
+		blocco = mappa.miglior_blocco(7, quanti)
+		numeri = [p['Numero_Posto'] for p in blocco]
+		assert numeri == list(range(numeri[0], numeri[0] + quanti))
+	assert mappa.miglior_blocco(7, 6) == []
+
+def test_blocchi_attivi_e_scaduti():
+	ora = datetime.now()
+	mappa = _mappa(bloccati={305: ora + timedelta(minutes=5), 306: ora - timedelta(minutes=5)})
+	# il blocco scaduto non conta: libero il 306, non il 305
+	assert mappa.conta_liberi(7) == 49
+	assert _ids(mappa.miglior_blocco(7, 2)) == [306, 307]
+
+	mappa.segna_sbloccato(7, 305)
+	assert _ids(mappa.miglior_blocco(7, 2)) == [305, 306]
+	mappa.segna_bloccato(7, 306, (ora + timedelta(minutes=5)).timestamp())
+	assert 306 not in _ids(mappa.miglior_blocco(7, 2))
+
+def test_escludi_e_vendite():
+	mappa = _mappa()
+	assert 305 not in _ids(mappa.miglior_blocco(7, 2, escludi=(305,)))
+	mappa.segna_occupato(7, 305)
+	assert 305 not in _ids(mappa.miglior_blocco(7, 2))
+	mappa.segna_libero(7, 305)
+	assert _ids(mappa.miglior_blocco(7, 2)) == [305, 306]
+
+def test_punteggio_personalizzato():
+	# prima fila, da sinistra
+	davanti = lambda riga, file, colonna, larghezza, quanti: riga * 100 + colonna
+	assert _ids(_mappa().miglior_blocco(7, 3, punteggio=davanti)) == [101, 102, 103]
+	assert _ids(_mappa(occupati=(102,)).miglior_blocco(7, 3, punteggio=davanti)) == [103, 104, 105]
+
+def test_nuovo_layout_della_sala_invalida_le_altre_proiezioni():
+	mappa = _mappa()
+	mappa.install(8, _righe())
+	mappa.install(9, _righe(mancanti=(510,)))
+	assert mappa.miglior_blocco(7, 2) is None
+	assert mappa.miglior_blocco(8, 2) is None
+	assert _ids(mappa.miglior_blocco(9, 2)) == [305, 306]